@@ -0,0 +1,35 @@
+import os
+import sys
+import timeit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownAnalyzer
+
+# Re-analysing a document after a one-line edit: MarkdownAnalyzer.apply_edit versus building a new analyzer.
+data_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', '13529199_prapti_haskos.md')
+copies = 10  # the sample file is small; repeat it to get an editor-sized document
+
+with open(data_file_path, 'r', encoding='utf-8') as f:
+    text = "\n".join([f.read()] * copies)
+line_count = len(text.split('\n')); middle = line_count // 2
+analyzer = MarkdownAnalyzer.from_string(text); analyzer.analyse()
+
+
+def incremental():
+    analyzer.apply_edit(middle, middle, "An edited paragraph with a [link](http://example.com) and `code`.")
+    analyzer.analyse()
+
+
+def full():
+    MarkdownAnalyzer.from_string(analyzer.text).analyse()
+
+
+incremental()
+assert analyzer.analyse() == MarkdownAnalyzer.from_string(analyzer.text).analyse(), "incremental result differs from a full parse"
+incremental_time = min(timeit.repeat(incremental, number=20, repeat=3)) / 20
+full_time = min(timeit.repeat(full, number=3, repeat=3)) / 3
+print(f"One-line edit in a {line_count}-line document, followed by analyse():")
+print(f"  full re-parse : {full_time * 1000:8.2f} ms")
+print(f"  apply_edit    : {incremental_time * 1000:8.2f} ms  ({full_time / incremental_time:.1f}x faster)")
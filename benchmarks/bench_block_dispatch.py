@@ -0,0 +1,56 @@
+import os
+import sys
+import timeit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import BlockToken, MarkdownParser
+
+# Block scanning throughput (lines/sec) of the first-character dispatch against the previous implementation,
+# which tried every block regex in sequence.
+data_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', '13529199_prapti_haskos.md')
+copies = 20
+repeat = 5
+
+
+class RegexScanParser(MarkdownParser):
+    """MarkdownParser with the previous starts_new_block and parse_block."""
+    def starts_new_block(self, line):
+        return any(regex.match(line) for regex in [self.ATX_HEADER_RE, self.FRONTMATTER_RE, self.FENCE_RE, self.BLOCKQUOTE_RE, self.ORDERED_LIST_RE, self.UNORDERED_LIST_RE, self.HR_RE, self.HTML_BLOCK_START])
+
+    def parse_block(self):
+        line = self.lines[self.pos]
+        if not line.strip(): self.pos += 1; return
+        if line.startswith("    ") or line.startswith("\t"): self.parse_indented_code_block(); return
+        if self.is_table_start(): self.parse_table(); return
+        if self.is_html_block_start(line): self.parse_html_block(); return
+        m_atx = self.ATX_HEADER_RE.match(line)
+        if m_atx: self.tokens.append(BlockToken('header', content=m_atx.group(2).strip(), level=len(m_atx.group(1)), line=self.pos+1)); self.pos += 1; return
+        if self.pos+1 < self.length:
+            next_line_strip = self.lines[self.pos+1].strip()
+            if self.SETEXT_H1_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=line.strip(), level=1, line=self.pos+1)); self.pos += 2; return
+            if self.SETEXT_H2_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=line.strip(), level=2, line=self.pos+1)); self.pos += 2; return
+        if self.HR_RE.match(line.strip()): self.tokens.append(BlockToken('hr', line=self.pos+1)); self.pos += 1; return
+        fm_fence = self.FENCE_RE.match(line.strip())
+        if fm_fence: self.parse_fenced_code_block(fm_fence.group(1).strip()); return
+        bm_bq = self.BLOCKQUOTE_RE.match(line)
+        if bm_bq: self.parse_blockquote(); return
+        om_list, um_list = self.ORDERED_LIST_RE.match(line), self.UNORDERED_LIST_RE.match(line)
+        if om_list or um_list: self.parse_list(ordered=bool(om_list)); return
+        self.parse_paragraph()
+
+
+with open(data_file_path, 'r', encoding='utf-8') as f:
+    text = "\n".join([f.read()] * copies)
+lines = [line.strip() for line in text.split('\n')]
+line_count = len(lines)
+signature = lambda tokens: [(t.type, t.content, t.level, t.meta, t.line) for t in tokens]
+assert signature(RegexScanParser(text).parse()) == signature(MarkdownParser(text).parse()), "tokens differ"
+
+print(f"{line_count} lines ({copies} copies of {os.path.basename(data_file_path)}):")
+for label, parser_class in (("regex scan", RegexScanParser), ("dispatch", MarkdownParser)):
+    parser = parser_class("")
+    check_time = min(timeit.repeat(lambda: [parser.starts_new_block(line) for line in lines], number=1, repeat=repeat))
+    parse_time = min(timeit.repeat(lambda: parser_class(text).parse(), number=1, repeat=repeat))
+    print(f"  {label:10s}: starts_new_block {line_count / check_time / 1e6:6.2f} M lines/s   parse() {line_count / parse_time / 1e3:8.1f} K lines/s")
@@ -0,0 +1,47 @@
+import glob
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownChunker, MarkdownDocument
+
+# Chunking throughput over a directory of Markdown files: parsing plus MarkdownChunker, and the chunker alone,
+# against packing get_tokens_sequential() output by content length, which needs every inline element parsed first.
+data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data')
+max_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+repeat = 20
+paths = sorted(glob.glob(os.path.join(data_dir, '**', '*.md'), recursive=True))
+megabytes = sum(os.path.getsize(path) for path in paths) / 1e6 * repeat
+chunker = MarkdownChunker(max_size=max_size)
+
+
+def sequential_chunks(doc):
+    chunks, parts, size = [], [], 0
+    for element in doc.get_sequential_elements():
+        content = element.get('content') or "\n".join(item['content'] for item in element.get('items', ())) or ""
+        if parts and size + len(content) > max_size: chunks.append("\n\n".join(parts)); parts, size = [], 0
+        parts.append(content); size += len(content)
+    if parts: chunks.append("\n\n".join(parts))
+    return chunks
+
+
+docs = [MarkdownDocument.from_file(path) for path in paths]
+start = time.perf_counter()
+for _ in range(repeat):
+    chunk_count = sum(1 for path in paths for _ in MarkdownDocument.from_file(path).iter_chunks(max_size))
+parse_and_chunk = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(repeat):
+    for path in paths: sequential_chunks(MarkdownDocument.from_file(path))
+parse_and_sequential = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(repeat):
+    for doc in docs: list(chunker.iter_chunks(doc.analyzer))
+chunk_only = time.perf_counter() - start
+print(f"{len(paths)} files x {repeat} ({megabytes:.2f} MB), {chunk_count} chunks of at most {max_size} characters:")
+print(f"  parse + get_tokens_sequential() packing : {megabytes / parse_and_sequential:7.2f} MB/s")
+print(f"  parse + MarkdownChunker                 : {megabytes / parse_and_chunk:7.2f} MB/s  ({parse_and_sequential / parse_and_chunk:.1f}x faster)")
+print(f"  MarkdownChunker on parsed documents     : {megabytes / chunk_only:7.2f} MB/s")
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownAnalyzer
+
+# Compares count_words/count_characters against the previous implementations (text.split() and a list of every
+# non-whitespace character) on a large synthetic document: wall time, and peak allocation measured with tracemalloc.
+megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+paragraph = "Some *emphasised* words, a [link](http://example.com) and non-breaking　spaces.\n\n"
+text = "# Title\n\n" + paragraph * (megabytes * 1_000_000 // len(paragraph))
+analyzer = MarkdownAnalyzer.__new__(MarkdownAnalyzer); analyzer.text = text  # counting needs no tokens
+
+
+def measure(function):
+    start = time.perf_counter(); result = function(); elapsed = time.perf_counter() - start
+    tracemalloc.start(); function(); peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+cases = [("words, text.split()", lambda: len(text.split())),
+         ("words, count_words", analyzer.count_words),
+         ("characters, list of chars", lambda: len([char for char in text if not char.isspace()])),
+         ("characters, count_characters", analyzer.count_characters)]
+print(f"{len(text) / 1e6:.0f} M characters:")
+results = {}
+for label, function in cases:
+    result, elapsed, peak = measure(function); results[label] = result
+    print(f"  {label:30}: {elapsed:6.2f} s, peak {peak:8.1f} MB")
+assert results["words, text.split()"] == results["words, count_words"], "word counts differ"
+assert results["characters, list of chars"] == results["characters, count_characters"], "character counts differ"
@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import CrawlPipeline, MarkdownAnalyzer, MarkdownConverter, WebsiteScraper
+
+# A local site with a fixed server latency per page: the three phases one after another (scrape everything, convert
+# everything, analyse everything) versus CrawlPipeline, which overlaps network waits with conversion and analysis.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+scraper_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+content = "".join(f"<h2>Part {i}</h2><p>Some <b>bold</b> text and a <a href='/ext{i}.pdf'>file</a>.</p><ul><li>a</li><li>b</li></ul>" for i in range(30))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        i = int(self.path.strip("/") or 0); time.sleep(latency)
+        links = "".join(f"<a href='/{j}'>{j}</a>" for j in range(3 * i + 1, min(3 * i + 4, page_count)))
+        body = f"<html><head><title>Page {i}</title></head><body>{links}<h1>Page {i}</h1>{content}</body></html>".encode()
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+def phases(base_url):
+    pages = WebsiteScraper(base_url, max_depth=10, max_workers=scraper_workers).scrape(); converter = MarkdownConverter()
+    converted = {url: converter.convert_page(html)[0] for url, html in pages.items()}
+    return [MarkdownAnalyzer.from_string(markdown).analyse() for markdown in converted.values()]
+
+
+def pipeline(base_url):
+    return [page["result"] for page in CrawlPipeline(base_url, max_depth=10, scraper_workers=scraper_workers).run()]
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), Handler); threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}"
+print(f"{page_count} pages, {latency * 1000:.0f} ms server latency, {scraper_workers} fetch threads, {os.cpu_count()} CPUs:")
+results = []
+for label, run in (("scrape, convert, analyse", phases), ("CrawlPipeline", pipeline)):
+    start = time.perf_counter(); results.append(run(base_url)); elapsed = time.perf_counter() - start
+    print(f"  {label:25}: {elapsed:6.2f} s")
+server.shutdown(); server.server_close()
+assert results[0] == results[1], "pipeline results differ"
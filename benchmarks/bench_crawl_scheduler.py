@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import CrawlScheduler, WebsiteScraper
+
+# Crawls a local site that allows `rate` requests a second (token bucket with bursts of 3, Retry-After: 1 with a 429 beyond that)
+# with 8 scraper threads: without a scheduler, and with a CrawlScheduler that learns the rate from robots.txt.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+rate = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock(); tokens = 1.0; last = time.monotonic(); limited = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            now = time.monotonic(); cls.tokens = min(3.0, cls.tokens + (now - cls.last) * rate); cls.last = now
+            allowed = self.path == "/robots.txt" or cls.tokens >= 1
+            if allowed and self.path != "/robots.txt": cls.tokens -= 1
+            if not allowed: cls.limited += 1
+        if self.path == "/robots.txt": body = f"User-agent: *\nRequest-rate: {int(rate)}/1\n".encode()
+        elif self.path == "/": body = "".join(f"<a href='/p{i}'>{i}</a>" for i in range(page_count - 1)).encode()
+        else: body = b"<html><p>page</p></html>"
+        self.send_response(200 if allowed else 429); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body)))
+        if not allowed: self.send_header("Retry-After", "1")
+        self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+def crawl(base_url, scheduler):
+    RateLimitedHandler.limited = 0; RateLimitedHandler.tokens = 3.0; RateLimitedHandler.last = time.monotonic()
+    start = time.perf_counter(); pages = WebsiteScraper(base_url + "/", max_depth=1, max_workers=8, scheduler=scheduler).scrape()
+    return len(pages), RateLimitedHandler.limited, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    import logging; logging.disable(logging.CRITICAL)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedHandler); threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {"no scheduler": crawl(base_url, None), "CrawlScheduler": crawl(base_url, CrawlScheduler())}
+    server.shutdown(); server.server_close()
+    assert results["CrawlScheduler"][0] == page_count, "scheduled crawl lost pages"
+    print(f"{page_count} pages, server allows {rate:g} requests/s:")
+    for name, (pages, limited, elapsed) in results.items():
+        print(f"  {name:15s}: {pages:4d} pages, {limited:4d} 429s, {elapsed:5.2f} s ({pages / elapsed:5.1f} pages/s)")
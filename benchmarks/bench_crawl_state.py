@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import CrawlState, WebsiteScraper
+
+# Crawl throughput of a synthetic site served from memory (no network, so the bookkeeping is all that is measured):
+# no crawl state, a checkpoint after every page, and the default batched checkpoints.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+filler = "<p>" + "Some text with <b>markup</b>. " * 200 + "</p>"
+
+
+def fake_fetch(scraper, url, session=None):
+    i = int(url.rsplit("/p", 1)[1]) if "/p" in url else 0
+    links = "".join(f"<a href='/p{j}'>{j}</a>" for j in range(5 * i + 1, min(5 * i + 6, page_count)))
+    return SimpleNamespace(text=f"<html><body>{links}{filler}</body></html>", headers={'Content-Type': 'text/html'})
+
+
+def crawl(checkpoint_every):
+    with tempfile.TemporaryDirectory() as tmp:
+        state = CrawlState(os.path.join(tmp, "crawl.sqlite"), checkpoint_every) if checkpoint_every else None
+        start = time.perf_counter(); pages = WebsiteScraper("http://example.com", max_depth=10, crawl_state=state).scrape(); elapsed = time.perf_counter() - start
+        if state: state.close()
+    return pages, elapsed
+
+
+with patch.object(WebsiteScraper, '_fetch', fake_fetch):
+    print(f"{page_count} pages:")
+    baseline, elapsed = crawl(0)
+    print(f"  no crawl state            : {page_count / elapsed:8.0f} pages/s")
+    for checkpoint_every in (1, 100):
+        pages, elapsed = crawl(checkpoint_every)
+        assert pages == baseline, "crawl with state differs"
+        print(f"  checkpoint every {checkpoint_every:3d} pages : {page_count / elapsed:8.0f} pages/s")
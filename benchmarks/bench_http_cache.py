@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import HTTPCache, WebsiteScraper
+
+# Re-crawl of an unchanged site served locally with ETags and a simulated bandwidth: without a cache every page is
+# downloaded again; with HTTPCache the second crawl gets 304 Not Modified responses and bodies come from disk.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+bandwidth = float(sys.argv[2]) if len(sys.argv) > 2 else 10e6  # bytes per second
+filler = "<p>" + "Documentation text. " * 2500 + "</p>"
+sent = {"bytes": 0}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        i = int(self.path.strip("/") or 0); etag = f'"page-{i}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304); self.send_header("ETag", etag); self.end_headers(); return
+        links = "".join(f"<a href='/{j}'>{j}</a>" for j in range(5 * i + 1, min(5 * i + 6, page_count)))
+        body = f"<html><body>{links}{filler}</body></html>".encode(); sent["bytes"] += len(body)
+        time.sleep(len(body) / bandwidth)
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), Handler); threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}"
+with tempfile.TemporaryDirectory() as tmp:
+    cache = HTTPCache(os.path.join(tmp, "http.sqlite")); results = []
+    print(f"{page_count} pages of {len(filler) / 1e3:.0f} KB at {bandwidth / 1e6:.0f} MB/s:")
+    for label, http_cache in (("crawl, no cache", None), ("first crawl, HTTPCache", cache), ("re-crawl, no cache", None), ("re-crawl, HTTPCache", cache)):
+        sent["bytes"] = 0; start = time.perf_counter()
+        results.append(WebsiteScraper(base_url, max_depth=10, max_workers=4, http_cache=http_cache).scrape())
+        print(f"  {label:24}: {time.perf_counter() - start:6.2f} s, {sent['bytes'] / 1e6:7.1f} MB downloaded")
+    cache.close()
+server.shutdown(); server.server_close()
+assert all(result == results[0] for result in results), "cached crawl differs"
@@ -0,0 +1,47 @@
+import os
+import sys
+import timeit
+import warnings
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from bs4 import BeautifulSoup
+from markdown_analyzer_lib.markdown_analyzer import InlineParser, MarkdownParser
+
+# Compares the html_inline detection of InlineParser.parse_html_inline against the previous
+# implementation, which built a BeautifulSoup object for every inline-bearing block.
+data_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', '13529199_prapti_haskos.md')
+repeat = 5
+
+warnings.filterwarnings("ignore")  # bs4 warns about short strings that look like URLs or file names
+
+
+def inline_texts(text):
+    texts = []
+    for token in MarkdownParser(text).parse():
+        if token.type in ('paragraph', 'header', 'blockquote') and token.content: texts.append(token.content)
+        elif token.type in ('ordered_list', 'unordered_list'): texts.extend(item["text"] for item in token.meta.get("items", []) if item.get("text"))
+    return texts
+
+
+def soup_path(texts):
+    return [[str(tag) for tag in BeautifulSoup(text, 'html.parser').find_all()] for text in texts]
+
+
+def scanner_path(texts, parser=InlineParser()):
+    return [parser.parse_html_inline(text) for text in texts]
+
+
+with open(data_file_path, 'r', encoding='utf-8') as f:
+    blocks = inline_texts(f.read())
+# A second corpus where every block carries inline HTML, to measure the scanner itself.
+html_blocks = [f"{text} <span class=\"note\">see <b>this</b></span><br>" for text in blocks]
+
+for label, corpus in (("document blocks", blocks), ("blocks with inline HTML", html_blocks)):
+    assert soup_path(corpus) == scanner_path(corpus), "html_inline output differs from the BeautifulSoup path"
+    soup_time = min(timeit.repeat(lambda: soup_path(corpus), number=1, repeat=repeat))
+    scan_time = min(timeit.repeat(lambda: scanner_path(corpus), number=1, repeat=repeat))
+    print(f"{label} ({len(corpus)} blocks from {os.path.basename(data_file_path)}):")
+    print(f"  BeautifulSoup per block : {soup_time * 1000:8.2f} ms")
+    print(f"  parse_html_inline       : {scan_time * 1000:8.2f} ms  ({soup_time / scan_time:.1f}x faster)")
@@ -0,0 +1,60 @@
+import os
+import sys
+import timeit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import InlineParser, MarkdownParser
+
+# Compares InlineParser.parse_inline, which walks each block once, against the previous
+# implementation, which ran one regex pass per inline category. Throughput is in MB/s of block text.
+data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data')
+repeat = 15
+number = 20
+
+
+def inline_texts(text):
+    texts = []
+    for token in MarkdownParser(text).parse():
+        if token.type in ('paragraph', 'header', 'blockquote') and token.content: texts.append(token.content)
+        elif token.type in ('ordered_list', 'unordered_list'): texts.extend(item["text"] for item in token.meta.get("items", []) if item.get("text"))
+    return texts
+
+
+def multi_pass(parser, text):
+    result = {"text_links": [], "image_links": [], "inline_code": [], "emphasis": [], "footnotes_used": [], "html_inline": []}
+    used_footnotes = set()
+    for fm in parser.FOOTNOTE_RE.finditer(text):
+        fid = fm.group(1)
+        if fid in parser.footnotes and fid not in used_footnotes:
+            used_footnotes.add(fid); result["footnotes_used"].append({"id": fid, "content": parser.footnotes[fid]})
+    result["inline_code"] = [cm.group(1) for cm in parser.CODE_INLINE_RE.finditer(text)]
+    result["emphasis"] = [e for m in parser.EMPHASIS_RE.finditer(text) for e in [m.group(2) or m.group(3) or m.group(4)] if e]
+    result["html_inline"] = parser.parse_html_inline(text)
+    for mm in parser.IMAGE_OR_LINK_RE.finditer(text):
+        url = mm.group(4) or (parser.references.get(mm.group(5).lower()) if mm.group(5) else None)
+        if url:
+            if mm.group(1).startswith('!'): result["image_links"].append({"alt_text": mm.group(2), "url": url})
+            else: result["text_links"].append({"text": mm.group(2), "url": url})
+    return result
+
+
+blocks = []
+for file_name in sorted(os.listdir(data_dir)):
+    with open(os.path.join(data_dir, file_name), 'r', encoding='utf-8') as f:
+        blocks.extend(inline_texts(f.read()))
+megabytes = sum(len(text.encode('utf-8')) for text in blocks) / 1e6
+parser = InlineParser()
+
+assert [multi_pass(parser, text) for text in blocks] == [parser.parse_inline(text) for text in blocks], "single-pass output differs"
+variants = {"old": lambda: [multi_pass(parser, text) for text in blocks], "new": lambda: [parser.parse_inline(text) for text in blocks],
+            "compact": lambda: [parser.parse_inline(text, compact=True) for text in blocks]}
+times = {name: [] for name in variants}
+for _ in range(repeat):  # interleaved, so that a slow stretch of the machine does not fall on one variant only
+    for name, run in variants.items(): times[name].append(timeit.timeit(run, number=number))
+old_time, new_time, compact_time = (min(times[name]) for name in variants)
+print(f"{len(blocks)} inline blocks ({megabytes:.2f} MB) from {data_dir}:")
+print(f"  one pass per category : {megabytes * number / old_time:7.2f} MB/s")
+print(f"  single pass           : {megabytes * number / new_time:7.2f} MB/s  ({old_time / new_time:.1f}x faster)")
+print(f"  single pass, compact  : {megabytes * number / compact_time:7.2f} MB/s  ({old_time / compact_time:.1f}x faster; the path MarkdownAnalyzer uses)")
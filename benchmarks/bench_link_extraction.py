@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import WebsiteMarkdownDocument, WebsiteScraper
+
+# Link extraction (WebsiteScraper._extract_links) and title extraction (_extract_title_from_html) on documentation-like
+# pages: a BeautifulSoup tree per page, as before, versus one html.parser pass with _PageScanner.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+nav = "".join(f"<li><a href='/docs/section-{i}'>Section {i}</a></li>" for i in range(60))
+content = "".join(f"<h2 id='h{i}'>Heading {i}</h2><p>Text with <code>code</code>, <em>emphasis</em> and a <a href='/ref/{i}'>reference</a>.</p>"
+                  "<pre><code>print('example')</code></pre>" for i in range(80))
+pages = [f"<!DOCTYPE html><html><head><title>Page {n} &middot; Docs</title><meta charset='utf-8'></head><body><nav><ul>{nav}</ul></nav>"
+         f"<main><h1>Page {n}</h1>{content}</main></body></html>" for n in range(page_count)]
+scraper = WebsiteScraper("http://example.com")
+
+
+def soup_links(html):
+    return [str(tag.get("href")) for tag in BeautifulSoup(html, "html.parser").find_all("a", href=True) if tag.get("href")]
+
+
+def timed(function):
+    start = time.perf_counter(); results = [function(html) for html in pages]; return results, time.perf_counter() - start
+
+
+megabytes = sum(map(len, pages)) / 1e6
+print(f"{page_count} pages ({megabytes:.1f} MB):")
+cases = (("links", soup_links, lambda html: [link[len("http://example.com"):] for link in scraper._extract_links("http://example.com", html)]),
+         ("title", lambda html: WebsiteMarkdownDocument._title_from_soup(BeautifulSoup(html, "html.parser")), WebsiteMarkdownDocument._extract_title_from_html))
+for label, with_soup, with_scanner in cases:
+    expected, soup_time = timed(with_soup); scanned, scan_time = timed(with_scanner)
+    assert scanned == expected, f"scanner {label} differ from bs4"
+    print(f"  {label}, BeautifulSoup tree : {megabytes / soup_time:5.2f} MB/s")
+    print(f"  {label}, _PageScanner       : {megabytes / scan_time:5.2f} MB/s  ({soup_time / scan_time:.1f}x faster)")
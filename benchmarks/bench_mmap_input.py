@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownAnalyzer
+
+# Peak Python allocations (tracemalloc) of MarkdownAnalyzer.from_file reading the whole file versus memory-mapping it.
+# The mapped pages belong to the OS page cache and are not counted; they are what the mmap mode saves.
+megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+section = ("## Section\n\nA paragraph with a [link](http://example.com), `code` and *emphasis*.\n\n"
+           "- first item\n- second item\n\n```python\nprint('hello')\n```\n\n")
+with tempfile.NamedTemporaryFile('w', suffix='.md', delete=False, encoding='utf-8') as f:
+    f.write("# Title\n\n" + section * (megabytes * 1_000_000 // len(section))); path = f.name
+
+
+def timed(use_mmap):
+    start = time.perf_counter(); MarkdownAnalyzer.from_file(path, use_mmap=use_mmap); return time.perf_counter() - start
+
+
+def traced(use_mmap):
+    tracemalloc.start(); analyzer = MarkdownAnalyzer.from_file(path, use_mmap=use_mmap)
+    current, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return analyzer.get_tokens_sequential(), current / 1e6, peak / 1e6
+
+
+try:
+    print(f"{os.path.getsize(path) / 1e6:.0f} MB file:")
+    modes = (("read()", False), ("use_mmap=True", True))
+    times = [timed(use_mmap) for _, use_mmap in modes]  # timed before any tokens are kept alive
+    results = []
+    for (label, use_mmap), elapsed in zip(modes, times):
+        tokens, retained, peak = traced(use_mmap); results.append(tokens)
+        print(f"  {label:14}: {elapsed:6.2f} s, retained {retained:7.1f} MB, peak {peak:7.1f} MB")
+    assert results[0] == results[1], "memory-mapped parse produced different tokens"
+finally:
+    os.unlink(path)
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import PageDeduplicator, WebsiteMarkdownDocument, WebsiteScraper
+
+# A synthetic documentation crawl (no network) where each article is also served as a query-string variant (an exact
+# copy) and a printable version (no navigation, a print date added): WebsiteMarkdownDocument.generate with and without
+# a PageDeduplicator, and the deduplicator's own cost per page.
+article_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+nav = "<nav>" + "".join(f"<a href='/doc{i}'>Doc {i}</a>" for i in range(40)) + "</nav>"
+
+
+def article(i):
+    return "".join(f"<h2>Part {j}</h2><p>Article {i} explains topic {i * 31 + j} with <b>details</b> {' '.join(f'w{(i * 7 + j * 13 + k) % 5000}' for k in range(60))}.</p>" for j in range(8))
+
+
+pages = {}
+for i in range(article_count):
+    body = article(i)
+    pages[f"http://example.com/doc{i}"] = f"<html><head><title>Doc {i}</title></head><body>{nav}<h1>Doc {i}</h1>{body}</body></html>"
+    pages[f"http://example.com/doc{i}?ref=nav"] = pages[f"http://example.com/doc{i}"]
+    pages[f"http://example.com/print/doc{i}"] = f"<html><head><title>Doc {i}</title></head><body><h1>Doc {i}</h1>{body}<p>Printed on 2024-05-01</p></body></html>"
+
+
+def found(dedup):
+    return sum("?ref=" in url for url in dedup.duplicates), sum("/print/" in url for url in dedup.duplicates)
+
+
+if __name__ == "__main__":
+    with patch.object(WebsiteScraper, 'scrape', return_value=pages):
+        start = time.perf_counter(); plain = WebsiteMarkdownDocument("http://example.com").generate(); every_copy = time.perf_counter() - start
+        dedup = PageDeduplicator()
+        start = time.perf_counter(); deduplicated = WebsiteMarkdownDocument("http://example.com", deduplicator=dedup).generate(); skipping = time.perf_counter() - start
+    start = time.perf_counter(); check = PageDeduplicator(); [check.check(url, html) for url, html in pages.items()]; checking = time.perf_counter() - start
+    loose = PageDeduplicator(max_distance=6); [loose.check(url, html) for url, html in pages.items()]
+    assert all(canonical.replace("/print/", "/").split("?")[0] == url.replace("/print/", "/").split("?")[0] for url, canonical in loose.duplicates.items()), "wrong canonical page"
+    print(f"{len(pages)} pages ({article_count} articles, each also as an exact copy and a printable version):")
+    print(f"  convert every copy     : {every_copy:6.2f} s, {len(plain) / 1e6:5.2f} MB of Markdown")
+    print(f"  skip duplicates        : {skipping:6.2f} s, {len(deduplicated) / 1e6:5.2f} MB of Markdown  ({every_copy / skipping:.1f}x faster)")
+    print(f"  PageDeduplicator alone : {checking / len(pages) * 1e3:6.2f} ms per page")
+    for name, d in (("max_distance=3", dedup), ("max_distance=6", loose)):
+        exact, printable = found(d); print(f"  found with {name}: {exact}/{article_count} exact copies, {printable}/{article_count} printable versions")
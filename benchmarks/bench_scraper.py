@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import WebsiteScraper
+
+# Crawls a generated site served locally with artificial latency, sequentially and with a worker pool.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+workers = 16
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(latency)
+        index = int(self.path.strip("/") or 0)
+        links = "".join(f"<a href='/{i}'>page {i}</a>" for i in (2 * index + 1, 2 * index + 2) if i < page_count)
+        body = f"<html><head><title>Page {index}</title></head><body><p>Some text.</p>{links}</body></html>".encode()
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}"
+max_depth = page_count.bit_length()
+
+start = time.perf_counter(); sequential = WebsiteScraper(base_url, max_depth=max_depth).scrape(); sequential_time = time.perf_counter() - start
+start = time.perf_counter(); concurrent = WebsiteScraper(base_url, max_depth=max_depth, max_workers=workers).scrape(); concurrent_time = time.perf_counter() - start
+server.shutdown()
+assert concurrent == sequential, "concurrent crawl returned different pages"
+print(f"{len(sequential)} pages, {latency * 1000:.0f} ms latency per request:")
+print(f"  sequential          : {sequential_time:6.2f} s")
+print(f"  {workers} workers (pooled) : {concurrent_time:6.2f} s  ({sequential_time / concurrent_time:.1f}x faster)")
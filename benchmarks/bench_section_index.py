@@ -0,0 +1,39 @@
+import os
+import random
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownAnalyzer
+
+# "Which section contains line N?" for many lines of a large manual: a scan over identify_headers() per query
+# (as hands_on/use_case_identify_sections.py would do it) versus SectionIndex lookups.
+chapters = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+queries = 20000
+parts = []
+for chapter in range(chapters):
+    parts.append(f"# Chapter {chapter}\n\nIntro text.\n")
+    for section in range(10):
+        parts.append(f"## Section {chapter}.{section}\n\nSome text.\n\n### Details\n\n- a\n- b\n")
+analyzer = MarkdownAnalyzer.from_string("\n".join(parts))
+line_count = analyzer.text.count('\n') + 1
+lines = [random.randint(1, line_count) for _ in range(queries)]
+
+
+def scan(line):
+    found = None
+    for header in analyzer.identify_headers()["Header"]:
+        if header["line"] > line: break
+        found = header
+    return found["text"] if found else None
+
+
+start = time.perf_counter(); scanned = [scan(line) for line in lines[:200]]; scan_time = (time.perf_counter() - start) / 200
+start = time.perf_counter(); analyzer.section_index(); build_time = time.perf_counter() - start
+start = time.perf_counter(); indexed = [analyzer.section_at_line(line).heading for line in lines]; index_time = (time.perf_counter() - start) / queries
+assert scanned == indexed[:200], "section lookups differ"
+print(f"{len(analyzer.tokens)} tokens, {len(analyzer.section_index())} sections, {queries} lookups:")
+print(f"  scan headers per query : {scan_time * 1e6:9.1f} us/query")
+print(f"  SectionIndex           : {index_time * 1e6:9.1f} us/query  (+ {build_time * 1000:.1f} ms to build once)")
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import MarkdownConverter, WebsiteMarkdownDocument, WebsiteScraper
+
+# Converts a synthetic crawl (no network) with WebsiteMarkdownDocument.generate: the previous per-page work
+# (markdownify plus two more BeautifulSoup parses for the titles), one parse per page, and one parse per page on a process pool.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+body = "".join(f"<h2>Part {i}</h2><p>Some <b>bold</b> text with a <a href='/x{i}'>link</a>.</p><ul><li>a</li><li>b</li></ul>" for i in range(40))
+pages = {f"http://example.com/page{i}": f"<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1>{body}</body></html>" for i in range(page_count)}
+
+
+def previous_work(html):
+    # What generate() used to do per page: convert, then extract the title for the index and again for the body.
+    converter = MarkdownConverter(); markdown = converter.convert(html)
+    return markdown, WebsiteMarkdownDocument._extract_title_from_html(html), WebsiteMarkdownDocument._extract_title_from_html(html)
+
+
+if __name__ == "__main__":
+    with patch.object(WebsiteScraper, 'scrape', return_value=pages):
+        start = time.perf_counter(); [previous_work(html) for html in pages.values()]; previous = time.perf_counter() - start
+        start = time.perf_counter(); serial = WebsiteMarkdownDocument("http://example.com").generate(); single_parse = time.perf_counter() - start
+        start = time.perf_counter(); pooled = WebsiteMarkdownDocument("http://example.com", converter_workers=workers).generate(); pool = time.perf_counter() - start
+    assert pooled == serial, "process pool output differs"
+    print(f"{page_count} pages:")
+    print(f"  convert + 2 title parses per page : {previous:6.2f} s")
+    print(f"  one parse per page                : {single_parse:6.2f} s  ({previous / single_parse:.1f}x faster)")
+    print(f"  one parse per page, {workers:2d} processes : {pool:6.2f} s  ({previous / pool:.1f}x faster)")
@@ -0,0 +1,52 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import WebsiteScraper
+
+# Crawls a local site whose pages link to binaries behind extensionless URLs (/download?id=N, `size_mb` MB each):
+# full downloads, streamed downloads with max_bytes, and streamed downloads with a HEAD probe first. "Sent" is what
+# the server managed to write before the client dropped the connection (it includes the kernel's socket buffers).
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+binary = b"\0" * (size_mb * 1_000_000)
+
+
+class DownloadSiteHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock(); sent = 0
+
+    def _reply(self, with_body):
+        if self.path.startswith("/download"): body, ctype = binary, "application/octet-stream"
+        elif self.path == "/": body, ctype = "".join(f"<a href='/page{i}'>{i}</a>" for i in range(page_count)).encode(), "text/html"
+        else: body, ctype = f"<html><p>{self.path}</p><a href='/download?id={self.path}'>file</a></html>".encode(), "text/html"
+        self.send_response(200); self.send_header("Content-Type", ctype); self.send_header("Content-Length", str(len(body))); self.end_headers()
+        if not with_body: return
+        try:
+            for start in range(0, len(body), 1 << 16):
+                chunk = body[start:start + (1 << 16)]; self.wfile.write(chunk)
+                with self.lock: type(self).sent += len(chunk)
+        except (BrokenPipeError, ConnectionResetError): pass
+
+    def do_GET(self): self._reply(True)
+    def do_HEAD(self): self._reply(False)
+    def log_message(self, format, *args): pass
+
+
+if __name__ == "__main__":
+    import logging; logging.disable(logging.CRITICAL)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DownloadSiteHandler); threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"; results = {}
+    for name, options in (("full downloads", {}), ("max_bytes=1 MB", {"max_bytes": 1_000_000}), ("  + head_probe", {"max_bytes": 1_000_000, "head_probe": True})):
+        DownloadSiteHandler.sent = 0; start = time.perf_counter()
+        pages = WebsiteScraper(base_url, max_depth=2, max_workers=4, **options).scrape()
+        results[name] = (pages, DownloadSiteHandler.sent, time.perf_counter() - start)
+    server.shutdown(); server.server_close()
+    assert all(pages == results["full downloads"][0] for pages, _, _ in results.values()), "different pages"
+    print(f"{page_count + 1} HTML pages, {page_count} binaries of {size_mb} MB, 4 workers:")
+    for name, (pages, sent, elapsed) in results.items():
+        print(f"  {name:15s}: {len(pages):3d} pages, {sent / 1e6:7.1f} MB sent, {elapsed:5.2f} s")
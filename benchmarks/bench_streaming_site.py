@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import WebsiteMarkdownDocument, WebsiteScraper
+
+# Peak Python allocations (tracemalloc) of turning a synthetic crawl (no network, pages generated as they are "fetched")
+# into one Markdown file: generate() plus writing the string, versus WebsiteMarkdownDocument.write streaming page by page.
+page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+body = "".join(f"<h2>Part {i}</h2><p>Some <b>bold</b> text with a <a href='/x{i}'>link</a>.</p><ul><li>a</li><li>b</li></ul>" for i in range(5))
+
+
+def crawl():
+    for i in range(page_count):
+        yield f"http://example.com/page{i:05d}", f"<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1>{body}</body></html>"
+
+
+def generate_and_save(path):
+    markdown = WebsiteMarkdownDocument("http://example.com").generate()
+    with open(path, "w", encoding="utf-8") as f: f.write(markdown)
+
+
+def stream(path): WebsiteMarkdownDocument("http://example.com").write(path)
+
+
+with tempfile.TemporaryDirectory() as tmp, patch.object(WebsiteScraper, 'iter_pages', side_effect=crawl):
+    print(f"{page_count} pages:")
+    outputs = []
+    for label, function in (("generate() + write string", generate_and_save), ("write() streaming", stream)):
+        path = os.path.join(tmp, f"{len(outputs)}.md")
+        start = time.perf_counter(); function(path); elapsed = time.perf_counter() - start
+        tracemalloc.start(); function(path); peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+        outputs.append(open(path, encoding="utf-8").read())
+        print(f"  {label:26}: {elapsed:6.2f} s, peak {peak / 1e6:7.1f} MB, output {len(outputs[-1]) / 1e6:.1f} MB")
+    assert outputs[0] == outputs[1], "streamed document differs"  # page URLs are generated in sorted order
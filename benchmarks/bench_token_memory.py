@@ -0,0 +1,53 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import BlockToken, MarkdownAnalyzer, _inline_as_dicts, _inline_as_records
+
+# Memory held by fully inline-parsed tokens: the compact representation (__slots__ BlockToken, tuple categories,
+# TextLink/ImageLink/FootnoteRef records) against the previous one (per-instance __dict__, lists of small dicts).
+data_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', '13529199_prapti_haskos.md')
+copies = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+
+class DictBlockToken:
+    """BlockToken as it was before __slots__."""
+    def __init__(self, type_, content="", level=None, meta=None, line=None):
+        self.type = type_; self.content = content; self.level = level; self.meta = meta or {}; self.line = line
+
+
+def to_dict_form(token):
+    meta = _inline_as_dicts(token.meta)
+    if "items" in meta: meta["items"] = [_inline_as_dicts(item) for item in meta["items"]]
+    return DictBlockToken(token.type, token.content, token.level, meta, token.line)
+
+
+def to_compact_form(token):
+    meta = _inline_as_dicts(token.meta); _inline_as_records(meta)
+    if "items" in meta:
+        meta["items"] = [_inline_as_dicts(item) for item in meta["items"]]
+        for item in meta["items"]: _inline_as_records(item)
+    return BlockToken(token.type, token.content, token.level, meta, token.line)
+
+
+def measure(build):
+    gc.collect(); tracemalloc.start(); kept = build(); current, _ = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return current, kept
+
+
+with open(data_file_path, 'r', encoding='utf-8') as f:
+    text = f.read()
+analyzers = []
+for i in range(copies):
+    analyzer = MarkdownAnalyzer.from_string(text + "\n" * (i + 1)); analyzer.analyse(); analyzers.append(analyzer)
+token_count = sum(len(a.tokens) for a in analyzers)
+# Both forms are rebuilt from the same tokens; the strings are shared, so only token objects and metadata are measured.
+compact_bytes, _ = measure(lambda: [[to_compact_form(t) for t in a.tokens] for a in analyzers])
+dict_bytes, _ = measure(lambda: [[to_dict_form(t) for t in a.tokens] for a in analyzers])
+print(f"{token_count} tokens ({copies} copies of {os.path.basename(data_file_path)}), inline elements parsed:")
+print(f"  dict-based tokens : {dict_bytes / 1024:9.1f} KiB  ({dict_bytes / token_count:6.1f} B/token)")
+print(f"  compact tokens    : {compact_bytes / 1024:9.1f} KiB  ({compact_bytes / token_count:6.1f} B/token, {dict_bytes / compact_bytes:.1f}x smaller)")
@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from markdown_analyzer_lib.markdown_analyzer import URLFingerprintSet, WebsiteScraper
+
+# Memory and cost of the scraper's visited set on a large crawl: a set of normalized URL strings (which keeps the
+# strings alive) against URLFingerprintSet; then link deduplication with the
+# normalized-URL memo (every page links to the same navigation URLs) against normalizing each link again.
+url_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+make_url = "https://docs.example.com/section-{0}/chapter-{1}/page-{2}?lang=en&v=2".format
+lookups = [make_url(i % 97, i // 97, i) for i in range(0, url_count, 5)] + [make_url(i % 97, i // 97, f"x{i}") for i in range(0, url_count, 5)]
+
+
+def fill(visited):
+    for i in range(url_count): visited.add(make_url(i % 97, i // 97, i))
+    return visited
+
+
+def measure(factory):
+    tracemalloc.start(); visited = fill(factory()); size = tracemalloc.get_traced_memory()[0]; tracemalloc.stop(); del visited
+    start = time.perf_counter(); visited = fill(factory()); add_time = time.perf_counter() - start
+    start = time.perf_counter(); hits = sum(url in visited for url in lookups); lookup_time = time.perf_counter() - start
+    assert hits == len(lookups) // 2, "wrong membership"
+    return size, add_time, lookup_time
+
+
+if __name__ == "__main__":
+    print(f"{url_count} visited URLs, {len(lookups)} lookups (half of them misses):")
+    baseline = None
+    for name, factory in (("set of strings", set), ("URLFingerprintSet", lambda: URLFingerprintSet(expected_urls=url_count))):
+        size, add_time, lookup_time = measure(factory); baseline = baseline or size
+        print(f"  {name:17s}: {size / 1e6:6.1f} MB ({size / url_count:5.1f} B/URL, {baseline / size:4.1f}x less), "
+              f"{add_time / url_count * 1e6:4.2f} us/add, {lookup_time / len(lookups) * 1e6:4.2f} us/lookup")
+    scraper = WebsiteScraper("https://docs.example.com/"); links = [f"https://docs.example.com/nav/{i}?b=1&a=2" for i in range(200)] * 500
+    start = time.perf_counter()
+    for url in links: scraper._normalized_urls.clear(); scraper._normalize_url(url)
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    for url in links: scraper._normalize_url(url)
+    memo = time.perf_counter() - start
+    print(f"  normalizing {len(links)} repeated links: {plain:.2f} s without the memo, {memo:.3f} s with it ({plain / memo:.0f}x faster)")
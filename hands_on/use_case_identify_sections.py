@@ -58,6 +58,14 @@ try:
         # For now, we can only see all headers.
         print("\nNote: Setext headers are included above as 'header' tokens with appropriate levels.")
         print("The parser does not currently distinguish their origin (ATX vs Setext) in the final token's metadata.")
+
+        # The section tree built from these headers: each section runs to the next header of the same or a higher level.
+        print("\n--- Sections (section_index) ---")
+        for section in analyzer.section_index():
+            print(f"{'  ' * (section.level - 1)}{section.heading} (lines {section.line}-{section.end_line}, {section.token_end - section.token_start} tokens)")
+        first_section = analyzer.section_index().sections[0]
+        print(f"\nSection containing line {first_section.line}: {analyzer.section_at_line(first_section.line).path}")
+        print(f"Token types under {list(first_section.path)}: {[t.type for t in analyzer.tokens_under(first_section.path)]}")
     else:
         print("No headers found or an issue with header identification.")
 
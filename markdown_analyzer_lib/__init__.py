@@ -8,15 +8,29 @@ and for converting websites into structured Markdown.
 
 from .markdown_analyzer import (
     BlockToken,
+    TextLink,
+    ImageLink,
+    FootnoteRef,
     InlineParser,
     MarkdownParser,
+    StreamingMarkdownParser,
     MarkdownAnalyzer,
+    ParseCache,
+    HTTPCache,
+    Section,
+    SectionIndex,
     MDXMarkdownParser,
     MDXMarkdownAnalyzer,
+    CrawlState,
+    CrawlScheduler,
+    URLFingerprintSet,
+    PageDeduplicator,
     WebsiteScraper,
     MarkdownConverter,
     WebsiteMarkdownDocument,
     MarkdownSiteConverter,
+    CrawlPipeline,
+    MarkdownChunker,
     MarkdownDocument
 )
 # If mrkdwntool.py has functions/classes to be exposed directly from the library:
@@ -26,15 +40,29 @@ __version__ = "0.1.0"
 
 __all__ = [
     "BlockToken",
+    "TextLink",
+    "ImageLink",
+    "FootnoteRef",
     "InlineParser",
     "MarkdownParser",
+    "StreamingMarkdownParser",
     "MarkdownAnalyzer",
+    "ParseCache",
+    "HTTPCache",
+    "Section",
+    "SectionIndex",
     "MDXMarkdownParser",
     "MDXMarkdownAnalyzer",
+    "CrawlState",
+    "CrawlScheduler",
+    "URLFingerprintSet",
+    "PageDeduplicator",
     "WebsiteScraper",
     "MarkdownConverter",
     "WebsiteMarkdownDocument",
     "MarkdownSiteConverter",
+    "CrawlPipeline",
+    "MarkdownChunker",
     "MarkdownDocument",
     # "SomeToolClassOrFunction", # Add if imported from mrkdwntool.py
     "__version__",
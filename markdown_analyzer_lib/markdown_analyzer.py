@@ -10,14 +10,40 @@ This module also integrates MDX support and some useful extensions.
 import re
 import logging
 import os
+import io
+import mmap
+import codecs
+import sys
 import json
-from collections import defaultdict, deque
+import glob
+import threading
+import hashlib
+import sqlite3
+import zlib
+import time
+from array import array
+from itertools import islice
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from html import unescape
+from html.parser import HTMLParser
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque, OrderedDict
+from queue import Queue, Empty, Full
 from urllib.parse import urljoin, urlparse, urlunparse
-from typing import Optional, Set, Dict, Any, List, Tuple 
+from urllib.robotparser import RobotFileParser
+from email.utils import parsedate_to_datetime
+from typing import Optional, Set, Dict, Any, List, Tuple, Iterable, Iterator, Union, IO, NamedTuple, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from bs4 import BeautifulSoup, PageElement 
-from markdownify import markdownify as md
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+from markdownify import markdownify as md, MarkdownConverter as _MarkdownifyConverter
+# markdownify >= 1.2 converts an already-parsed soup with the parser options it would use itself; older releases only get the public call.
+_MARKDOWNIFY_SOUP_API = callable(getattr(_MarkdownifyConverter, 'convert_soup', None)) and hasattr(getattr(_MarkdownifyConverter, 'DefaultOptions', None), 'bs4_options')
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +53,8 @@ logger = logging.getLogger(__name__)
 
 class BlockToken:
     """Represents a block-level token in Markdown."""
+    __slots__ = ('type', 'content', 'level', 'meta', 'line')
+
     def __init__(self, type_: str, content: str = "", level: Optional[int] = None, meta: Optional[Dict[str, Any]] = None, line: Optional[int] = None):
         self.type = type_
         self.content = content
@@ -34,6 +62,138 @@ class BlockToken:
         self.meta = meta or {}
         self.line = line
 
+# Compact inline records stored in token meta by MarkdownAnalyzer (InlineParser.parse_inline(compact=True)).
+# They also read like the dicts returned by parse_inline: record["url"], record.get("url"), dict(record), {**record}.
+def _record_keys(self: Any) -> Tuple[str, ...]: return self._fields
+def _record_getitem(self: Any, key: Union[str, int]) -> Any: return getattr(self, key) if isinstance(key, str) else tuple.__getitem__(self, key)
+def _record_get(self: Any, key: str, default: Any = None) -> Any: return getattr(self, key, default) if key in self._fields else default
+
+class TextLink(NamedTuple):
+    text: str
+    url: str
+    keys = _record_keys; __getitem__ = _record_getitem; get = _record_get  # type: ignore[assignment]
+
+class ImageLink(NamedTuple):
+    alt_text: str
+    url: str
+    keys = _record_keys; __getitem__ = _record_getitem; get = _record_get  # type: ignore[assignment]
+
+class FootnoteRef(NamedTuple):
+    id: str
+    content: str
+    keys = _record_keys; __getitem__ = _record_getitem; get = _record_get  # type: ignore[assignment]
+
+INLINE_RECORD_TYPES: Dict[str, Any] = {"text_links": TextLink, "image_links": ImageLink, "footnotes_used": FootnoteRef}
+# NamedTuple constructors go through a Python-level __new__; parse_inline builds its records with tuple.__new__ directly.
+_new_text_link = partial(tuple.__new__, TextLink); _new_image_link = partial(tuple.__new__, ImageLink); _new_footnote_ref = partial(tuple.__new__, FootnoteRef)
+
+def _inline_as_dicts(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a token meta (or list item) with its inline categories in parse_inline's list-of-dicts form. Categories are
+    filled lazily in whatever order analyses ask for them, so they are put back in INLINE_CATEGORIES order after the other keys.
+    """
+    view = {key: value for key, value in meta.items() if key not in InlineParser.INLINE_CATEGORIES}
+    for key in InlineParser.INLINE_CATEGORIES:
+        if key in meta: view[key] = [dict(v) for v in meta[key]] if key in INLINE_RECORD_TYPES else list(meta[key])
+    return view
+
+def _inline_as_records(meta: Dict[str, Any]) -> None:
+    """Converts the inline categories of `meta` (e.g. decoded from JSON) to the compact form, in place."""
+    for key in InlineParser.INLINE_CATEGORIES:
+        if key in meta:
+            record_type = INLINE_RECORD_TYPES.get(key)
+            meta[key] = tuple(record_type(*(v.values() if isinstance(v, dict) else v)) for v in meta[key]) if record_type else tuple(meta[key])
+
+class _InlineHTMLScanner(HTMLParser):
+    """
+    Streaming stand-in for `[str(t) for t in BeautifulSoup(text, 'html.parser').find_all()]`.
+    It consumes the same html.parser events as bs4's tree builder and serializes each tag the way
+    bs4's "minimal" formatter does, without building a soup. Markup it does not model (entities,
+    declarations, bs4 string-container tags) sets `unsupported` so the caller can fall back to bs4.
+    """
+    VOID_TAGS = frozenset(['area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img', 'input',
+                           'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'])
+    LIST_ATTRIBUTES: Dict[str, Set[str]] = {"*": {"class", "accesskey", "dropzone"}, "a": {"rel", "rev"}, "link": {"rel", "rev"}, "td": {"headers"}, "th": {"headers"},
+                                            "form": {"accept-charset"}, "object": {"archive"}, "area": {"rel"}, "icon": {"sizes"}, "iframe": {"sandbox"}, "output": {"for"}}
+    PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+    UNSUPPORTED_TAGS = frozenset(['rt', 'rp', 'style', 'script', 'template', 'meta'])
+    ASCII_SPACES = frozenset('\x20\x0a\x09\x0c\x0d')
+    ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        # Open elements are [name, start_tag, parts, result_index]; index 0 is the document root.
+        self.stack: List[List[Any]] = [["[document]", "", [], -1]]
+        self.results: List[Optional[str]] = []; self.data: List[str] = []
+        self.closed_void: List[str] = []; self.preserve_depth = 0; self.unsupported = False
+
+    def scan(self, text: str) -> Optional[List[str]]:
+        self.feed(text); self.close(); self._flush_data()
+        while len(self.stack) > 1: self._pop()
+        return None if self.unsupported else [r for r in self.results if r is not None]
+
+    def _flush_data(self) -> None:
+        if not self.data: return
+        data = "".join(self.data); self.data = []
+        if not self.preserve_depth and all(c in self.ASCII_SPACES for c in data): data = "\n" if "\n" in data else " "
+        self.stack[-1][2].append(data.translate(self.ESCAPE_TABLE))
+
+    def _format_attrs(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        values: Dict[str, str] = {}
+        for key, value in attrs: values[key] = "" if value is None else value
+        list_attrs = self.LIST_ATTRIBUTES["*"] | self.LIST_ATTRIBUTES.get(tag, set())
+        parts: List[str] = []
+        for key, value in sorted(values.items()):
+            if key in list_attrs: value = " ".join(value.split())
+            value = value.translate(self.ESCAPE_TABLE)
+            if '"' in value: value = "'" + value + "'" if "'" not in value else '"' + value.replace('"', "&quot;") + '"'
+            else: value = '"' + value + '"'
+            parts.append(f" {key}={value}")
+        return "".join(parts)
+
+    def _pop(self) -> None:
+        name, start_tag, parts, index = self.stack.pop()
+        serialized = start_tag + "".join(parts) + f"</{name}>"
+        if name in self.PRESERVE_WHITESPACE_TAGS: self.preserve_depth -= 1
+        self.results[index] = serialized; self.stack[-1][2].append(serialized)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, void_closes=True)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, void_closes=False); self._end(tag, check_closed_void=False)
+
+    def _start(self, tag: str, attrs: List[Tuple[str, Optional[str]]], void_closes: bool) -> None:
+        self._flush_data()
+        if tag in self.UNSUPPORTED_TAGS: self.unsupported = True
+        start_tag = f"<{tag}{self._format_attrs(tag, attrs)}"
+        self.results.append(None)
+        if tag in self.VOID_TAGS:
+            # An element with no contents that may be empty is serialized as <tag/> by bs4.
+            serialized = start_tag + "/>"; self.results[-1] = serialized; self.stack[-1][2].append(serialized)
+            if void_closes: self.closed_void.append(tag)
+            return
+        if tag in self.PRESERVE_WHITESPACE_TAGS: self.preserve_depth += 1
+        self.stack.append([tag, start_tag + ">", [], len(self.results) - 1])
+
+    def handle_endtag(self, tag: str) -> None: self._end(tag, check_closed_void=True)
+
+    def _end(self, tag: str, check_closed_void: bool) -> None:
+        if check_closed_void and tag in self.closed_void: self.closed_void.remove(tag); return
+        self._flush_data()
+        if not any(open_tag[0] == tag for open_tag in self.stack[1:]): return
+        while self.stack[-1][0] != tag: self._pop()
+        self._pop()
+
+    def handle_data(self, data: str) -> None: self.data.append(data)
+
+    def handle_comment(self, data: str) -> None: self.unsupported = True  # bs4 normalizes comment whitespace and empty comments
+    def handle_entityref(self, name: str) -> None: self.unsupported = True
+    def handle_charref(self, name: str) -> None: self.unsupported = True
+    def handle_decl(self, decl: str) -> None: self.unsupported = True
+    def unknown_decl(self, data: str) -> None: self.unsupported = True
+    def handle_pi(self, data: str) -> None: self.unsupported = True
+
 class InlineParser:
     """Parses inline Markdown elements within a block."""
     IMAGE_OR_LINK_RE = re.compile(r'(!?\[([^\]]*)\])(\(([^\)]+)\)|\[([^\]]+)\])') 
@@ -42,50 +202,98 @@ class InlineParser:
     FOOTNOTE_RE = re.compile(r'\[\^([^\]]+)\]') 
     HTML_INLINE_RE = re.compile(r'<[a-zA-Z/][^>]*>') 
     HTML_INLINE_BLOCK_RE = re.compile(r'<([a-zA-Z]+)([^>]*)>(.*?)</\1>', re.DOTALL) 
+    HTML_START_TAG_OPEN_RE = re.compile(r'<[a-zA-Z]')
+    INLINE_CATEGORIES: Tuple[str, ...] = ("text_links", "image_links", "inline_code", "emphasis", "footnotes_used", "html_inline")
 
-    def __init__(self, references: Optional[Dict[str, str]] = None, footnotes: Optional[Dict[str, str]] = None):
+    # Characters at which an element of each category can start; parse_inline only stops at these.
+    CATEGORY_TRIGGERS: Dict[str, str] = {"text_links": "![", "image_links": "![", "inline_code": "`", "emphasis": "*_", "footnotes_used": "[", "html_inline": "<"}
+    _TRIGGER_PATTERNS: Dict[Tuple[str, ...], 're.Pattern[str]'] = {}  # keyed by the requested categories
+
+    def __init__(self, references: Optional[Dict[str, str]] = None, footnotes: Optional[Dict[str, str]] = None, skip_code_spans: bool = False):
         self.references: Dict[str, str] = references or {}
         self.footnotes: Dict[str, str] = footnotes or {}
+        self.skip_code_spans = skip_code_spans  # ignore links, emphasis, footnotes and HTML that start inside `code spans`
 
-    def parse_inline(self, text: str) -> Dict[str, List[Any]]:
-        result: Dict[str, List[Any]] = {
-            "text_links": [], "image_links": [], "inline_code": [],
-            "emphasis": [], "footnotes_used": [], "html_inline": []
-        }
-        used_footnotes: Set[str] = set()
-        for fm in self.FOOTNOTE_RE.finditer(text):
-            fid = fm.group(1)
-            if fid in self.footnotes and fid not in used_footnotes:
-                used_footnotes.add(fid)
-                result["footnotes_used"].append({"id": fid, "content": self.footnotes[fid]})
-        for cm in self.CODE_INLINE_RE.finditer(text):
-            result["inline_code"].append(cm.group(1))
-        for em_match in self.EMPHASIS_RE.finditer(text):
-            emphasized_text = em_match.group(2) or em_match.group(3) or em_match.group(4)
-            if emphasized_text: result["emphasis"].append(emphasized_text)
-        soup = BeautifulSoup(text, 'html.parser')
-        for tag_element in soup.find_all(): result["html_inline"].append(str(tag_element))
-        
-        for mm in self.IMAGE_OR_LINK_RE.finditer(text):
-            prefix_and_alt = mm.group(1) 
-            alt_or_text = mm.group(2)    
-            url_direct = mm.group(4)     
-            url_ref_id = mm.group(5)     
-
-            is_image = prefix_and_alt.startswith('!')
-            final_url: Optional[str] = None
-
-            if url_direct:
-                final_url = url_direct
-            elif url_ref_id and url_ref_id.lower() in self.references:
-                final_url = self.references[url_ref_id.lower()]
-            
-            if final_url:
-                entry = {"alt_text": alt_or_text, "url": final_url} if is_image else {"text": alt_or_text, "url": final_url}
-                result["image_links" if is_image else "text_links"].append(entry)
+    def parse_inline(self, text: str, categories: Optional[Iterable[str]] = None, compact: bool = False) -> Dict[str, Any]:
+        """
+        Returns the inline elements of `text`, limited to `categories` (default: all INLINE_CATEGORIES).
+        With `compact`, each category is a tuple and links/footnotes are TextLink/ImageLink/FootnoteRef records.
+        """
+        # One walk over the trigger characters. Each category keeps the end of its last match, so its elements are
+        # exactly those of its own left-to-right finditer (elements of different categories may overlap).
+        wanted = self.INLINE_CATEGORIES if categories is None else tuple(categories)
+        result: Dict[str, Any] = {category: [] for category in wanted}
+        text_links = result.get("text_links"); image_links = result.get("image_links"); inline_code = result.get("inline_code")
+        emphasis = result.get("emphasis"); footnotes_used = result.get("footnotes_used")
+        want_links = text_links is not None or image_links is not None; want_html = "html_inline" in result
+        skip_code = self.skip_code_spans; want_code = inline_code is not None or skip_code
+        link_end = code_end = emphasis_end = footnote_end = 0; saw_tag = False
+        code_spans: List[Tuple[int, int]] = []; used_footnotes: Set[str] = set()
+        for trigger in self._trigger_pattern(wanted).finditer(text):
+            i = trigger.start(); char = text[i]
+            if char == '`':
+                if want_code and i >= code_end:
+                    cm = self.CODE_INLINE_RE.match(text, i)
+                    if cm:
+                        code_end = cm.end()
+                        if inline_code is not None: inline_code.append(cm.group(1))
+                        if skip_code: code_spans.append((i, code_end))
+                continue
+            if skip_code and i < code_end: continue
+            if char == '*' or char == '_':
+                if emphasis is not None and i >= emphasis_end:
+                    em_match = self.EMPHASIS_RE.match(text, i)
+                    if em_match:
+                        emphasis_end = em_match.end(); emphasized_text = em_match.group(2) or em_match.group(3) or em_match.group(4)
+                        if emphasized_text: emphasis.append(emphasized_text)
+            elif char == '<':
+                if want_html and not saw_tag: saw_tag = self.HTML_START_TAG_OPEN_RE.match(text, i) is not None
+            else:
+                if want_links and i >= link_end:
+                    mm = self.IMAGE_OR_LINK_RE.match(text, i)
+                    if mm:
+                        link_end = mm.end(); is_image = char == '!'; alt_or_text = mm.group(2); url_direct = mm.group(4); url_ref_id = mm.group(5)
+                        final_url: Optional[str] = None
+                        if url_direct: final_url = url_direct
+                        elif url_ref_id and url_ref_id.lower() in self.references: final_url = self.references[url_ref_id.lower()]
+                        if final_url:
+                            if is_image and image_links is not None: image_links.append(_new_image_link((alt_or_text, final_url)) if compact else {"alt_text": alt_or_text, "url": final_url})
+                            elif not is_image and text_links is not None: text_links.append(_new_text_link((alt_or_text, final_url)) if compact else {"text": alt_or_text, "url": final_url})
+                if char == '[' and footnotes_used is not None and i >= footnote_end:
+                    fm = self.FOOTNOTE_RE.match(text, i)
+                    if fm:
+                        footnote_end = fm.end(); fid = fm.group(1)
+                        if fid in self.footnotes and fid not in used_footnotes:
+                            used_footnotes.add(fid)
+                            footnotes_used.append(_new_footnote_ref((fid, self.footnotes[fid])) if compact else {"id": fid, "content": self.footnotes[fid]})
+        if want_html and saw_tag:
+            html_text = "".join(text[start:end] for start, end in zip([0] + [e for _, e in code_spans], [s for s, _ in code_spans] + [len(text)])) if code_spans else text
+            result["html_inline"] = self._scan_html_inline(html_text)
+        if compact:
+            for category, found in result.items(): result[category] = tuple(found)  # in place; tuple([]) is the shared empty tuple
         return result
 
+    @classmethod
+    def _trigger_pattern(cls, categories: Tuple[str, ...]) -> 're.Pattern[str]':
+        pattern = cls._TRIGGER_PATTERNS.get(categories)
+        if pattern is None:
+            chars = "".join(sorted({char for category in categories for char in cls.CATEGORY_TRIGGERS.get(category, "")} | {'`'}))
+            pattern = cls._TRIGGER_PATTERNS[categories] = re.compile(f"[{re.escape(chars)}]")
+        return pattern
+
+    def parse_html_inline(self, text: str) -> List[str]:
+        # html.parser only opens a tag on '<' followed by a letter, so most blocks are settled by this check.
+        if '<' not in text or not self.HTML_START_TAG_OPEN_RE.search(text): return []
+        return self._scan_html_inline(text)
+
+    def _scan_html_inline(self, text: str) -> List[str]:
+        try: tags = _InlineHTMLScanner().scan(text)
+        except Exception: tags = None
+        if tags is None: tags = [str(tag_element) for tag_element in BeautifulSoup(text, 'html.parser').find_all()]
+        return tags
+
 class MarkdownParser:
+    VERSION = 1  # bump when the tokens produced for a given text change; part of the ParseCache key
     FRONTMATTER_RE = re.compile(r'^---\s*$')
     ATX_HEADER_RE = re.compile(r'^(#{1,6})\s+(.*)$')
     SETEXT_H1_RE = re.compile(r'^=+\s*$')
@@ -100,6 +308,7 @@ class MarkdownParser:
     FOOTNOTE_DEF_RE = re.compile(r'^\[\^([^\]]+)\]:\s+(.*?)\s*$', re.MULTILINE)
     HTML_BLOCK_START = re.compile(r'^(<([a-zA-Z]+)([^>]*)>|<!--)')
     HTML_BLOCK_END_COMMENT = re.compile(r'-->\s*$')
+    BLOCK_START_DISPATCH: Dict[str, Tuple['re.Pattern[str]', ...]] = {}  # filled by _build_block_dispatch
 
     def __init__(self, text: str):
         self.lines: List[str] = text.split('\n')
@@ -112,34 +321,50 @@ class MarkdownParser:
         self.extract_references_and_footnotes()
 
     def extract_references_and_footnotes(self) -> None:
-        for m in self.REFERENCE_DEF_RE.finditer(self.text): self.references[m.group(1).lower()] = m.group(2)
-        for m in self.FOOTNOTE_DEF_RE.finditer(self.text): self.footnotes[m.group(1)] = m.group(2)
+        for m in self._iter_definitions(self.REFERENCE_DEF_RE, self.text): self.references[m.group(1).lower()] = m.group(2)
+        for m in self._iter_definitions(self.FOOTNOTE_DEF_RE, self.text): self.footnotes[m.group(1)] = m.group(2)
+
+    @staticmethod
+    def _iter_definitions(regex: 're.Pattern[str]', text: str) -> Iterator['re.Match[str]']:
+        # Same matches as regex.finditer(text) for the '^\[' anchored definition patterns, but only lines starting
+        # with '[' are tried (found with str.find) instead of letting the regex engine test every position.
+        end = 0; i = 0 if text.startswith('[') else (text.find('\n[') + 1 or -1)
+        while i >= 0:
+            if i >= end:
+                m = regex.match(text, i)
+                if m: end = m.end(); yield m
+            i = text.find('\n[', i) + 1 or -1
 
     def parse(self) -> List[BlockToken]:
         if self.pos < self.length and self.FRONTMATTER_RE.match(self.lines[self.pos].strip()): self.parse_frontmatter()
-        while self.pos < self.length:
-            if self.pos >= self.length: break
-            line = self.lines[self.pos]
-            if not line.strip(): self.pos += 1; continue
-            if line.startswith("    ") or line.startswith("\t"): self.parse_indented_code_block(); continue
-            if self.is_table_start(): self.parse_table(); continue
-            if self.is_html_block_start(line): self.parse_html_block(); continue
-            m_atx = self.ATX_HEADER_RE.match(line)
-            if m_atx: self.tokens.append(BlockToken('header', content=m_atx.group(2).strip(), level=len(m_atx.group(1)), line=self.pos+1)); self.pos += 1; continue
-            if self.pos+1 < self.length:
-                next_line_strip = self.lines[self.pos+1].strip()
-                if self.SETEXT_H1_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=line.strip(), level=1, line=self.pos+1)); self.pos += 2; continue
-                if self.SETEXT_H2_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=line.strip(), level=2, line=self.pos+1)); self.pos += 2; continue
-            if self.HR_RE.match(line.strip()): self.tokens.append(BlockToken('hr', line=self.pos+1)); self.pos += 1; continue
-            fm_fence = self.FENCE_RE.match(line.strip())
-            if fm_fence: self.parse_fenced_code_block(fm_fence.group(1).strip()); continue
-            bm_bq = self.BLOCKQUOTE_RE.match(line)
-            if bm_bq: self.parse_blockquote(); continue
-            om_list, um_list = self.ORDERED_LIST_RE.match(line), self.UNORDERED_LIST_RE.match(line)
-            if om_list or um_list: self.parse_list(ordered=bool(om_list)); continue
-            self.parse_paragraph()
+        while self.pos < self.length: self.parse_block()
         return self.tokens
 
+    def parse_block(self) -> None:
+        """Parses the block starting at self.pos (or skips one blank line), appending to self.tokens."""
+        # Each pattern is only tried when the first significant character allows it to match.
+        line = self.lines[self.pos]; stripped = line.strip()
+        if not stripped: self.pos += 1; return
+        if line.startswith("    ") or line.startswith("\t"): self.parse_indented_code_block(); return
+        if self.is_table_start(): self.parse_table(); return
+        first = stripped[0]
+        if first == '<' and self.is_html_block_start(line): self.parse_html_block(); return
+        if line[0] == '#':
+            m_atx = self.ATX_HEADER_RE.match(line)
+            if m_atx: self.tokens.append(BlockToken('header', content=m_atx.group(2).strip(), level=len(m_atx.group(1)), line=self.pos+1)); self.pos += 1; return
+        if self.pos+1 < self.length:
+            next_line_strip = self.lines[self.pos+1].strip()
+            if next_line_strip[:1] == '=' and self.SETEXT_H1_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=stripped, level=1, line=self.pos+1)); self.pos += 2; return
+            if next_line_strip[:1] == '-' and self.SETEXT_H2_RE.match(next_line_strip): self.tokens.append(BlockToken('header', content=stripped, level=2, line=self.pos+1)); self.pos += 2; return
+        if first in '*-_' and self.HR_RE.match(stripped): self.tokens.append(BlockToken('hr', line=self.pos+1)); self.pos += 1; return
+        if first == '`':
+            fm_fence = self.FENCE_RE.match(stripped)
+            if fm_fence: self.parse_fenced_code_block(fm_fence.group(1).strip()); return
+        if line[0] == '>' and self.BLOCKQUOTE_RE.match(line): self.parse_blockquote(); return
+        if first.isdecimal() and self.ORDERED_LIST_RE.match(line): self.parse_list(ordered=True); return
+        if first in '-+*' and self.UNORDERED_LIST_RE.match(line): self.parse_list(ordered=False); return
+        self.parse_paragraph()
+
     def parse_indented_code_block(self) -> None:
         start = self.pos; code_lines: List[str] = []
         while self.pos < self.length:
@@ -190,7 +415,26 @@ class MarkdownParser:
         self.tokens.append(BlockToken('table', meta={"header": parse_table_row(header_line_content), "rows": [parse_table_row(row) for row in table_rows_content]}, line=start+1))
 
     def starts_new_block(self, line: str) -> bool:
-        return any(regex.match(line) for regex in [self.ATX_HEADER_RE, self.FRONTMATTER_RE, self.FENCE_RE, self.BLOCKQUOTE_RE, self.ORDERED_LIST_RE, self.UNORDERED_LIST_RE, self.HR_RE, self.HTML_BLOCK_START])
+        if not line: return False
+        patterns = self.BLOCK_START_DISPATCH.get(line[0])
+        if patterns is None:
+            if line[0].isspace(): patterns = (self.ORDERED_LIST_RE, self.UNORDERED_LIST_RE)  # only the list patterns allow leading whitespace
+            elif line[0].isdecimal(): patterns = (self.ORDERED_LIST_RE,)  # non-ASCII digits also match \d
+            else: return False
+        return any(regex.match(line) for regex in patterns)
+
+    @classmethod
+    def _build_block_dispatch(cls) -> Dict[str, Tuple['re.Pattern[str]', ...]]:
+        """Maps a line's first character to the block-start patterns of starts_new_block that can match it."""
+        dispatch: Dict[str, Tuple['re.Pattern[str]', ...]] = {
+            '#': (cls.ATX_HEADER_RE,), '-': (cls.FRONTMATTER_RE, cls.UNORDERED_LIST_RE, cls.HR_RE), '`': (cls.FENCE_RE,), '>': (cls.BLOCKQUOTE_RE,),
+            '+': (cls.UNORDERED_LIST_RE,), '*': (cls.UNORDERED_LIST_RE, cls.HR_RE), '_': (cls.HR_RE,), '<': (cls.HTML_BLOCK_START,),
+            ' ': (cls.ORDERED_LIST_RE, cls.UNORDERED_LIST_RE), '\t': (cls.ORDERED_LIST_RE, cls.UNORDERED_LIST_RE)}
+        dispatch.update(dict.fromkeys('0123456789', (cls.ORDERED_LIST_RE,)))
+        return dispatch
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs); cls.BLOCK_START_DISPATCH = cls._build_block_dispatch()  # picks up overridden patterns
 
     def parse_frontmatter(self) -> None:
         self.pos += 1; start = self.pos; fm_lines: List[str] = []
@@ -255,61 +499,665 @@ class MarkdownParser:
         while self.pos < self.length:
             line = self.lines[self.pos]
             if not line.strip(): self.pos += 1; break 
-            if self.starts_new_block(line.strip()): break
+            if self.pos > start and self.starts_new_block(line.strip()): break  # the first line is always taken, so parsing advances
             para_lines.append(line); self.pos += 1
         content = "\n".join(para_lines).strip()
         if content: self.tokens.append(BlockToken('paragraph', content=content, line=start+1))
 
+MarkdownParser.BLOCK_START_DISPATCH = MarkdownParser._build_block_dispatch()
+
+class _LineWindow:
+    """Sliding window over an iterator of lines, indexed by absolute line number (0-based)."""
+    def __init__(self, lines: Iterator[str]):
+        self._source = lines; self._buffer: List[str] = []; self.offset = 0; self.exhausted = False
+
+    def fill(self, end: int) -> int:
+        """Reads lines until `end` lines are known or the source runs out; returns the number of known lines."""
+        known = self.offset + len(self._buffer)
+        if known >= end or self.exhausted: return known
+        while self.offset + len(self._buffer) < end and not self.exhausted:
+            try: self._buffer.append(next(self._source))
+            except StopIteration: self.exhausted = True
+        return self.offset + len(self._buffer)
+
+    def release(self, upto: int) -> None:
+        if upto > self.offset: del self._buffer[:upto - self.offset]; self.offset = upto
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            known = self.fill(index.stop if index.stop is not None else sys.maxsize)
+            stop = known if index.stop is None else min(index.stop, known)
+            return self._buffer[(index.start or 0) - self.offset:stop - self.offset]
+        relative = index - self.offset
+        if relative >= len(self._buffer): self.fill(index + 1)
+        return self._buffer[relative]
+
+class _DefinitionScanner:
+    """
+    Same matches as MarkdownParser._iter_definitions(regex, text) for a stream of the lines of text. Only the lines of a
+    definition that is not settled yet are held: its label may still continue, or its value is on a later line.
+    """
+    def __init__(self, regex: 're.Pattern[str]', on_match: Callable[['re.Match[str]'], None]):
+        self.regex = regex; self.on_match = on_match; self.pending: List[str] = []; self.label_open = False
+
+    def feed(self, line: str) -> None:
+        if not self.pending:
+            if not line.startswith('['): return
+            self.pending.append(line); self._settle(False); return
+        self.pending.append(line)
+        if (']' in line) if self.label_open else bool(line.strip()): self._settle(False)  # only then can the definition settle
+
+    def finish(self) -> None:
+        self._settle(True)
+
+    def _settle(self, final: bool) -> None:
+        while self.pending:
+            text = "\n".join(self.pending); close = text.find(']')
+            self.label_open = close < 0
+            if not final and (self.label_open or (text.startswith(':', close + 1) and not text[close + 2:].strip())): return
+            m = self.regex.match(text)
+            if m: self.on_match(m)
+            rest = self.pending[text.count('\n', 0, m.end()) + 1 if m else 1:]; start = 0
+            while start < len(rest) and not rest[start].startswith('['): start += 1
+            self.pending = rest[start:]
+        self.label_open = False
+
+class StreamingMarkdownParser(MarkdownParser):
+    """
+    MarkdownParser over a file object or an iterator of lines, yielding BlockTokens as they are completed.
+    Only the lines of the block being parsed (plus one line of look-ahead) are held in memory.
+    Reference and footnote definitions are collected as their lines pass, so they are complete once the stream is exhausted.
+    """
+    def __init__(self, source: Union[str, IO[str], Iterable[str]]):
+        if isinstance(source, str): source = io.StringIO(source)
+        self.lines: _LineWindow = _LineWindow(self._iter_lines(source))  # type: ignore[assignment]
+        self.pos: int = 0
+        self.tokens: List[BlockToken] = []
+        self.references: Dict[str, str] = {}
+        self.footnotes: Dict[str, str] = {}
+
+    @property
+    def length(self) -> int:  # type: ignore[override]
+        # Every bound check in the block parsers looks at most one line past self.pos.
+        lines = self.lines; known = lines.offset + len(lines._buffer)
+        return known if known >= self.pos + 2 or lines.exhausted else lines.fill(self.pos + 2)
+
+    def _iter_lines(self, source: Iterable[str]) -> Iterator[str]:
+        last: Optional[str] = None
+        scanners = (_DefinitionScanner(self.REFERENCE_DEF_RE, lambda m: self.references.__setitem__(m.group(1).lower(), m.group(2))),
+                    _DefinitionScanner(self.FOOTNOTE_DEF_RE, lambda m: self.footnotes.__setitem__(m.group(1), m.group(2))))
+        for raw_line in source:
+            line = raw_line[:-1] if raw_line.endswith('\n') else raw_line
+            for scanner in scanners: scanner.feed(line)
+            last = raw_line; yield line
+        if last is None or last.endswith('\n'):
+            for scanner in scanners: scanner.feed("")
+            yield ""  # matches text.split('\n') on a trailing newline
+        for scanner in scanners: scanner.finish()
+
+    def iter_tokens(self) -> Iterator[BlockToken]:
+        if self.pos < self.length and self.FRONTMATTER_RE.match(self.lines[self.pos].strip()): self.parse_frontmatter()
+        while True:
+            tokens, self.tokens = self.tokens, []
+            self.lines.release(self.pos)
+            yield from tokens
+            if self.pos >= self.length: break
+            self.parse_block()
+
+    def parse(self) -> List[BlockToken]:
+        tokens = list(self.iter_tokens()); self.tokens = tokens
+        return tokens
+
+class _MappedFile:
+    """
+    Read-only memory map of a text file in an ASCII-compatible encoding. Lines are found in the mapped bytes and decoded
+    one at a time, with the same universal-newline translation as open(file_path, 'r').
+    """
+    def __init__(self, file_path: str, encoding: str = 'utf-8'):
+        if '\n'.encode(encoding) != b'\n' or '\r'.encode(encoding) != b'\r': raise ValueError(f"Memory-mapped input needs an ASCII-compatible encoding, not {encoding}")
+        self.encoding = encoding
+        with open(file_path, 'rb') as f:
+            self.buffer: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    CHUNK = 1 << 16  # bytes decoded at a time (extended to the next newline)
+
+    def iter_lines(self, pos: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yields (byte offset, line) for the lines from byte `pos` on; the lines are those of text.split('\\n')."""
+        buffer = self.buffer; encoding = self.encoding; size = len(buffer)
+        while True:
+            cut = buffer.find(b'\n', pos + self.CHUNK) if pos + self.CHUNK < size else -1
+            raw = buffer[pos:size if cut < 0 else cut]; pieces = raw.split(b'\n')
+            if b'\r' not in raw:
+                for piece, line in zip(pieces, raw.decode(encoding).split('\n')): yield pos, line; pos += len(piece) + 1
+            else:
+                for index, piece in enumerate(pieces):
+                    crlf = (cut >= 0 or index < len(pieces) - 1) and piece.endswith(b'\r')
+                    for part in (piece[:-1] if crlf else piece).split(b'\r'): yield pos, part.decode(encoding); pos += len(part) + 1  # a lone \r also ends a line
+                    pos += crlf
+            if cut < 0: return
+            pos = cut + 1
+
+    def cache_chunks(self) -> Iterator[Any]:
+        """The text encoded as ParseCache.key_for encodes it; the mapped bytes themselves when they already are."""
+        if codecs.lookup(self.encoding).name == 'utf-8' and self.buffer.find(b'\r') < 0: yield self.buffer; return
+        for index, (_, line) in enumerate(self.iter_lines()): yield (b'\n' if index else b'') + line.encode('utf-8', 'surrogatepass')
+
+    def read_text(self) -> str:
+        return str(self.buffer, self.encoding).replace('\r\n', '\n').replace('\r', '\n')
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap): self.buffer.close()
+
+    def definitions(self, regex: 're.Pattern[str]', candidates: Iterable[Tuple[int, int]]) -> Iterator['re.Match[str]']:
+        """
+        Same matches as regex.finditer(text) for the '^\\[' anchored definition patterns of MarkdownParser, given the
+        (line index, byte offset) of every line starting with '['. Each match is made on a window decoded from its line,
+        grown while the window's end could still change the result.
+        """
+        end_line = 0
+        for index, pos in candidates:
+            if index < end_line: continue
+            size = 4096
+            while True:
+                window: List[str] = []; complete = True
+                for line_pos, line in self.iter_lines(pos):
+                    window.append(line)
+                    if line_pos - pos >= size: complete = False; break
+                text = "\n".join(window); m = regex.match(text)
+                truncated = (m.end() == len(text)) if m else ']' not in text[1:]
+                if complete or not truncated: break
+                size *= 4
+            if m: end_line = index + text.count('\n', 0, m.end()) + 1; yield m
+
+_STREAMING_PARSER_CLASSES: Dict[Any, Any] = {MarkdownParser: StreamingMarkdownParser}
+
+def _streaming_parser_class(parser_class: Any) -> Any:
+    """A StreamingMarkdownParser that parses blocks like `parser_class` (e.g. MDXMarkdownParser)."""
+    if issubclass(parser_class, StreamingMarkdownParser): return parser_class
+    if parser_class not in _STREAMING_PARSER_CLASSES:
+        _STREAMING_PARSER_CLASSES[parser_class] = type(f"Streaming{parser_class.__name__}", (StreamingMarkdownParser, parser_class), {})
+    return _STREAMING_PARSER_CLASSES[parser_class]
+
+class ParseCache:
+    """
+    Cache of parse results (block tokens with their inline metadata, references and footnotes) keyed by a hash
+    of the text plus the parser class and its VERSION. Entries are kept in an in-memory LRU and, when `path` is
+    given, in a sqlite file as zlib-compressed JSON, shared between runs and processes.
+    Tokens are rebuilt on every load, so analyzers never share mutable state.
+    """
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None):
+        self.max_entries = max_entries; self.path = path; self.hits = 0; self.misses = 0
+        self._memory: 'OrderedDict[str, str]' = OrderedDict(); self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None; self._conn_pid: Optional[int] = None
+
+    @staticmethod
+    def key_for(text: str, parser_class: Any) -> str: return ParseCache.key_for_encoded([text.encode('utf-8', 'surrogatepass')], parser_class)
+
+    @staticmethod
+    def key_for_encoded(chunks: Iterable[Any], parser_class: Any) -> str:
+        """key_for of the text whose UTF-8 encoding is the concatenation of `chunks` (bytes-like objects)."""
+        hasher = hashlib.blake2b(digest_size=20)
+        for chunk in chunks: hasher.update(chunk)
+        return f"{parser_class.__module__}.{parser_class.__qualname__}:{getattr(parser_class, 'VERSION', 0)}:{hasher.hexdigest()}"
+
+    def load(self, key: str) -> Optional[Tuple[List[BlockToken], Dict[str, str], Dict[str, str], Set[str]]]:
+        """Returns (tokens, references, footnotes, parsed inline categories) for `key`, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None: self._memory.move_to_end(key)
+        if data is None and self.path:
+            blob = self._db_get(key)
+            if blob is not None: data = zlib.decompress(blob).decode('utf-8'); self._remember(key, data)
+        if data is None: self.misses += 1; return None
+        self.hits += 1; payload = json.loads(data)
+        tokens = [BlockToken(type_, content=content, level=level, meta=meta, line=line) for type_, content, level, meta, line in payload["tokens"]]
+        for token in tokens:
+            _inline_as_records(token.meta)
+            for item in token.meta.get("items", ()):
+                if isinstance(item, dict): _inline_as_records(item)
+        return tokens, payload["references"], payload["footnotes"], set(payload["inline"])
+
+    def store(self, key: str, tokens: List[BlockToken], references: Dict[str, str], footnotes: Dict[str, str], inline_categories: Iterable[str]) -> None:
+        data = json.dumps({"tokens": [[t.type, t.content, t.level, t.meta, t.line] for t in tokens], "references": references,
+                           "footnotes": footnotes, "inline": sorted(inline_categories)}, separators=(',', ':'))
+        self._remember(key, data)
+        if self.path: self._db_put(key, zlib.compress(data.encode('utf-8')))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.path:
+                try: self._db().execute("DELETE FROM parse_cache")
+                except sqlite3.Error as e: logger.warning(f"Parse cache clear failed for {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None: self._conn.close(); self._conn = None
+
+    def _remember(self, key: str, data: str) -> None:
+        with self._lock:
+            self._memory[key] = data; self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries: self._memory.popitem(last=False)
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process: a connection inherited through fork must not be reused.
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path or "", timeout=30, isolation_level=None, check_same_thread=False); self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        return self._conn
+
+    def _db_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            try: row = self._db().execute("SELECT data FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e: logger.warning(f"Parse cache read failed for {self.path}: {e}"); return None
+        return row[0] if row else None
+
+    def _db_put(self, key: str, blob: bytes) -> None:
+        with self._lock:
+            try: self._db().execute("INSERT OR REPLACE INTO parse_cache (key, data) VALUES (?, ?)", (key, blob))
+            except sqlite3.Error as e: logger.warning(f"Parse cache write failed for {self.path}: {e}")
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP GET responses (body, headers and ETag/Last-Modified validators) in a sqlite file.
+    A cached URL is fetched again with If-None-Match / If-Modified-Since; on 304 Not Modified the stored body is
+    returned as a regular 200 response, so re-crawls only download what changed. Responses without validators
+    are not stored.
+    """
+    def __init__(self, path: str):
+        self.path = path; self.hits = 0; self.misses = 0; self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None; self._conn_pid: Optional[int] = None
+
+    def get(self, url: str, getter: Optional[Callable[..., requests.Response]] = None, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> requests.Response:
+        """GETs `url` with `getter` (requests.get by default, or a Session's get), revalidating a cached copy."""
+        cached = self._db_get(url); request_headers = dict(headers or {})
+        if cached is not None:
+            if cached[0].get('ETag'): request_headers['If-None-Match'] = cached[0]['ETag']
+            if cached[0].get('Last-Modified'): request_headers['If-Modified-Since'] = cached[0]['Last-Modified']
+        response = (getter or requests.get)(url, headers=request_headers, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.hits += 1; stored_headers, encoding, body = cached
+            cached_response = requests.Response(); cached_response.status_code = 200; cached_response.reason = "OK"; cached_response.url = url
+            cached_response.headers = CaseInsensitiveDict(stored_headers); cached_response._content = body; cached_response.encoding = encoding
+            return cached_response
+        self.misses += 1
+        if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self._db_put(url, dict(response.headers), response.encoding, response.content)
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            try: self._db().execute("DELETE FROM http_cache")
+            except sqlite3.Error as e: logger.warning(f"HTTP cache clear failed for {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None: self._conn.close(); self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per process, shared by the scraper's threads under the lock.
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False); self._conn_pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS http_cache (url TEXT PRIMARY KEY, headers TEXT NOT NULL, encoding TEXT, body BLOB NOT NULL)")
+        return self._conn
+
+    def _db_get(self, url: str) -> Optional[Tuple[Dict[str, str], Optional[str], bytes]]:
+        with self._lock:
+            try: row = self._db().execute("SELECT headers, encoding, body FROM http_cache WHERE url = ?", (url,)).fetchone()
+            except sqlite3.Error as e: logger.warning(f"HTTP cache read failed for {self.path}: {e}"); return None
+        return (json.loads(row[0]), row[1], zlib.decompress(row[2])) if row else None
+
+    def _db_put(self, url: str, headers: Dict[str, str], encoding: Optional[str], body: bytes) -> None:
+        with self._lock:
+            try: self._db().execute("INSERT OR REPLACE INTO http_cache (url, headers, encoding, body) VALUES (?, ?, ?, ?)", (url, json.dumps(headers), encoding, zlib.compress(body)))
+            except sqlite3.Error as e: logger.warning(f"HTTP cache write failed for {self.path}: {e}")
+
+class Section:
+    """A heading and everything up to the next heading of the same or a higher level. The root section (level 0) is the document."""
+    __slots__ = ('heading', 'level', 'line', 'end_line', 'token_start', 'token_end', 'parent', 'children', 'path')
+
+    def __init__(self, heading: Optional[str], level: int, line: int, end_line: int, token_start: int, token_end: int, parent: Optional['Section'] = None):
+        self.heading = heading
+        self.level = level
+        self.line = line  # first line (the heading), 1-based
+        self.end_line = end_line  # last line, inclusive
+        self.token_start = token_start  # tokens[token_start:token_end] are the heading token and everything under it
+        self.token_end = token_end
+        self.parent = parent
+        self.children: List['Section'] = []
+        self.path: Tuple[str, ...] = parent.path + (heading or "",) if parent is not None else ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"heading": self.heading, "level": self.level, "line": self.line, "end_line": self.end_line, "path": list(self.path),
+                "token_start": self.token_start, "token_end": self.token_end}
+
+    def __repr__(self) -> str: return f"Section({self.heading!r}, level={self.level}, lines={self.line}-{self.end_line})"
+
+class SectionIndex:
+    """
+    Section tree of a token list, built in one pass over the headers. Lookups by line bisect the heading start lines;
+    lookups by heading path and by level are dictionary hits, so no query rescans the tokens.
+    """
+    def __init__(self, tokens: List[BlockToken], line_count: int):
+        self.tokens = tokens
+        self.root = Section(None, 0, 1, line_count, 0, len(tokens))
+        self.sections: List[Section] = []  # every heading's section, in document order
+        self._starts: List[int] = []
+        self._by_path: Dict[Tuple[str, ...], List[Section]] = defaultdict(list)
+        self._by_level: Dict[int, List[Section]] = defaultdict(list)
+        stack = [self.root]
+        for index, token in enumerate(tokens):
+            if token.type != 'header': continue
+            level = token.level or 1; line = token.line or 1
+            while stack[-1].level >= level:
+                closed = stack.pop(); closed.end_line = line - 1; closed.token_end = index
+            section = Section(token.content, level, line, line_count, index, len(tokens), stack[-1])
+            stack[-1].children.append(section); stack.append(section)
+            self.sections.append(section); self._starts.append(line)
+            self._by_path[section.path].append(section); self._by_level[level].append(section)
+
+    def __len__(self) -> int: return len(self.sections)
+    def __iter__(self) -> Iterator[Section]: return iter(self.sections)
+
+    def section_at(self, line: int) -> Section:
+        """The innermost section containing `line` (the root section before the first heading)."""
+        if not 1 <= line <= self.root.end_line: raise ValueError(f"Line {line} is outside the document (1-{self.root.end_line}).")
+        index = bisect_right(self._starts, line) - 1
+        return self.sections[index] if index >= 0 else self.root
+
+    def find(self, path: Union[str, Iterable[str]]) -> List[Section]:
+        """Sections whose heading path (headings from the top level down) is `path`; a string is a one-heading path."""
+        return list(self._by_path.get((path,) if isinstance(path, str) else tuple(path), ()))
+
+    def tokens_under(self, path: Union[str, Iterable[str]]) -> List[BlockToken]:
+        """The tokens of every section at `path`, each starting with its heading token."""
+        return [token for section in self.find(path) for token in self.tokens[section.token_start:section.token_end]]
+
+    def at_level(self, level: int) -> List[Section]: return list(self._by_level.get(level, ()))
+
 class MarkdownAnalyzer:
-    def __init__(self, file_path: str, encoding: str ='utf-8'):
+    parser_class: Any = MarkdownParser
+    parse_cache: Optional[ParseCache] = None  # default cache for every analyzer; set to a ParseCache to enable caching
+    _defer_cache_store = False; _cache_dirty = False  # see flush_cache and _batched_cache_store
+
+    def __init__(self, file_path: str, encoding: str ='utf-8', cache: Optional[ParseCache] = None):
         try:
-            with open(file_path, 'r', encoding=encoding) as f: self.text: str = f.read()
+            with open(file_path, 'r', encoding=encoding) as f: text: str = f.read()
         except Exception as e: logger.error(f"Error reading file {file_path}: {e}"); raise
-        parser = MarkdownParser(self.text)
-        self.tokens: List[BlockToken] = parser.parse()
-        self.references: Dict[str, str] = parser.references
-        self.footnotes: Dict[str, str] = parser.footnotes
-        self.inline_parser: InlineParser = InlineParser(references=self.references, footnotes=self.footnotes)
-        self._parse_inline_tokens()
+        self._load_text(text, cache)
 
     @classmethod
-    def from_file(cls, file_path: str, encoding: str ='utf-8') -> 'MarkdownAnalyzer':
-        return cls(file_path=file_path, encoding=encoding)
+    def from_file(cls, file_path: str, encoding: str ='utf-8', cache: Optional[ParseCache] = None, use_mmap: bool = False) -> 'MarkdownAnalyzer':
+        """
+        With `use_mmap`, the file is memory-mapped and parsed line by line instead of being read into a string first;
+        `text` is then only decoded if a method needs it (counting, apply_edit, ...). Needs an ASCII-compatible encoding.
+        """
+        if not use_mmap: return cls(file_path=file_path, encoding=encoding, cache=cache)
+        analyzer = cls.__new__(cls); # type: ignore
+        analyzer._load_mapped(file_path, encoding, cache); return analyzer
 
     @classmethod
-    def from_url(cls, url: str, encoding: str ='utf-8') -> 'MarkdownAnalyzer':
+    def from_url(cls, url: str, encoding: str ='utf-8', cache: Optional[ParseCache] = None, http_cache: Optional[HTTPCache] = None) -> 'MarkdownAnalyzer':
+        """With an http_cache an unchanged document is not downloaded again; with a parse cache it is not parsed again either."""
         try:
-            response = requests.get(url, timeout=10); response.raise_for_status()
+            response = http_cache.get(url, timeout=10) if http_cache is not None else requests.get(url, timeout=10); response.raise_for_status()
             text = response.content.decode(encoding, errors='replace')
             analyzer = cls.__new__(cls); # type: ignore
-            analyzer.text = text 
-            parser = MarkdownParser(text)
-            analyzer.tokens = parser.parse(); analyzer.references = parser.references
-            analyzer.footnotes = parser.footnotes; analyzer.inline_parser = InlineParser(references=analyzer.references, footnotes=analyzer.footnotes)
-            analyzer._parse_inline_tokens(); return analyzer
+            analyzer._load_text(text, cache); return analyzer
         except requests.RequestException as exc: logger.error(f"Error fetching URL {url}: {exc}"); raise
 
     @classmethod
-    def from_string(cls, markdown_string: str, encoding: str ='utf-8') -> 'MarkdownAnalyzer':
+    def from_string(cls, markdown_string: str, encoding: str ='utf-8', cache: Optional[ParseCache] = None) -> 'MarkdownAnalyzer':
         analyzer = cls.__new__(cls); # type: ignore
-        analyzer.text = markdown_string 
-        parser = MarkdownParser(markdown_string)
-        analyzer.tokens = parser.parse(); analyzer.references = parser.references
-        analyzer.footnotes = parser.footnotes; analyzer.inline_parser = InlineParser(references=analyzer.references, footnotes=analyzer.footnotes)
-        analyzer._parse_inline_tokens(); return analyzer
+        analyzer._load_text(markdown_string, cache); return analyzer
+
+    @classmethod
+    def analyse_files(cls, paths: Union[str, Iterable[str]], methods: Union[str, Iterable[str]] = 'analyse', max_workers: Optional[int] = None,
+                      chunksize: int = 8, pattern: str = '*.md', encoding: str = 'utf-8', parse_cache: Optional[ParseCache] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Analyses many files across a process pool, yielding {"path", "result", "error"} per file in completion order.
+        `paths` is a directory (searched recursively for `pattern`), a glob, a single file or an iterable of paths.
+        `methods` is 'analyse' and/or identify_* method names; when several are given, "result" maps each name to its output.
+        A file that cannot be read or analysed is reported through "error" without stopping the batch.
+        With max_workers <= 1 the files are analysed in the calling process.
+        `parse_cache` (default: the class's parse_cache) is reopened from its path in each worker process, whatever the
+        multiprocessing start method; a cache without a path is only used when the files are analysed in this process.
+        """
+        single, method_names = cls._batch_methods(methods); cache = parse_cache if parse_cache is not None else cls.parse_cache
+        path_iter = iter(cls._iter_batch_paths(paths, pattern)); chunksize = max(1, chunksize)
+        chunks = iter(lambda: list(islice(path_iter, chunksize)), [])
+        if max_workers is not None and max_workers <= 1:
+            for chunk in chunks: yield from _analyse_file_chunk(cls, chunk, method_names, single, encoding, cache)
+            return
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)  # keeps the path iterator lazy on huge corpora
+        worker_cache = (cache.path, cache.max_entries) if cache is not None and cache.path else None
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker, initargs=(worker_cache,)) as executor:
+            pending: Dict[Future, List[str]] = {}
+            try:
+                for chunk in chunks:
+                    pending[executor.submit(_analyse_file_chunk, cls, chunk, method_names, single, encoding)] = chunk
+                    while len(pending) >= max_in_flight: yield from cls._collect_batch_results(pending)
+                while pending: yield from cls._collect_batch_results(pending)
+            finally:
+                for future in pending: future.cancel()
+
+    @classmethod
+    def _batch_methods(cls, methods: Union[str, Iterable[str]]) -> Tuple[bool, Tuple[str, ...]]:
+        # (single, names) for a batch `methods` argument: 'analyse' and/or identify_* method names.
+        single = isinstance(methods, str); method_names: Tuple[str, ...] = (methods,) if isinstance(methods, str) else tuple(methods)
+        for name in method_names:
+            if not (name == 'analyse' or name.startswith('identify_')) or not callable(getattr(cls, name, None)): raise ValueError(f"Unsupported batch method: {name}")
+        return single, method_names
+
+    @staticmethod
+    def _collect_batch_results(pending: Dict[Future, List[str]]) -> Iterator[Dict[str, Any]]:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk = pending.pop(future)
+            try: yield from future.result()
+            except Exception as e:  # the worker itself died (e.g. BrokenProcessPool); report every file of its chunk
+                logger.error(f"Batch worker failed on {len(chunk)} file(s): {e}")
+                for path in chunk: yield {"path": path, "result": None, "error": f"{type(e).__name__}: {e}"}
+
+    @staticmethod
+    def _iter_batch_paths(paths: Union[str, Iterable[str]], pattern: str) -> Iterable[str]:
+        if isinstance(paths, (str, os.PathLike)):
+            source = os.fspath(paths)
+            if os.path.isdir(source): return sorted(p for p in glob.glob(os.path.join(source, '**', pattern), recursive=True) if os.path.isfile(p))
+            if any(c in source for c in '*?['): return sorted(p for p in glob.glob(source, recursive=True) if os.path.isfile(p))
+            return [source]
+        return (os.fspath(p) for p in paths)
+
+    @staticmethod
+    def stream_tokens(file_path: str, encoding: str = 'utf-8') -> Iterator[BlockToken]:
+        """Yields the block tokens of a file without reading it into memory (no inline parsing)."""
+        with open(file_path, 'r', encoding=encoding) as f: yield from StreamingMarkdownParser(f).iter_tokens()
+
+    @property
+    def text(self) -> str:
+        if self._text is None: self.close()  # decodes the text; the mapping is not needed after that
+        return self._text  # type: ignore[return-value]
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self.close()
+        self._text: Optional[str] = value; self._mapped: Optional[_MappedFile] = None; self._section_index: Optional[SectionIndex] = None
+
+    def close(self) -> None:
+        """
+        Flushes the ParseCache entry and releases the memory map of a from_file(..., use_mmap=True) analyzer, decoding
+        `text` first if no method has yet.
+        """
+        self.flush_cache(); mapped = getattr(self, '_mapped', None)
+        if mapped is None: return
+        try:
+            if self._text is None: self._text = mapped.read_text()
+        finally: self._mapped = None; mapped.close()
+
+    def __enter__(self) -> 'MarkdownAnalyzer': return self
+    def __exit__(self, *exc_info: Any) -> None: self.close()
+
+    def _load_mapped(self, file_path: str, encoding: str, cache: Optional[ParseCache] = None) -> None:
+        # Like _load_text, but the tokens are streamed from the mapped file; only token content is ever decoded and kept.
+        try: mapped = _MappedFile(file_path, encoding)
+        except Exception as e: logger.error(f"Error mapping file {file_path}: {e}"); raise
+        self._text = None; self._mapped = mapped; self._section_index = None
+        try: self._parse_mapped(mapped, cache)
+        except Exception: self._mapped = None; mapped.close(); raise
+
+    def _parse_mapped(self, mapped: _MappedFile, cache: Optional[ParseCache]) -> None:
+        self._parse_cache = cache if cache is not None else self.parse_cache
+        self._cache_key = self._parse_cache.key_for_encoded(mapped.cache_chunks(), self.parser_class) if self._parse_cache is not None else None
+        cached = self._parse_cache.load(self._cache_key) if self._parse_cache is not None and self._cache_key else None
+        if cached is not None:
+            self.tokens, self.references, self.footnotes, self._inline_parsed = cached
+        else:
+            candidates: List[Tuple[int, int]] = []  # (line index, byte offset) of the lines that may start a definition
+            def lines() -> Iterator[str]:
+                for index, (pos, line) in enumerate(mapped.iter_lines()):
+                    if line.startswith('['): candidates.append((index, pos))
+                    yield line
+            self.tokens = _streaming_parser_class(self.parser_class)(lines()).parse()
+            self.references = {m.group(1).lower(): m.group(2) for m in mapped.definitions(self.parser_class.REFERENCE_DEF_RE, candidates)}
+            self.footnotes = {m.group(1): m.group(2) for m in mapped.definitions(self.parser_class.FOOTNOTE_DEF_RE, candidates)}
+            self._inline_parsed = set()
+            self._store_in_cache()
+        self.inline_parser = InlineParser(references=self.references, footnotes=self.footnotes)
+
+    def _load_text(self, text: str, cache: Optional[ParseCache] = None) -> None:
+        # Block tokenization is eager; inline elements are parsed per token and category on first access.
+        self.text: str = text
+        self._parse_cache: Optional[ParseCache] = cache if cache is not None else self.parse_cache
+        self._cache_key: Optional[str] = self._parse_cache.key_for(text, self.parser_class) if self._parse_cache is not None else None
+        cached = self._parse_cache.load(self._cache_key) if self._parse_cache is not None and self._cache_key else None
+        if cached is not None:
+            self.tokens, self.references, self.footnotes, self._inline_parsed = cached
+        else:
+            parser = self.parser_class(text)
+            self.tokens: List[BlockToken] = parser.parse()
+            self.references: Dict[str, str] = parser.references
+            self.footnotes: Dict[str, str] = parser.footnotes
+            self._inline_parsed: Set[str] = set()
+            self._store_in_cache()
+        self.inline_parser: InlineParser = InlineParser(references=self.references, footnotes=self.footnotes)
+
+    def apply_edit(self, start_line: int, end_line: int, replacement: str) -> List[BlockToken]:
+        """
+        Replaces lines start_line..end_line (1-based, inclusive; end_line = start_line - 1 inserts before start_line)
+        with the lines of `replacement` and re-tokenizes only the blocks the edit can reach. Tokens before and after
+        that region are kept together with their inline metadata; the line numbers of the later ones are shifted in place.
+        Returns the newly parsed tokens.
+        """
+        old_lines = self.text.split('\n')
+        if not (1 <= start_line <= len(old_lines) + 1 and start_line - 1 <= end_line <= len(old_lines)):
+            raise ValueError(f"Invalid edit range {start_line}-{end_line} for a document of {len(old_lines)} lines.")
+        edit_start, edit_end = start_line - 1, end_line
+        new_lines = replacement.split('\n') if replacement else []
+        if replacement.endswith('\n'): new_lines.pop()
+        delta = len(new_lines) - (edit_end - edit_start)
+        text = '\n'.join(old_lines[:edit_start] + new_lines + old_lines[edit_end:])
+        parser = self.parser_class(text)
+        if parser.references != self.references or parser.footnotes != self.footnotes:
+            # Inline links and footnotes anywhere may resolve differently: start over.
+            logger.debug("Edit changed reference or footnote definitions; re-parsing the whole document.")
+            self._load_text(text, self._parse_cache); return list(self.tokens)
+        # A block parse starting at line a and stopping at line b only reads lines a..b, so every token whose
+        # successor starts before the edit is unaffected. The exception is an unclosed fence (parsed as a paragraph,
+        # after scanning to the end of the document), which a newly typed closing fence can close.
+        starts = [(t.line or 1) - 1 for t in self.tokens]
+        restart = max(0, bisect_left(starts, edit_start) - 1)
+        if any(line.strip() == '```' for line in new_lines):
+            restart = next((i for i, t in enumerate(self.tokens[:restart]) if t.type == 'paragraph' and parser.FENCE_RE.match(t.content.split('\n', 1)[0].strip())), restart)
+        parser.pos = starts[restart] if restart else 0
+        if parser.pos == 0 and parser.length and parser.FRONTMATTER_RE.match(parser.lines[0].strip()): parser.parse_frontmatter()
+        # Once a block boundary past the edit lines up with the start of an old token, the rest of the parse is unchanged.
+        resync = {starts[j] + delta: j for j in range(restart + 1, len(starts)) if starts[j] >= edit_end}
+        resync_from = edit_start + len(new_lines); resume = len(self.tokens)
+        while parser.pos < parser.length:
+            if parser.pos >= resync_from and parser.pos in resync: resume = resync[parser.pos]; break
+            parser.parse_block()
+        tail = self.tokens[resume:]
+        if delta:
+            for token in tail:
+                if token.line is not None: token.line += delta
+        self.tokens[restart:] = parser.tokens + tail; self.text = text
+        for token in parser.tokens: self.inline_meta(token, self._inline_parsed)
+        if self._parse_cache is not None: self._cache_key = self._parse_cache.key_for(text, self.parser_class); self._store_in_cache()
+        return parser.tokens
+
+    def _store_in_cache(self) -> None:
+        self._cache_dirty = False
+        if self._parse_cache is not None and self._cache_key: self._parse_cache.store(self._cache_key, self.tokens, self.references, self.footnotes, self._inline_parsed)
+
+    def inline_meta(self, token: BlockToken, categories: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Parses the missing inline `categories` of one token (or of its list items), memoizing them in its meta."""
+        wanted = InlineParser.INLINE_CATEGORIES if categories is None else tuple(categories)
+        if token.type in ('paragraph', 'header', 'blockquote') and token.content:
+            if token.meta is None: token.meta = {}
+            missing = [c for c in wanted if c not in token.meta]
+            if missing: token.meta.update(self.inline_parser.parse_inline(token.content, missing, compact=True))
+        elif token.type in ('ordered_list', 'unordered_list') and token.meta and "items" in token.meta:
+            for item in token.meta["items"]:
+                if isinstance(item, dict) and "text" in item and item["text"]:
+                    missing = [c for c in wanted if c not in item]
+                    if missing: item.update(self.inline_parser.parse_inline(item["text"], missing, compact=True))
+        return token.meta
+
+    def _ensure_inline(self, categories: Iterable[str]) -> None:
+        missing = [c for c in categories if c not in self._inline_parsed]
+        if not missing: return
+        for token in self.tokens: self.inline_meta(token, missing)
+        self._inline_parsed.update(missing); self._cache_dirty = True  # written by the next flush_cache(), not once per category
+
+    def flush_cache(self) -> None:
+        """
+        Writes the inline elements parsed since the last write to the ParseCache, so that later loads of the same text
+        skip them. analyse(), close() and the end of a with block flush; after identify_* calls alone, call this.
+        """
+        if self._cache_dirty: self._store_in_cache()
+
+    @contextmanager
+    def _batched_cache_store(self) -> Iterator[None]:
+        # Defers the flush of analyse() calls made inside to a single one on exit.
+        if self._defer_cache_store: yield; return
+        self._defer_cache_store = True
+        try: yield
+        finally: self._defer_cache_store = False; self.flush_cache()
 
     def _parse_inline_tokens(self) -> None:
-        for token in self.tokens:
-            if token.type in ('paragraph', 'header', 'blockquote') and hasattr(token, 'content') and token.content:
-                inline_data = self.inline_parser.parse_inline(token.content)
-                if not hasattr(token, 'meta') or token.meta is None: token.meta = {}
-                token.meta.update(inline_data)
-            elif token.type in ('ordered_list', 'unordered_list') and hasattr(token, 'meta') and token.meta and "items" in token.meta:
-                for item in token.meta["items"]:
-                    if isinstance(item, dict) and "text" in item and item["text"]: item.update(self.inline_parser.parse_inline(item["text"]))
+        self._ensure_inline(InlineParser.INLINE_CATEGORIES)
 
     def identify_headers(self) -> Dict[str, List[Dict[str, Any]]]: 
         return {"Header": [{"line": t.line, "level": t.level, "text": t.content} for t in self.tokens if t.type == 'header']}
+    def identify_sections(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {"Section": [section.to_dict() for section in self.section_index()]}
+
+    def section_index(self) -> SectionIndex:
+        """The SectionIndex of the current tokens, built on first use and rebuilt after the text changes."""
+        if getattr(self, '_section_index', None) is None:
+            if self._text is None and self._mapped is not None: line_count = sum(1 for _ in self._mapped.iter_lines())  # without decoding the text
+            else: line_count = self.text.count('\n') + 1
+            self._section_index = SectionIndex(self.tokens, line_count)
+        return self._section_index
+
+    def iter_line_offsets(self, line_numbers: Iterable[int]) -> Iterator[int]:
+        """
+        Yields the character offset in `text` of each of the given 1-based, non-decreasing `line_numbers`, found without
+        splitting the text into lines. Lines past the end give len(text), so e.g. token.line values slice the source into blocks.
+        """
+        text = self.text if hasattr(self, 'text') and self.text else ""
+        pos = 0; current = 1
+        for line in line_numbers:
+            while current < line and pos < len(text):
+                newline = text.find('\n', pos)
+                pos = len(text) if newline < 0 else newline + 1; current += 1
+            yield pos
+
+    def section_at_line(self, line: int) -> Section: return self.section_index().section_at(line)
+    def tokens_under(self, path: Union[str, Iterable[str]]) -> List[BlockToken]: return self.section_index().tokens_under(path)
+    def sections_at_level(self, level: int) -> List[Section]: return self.section_index().at_level(level)
     def identify_paragraphs(self) -> Dict[str, List[str]]: 
         return {"Paragraph": [t.content for t in self.tokens if t.type == 'paragraph']}
     def identify_blockquotes(self) -> Dict[str, List[str]]: 
@@ -317,12 +1165,15 @@ class MarkdownAnalyzer:
     def identify_code_blocks(self) -> Dict[str, List[Dict[str, Any]]]: 
         return {"Code block": [{"start_line": t.line, "content": t.content, "language": t.meta.get("language") if t.meta else None, "code_type": t.meta.get("code_type") if t.meta else None} for t in self.tokens if t.type == 'code']}
     def identify_lists(self) -> Dict[str, List[List[Dict[str, Any]]]]: 
-        return {"Ordered list": [t.meta["items"] for t in self.tokens if t.type == 'ordered_list' and t.meta and "items" in t.meta], 
-                "Unordered list": [t.meta["items"] for t in self.tokens if t.type == 'unordered_list' and t.meta and "items" in t.meta]}
+        for t in self.tokens:
+            if t.type in ('ordered_list', 'unordered_list'): self.inline_meta(t)
+        return {"Ordered list": [[_inline_as_dicts(item) for item in t.meta["items"]] for t in self.tokens if t.type == 'ordered_list' and t.meta and "items" in t.meta], 
+                "Unordered list": [[_inline_as_dicts(item) for item in t.meta["items"]] for t in self.tokens if t.type == 'unordered_list' and t.meta and "items" in t.meta]}
     def identify_tables(self) -> Dict[str, List[Dict[str, Any]]]: 
         return {"Table": [{"header": t.meta["header"], "rows": t.meta["rows"]} for t in self.tokens if t.type == 'table' and t.meta and "header" in t.meta and "rows" in t.meta]}
     
     def identify_links(self) -> Dict[str, List[Dict[str, Any]]]:
+        self._ensure_inline(("text_links", "image_links"))
         links: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         for token in self.tokens:
             if hasattr(token, 'meta') and token.meta:
@@ -343,6 +1194,7 @@ class MarkdownAnalyzer:
         return dict(links)
 
     def identify_footnotes(self) -> List[Dict[str, Any]]:
+        self._ensure_inline(("footnotes_used",))
         footnotes: List[Dict[str, Any]] = []; seen: Set[Tuple[str, str]] = set()
         for token in self.tokens:
             if hasattr(token, 'meta') and token.meta and "footnotes_used" in token.meta:
@@ -351,13 +1203,20 @@ class MarkdownAnalyzer:
                     if key not in seen: seen.add(key); footnotes.append({"line": token.line, **fn})
         return footnotes
 
-    def identify_inline_code(self) -> List[Dict[str, Any]]: return [{"line": t.line, "code": c} for t in self.tokens if hasattr(t, 'meta') and t.meta for c in t.meta.get("inline_code", [])]
-    def identify_emphasis(self) -> List[Dict[str, Any]]: return [{"line": t.line, "text": e} for t in self.tokens if hasattr(t, 'meta') and t.meta for e in t.meta.get("emphasis", [])]
+    def identify_inline_code(self) -> List[Dict[str, Any]]:
+        self._ensure_inline(("inline_code",))
+        return [{"line": t.line, "code": c} for t in self.tokens if hasattr(t, 'meta') and t.meta for c in t.meta.get("inline_code", [])]
+    def identify_emphasis(self) -> List[Dict[str, Any]]:
+        self._ensure_inline(("emphasis",))
+        return [{"line": t.line, "text": e} for t in self.tokens if hasattr(t, 'meta') and t.meta for e in t.meta.get("emphasis", [])]
     def identify_task_items(self) -> List[Dict[str, Any]]: return [{"line": (t.line or 0) + i, "text": item["text"], "checked": item["checked"]} for t in self.tokens if t.type in ('ordered_list', 'unordered_list') and hasattr(t, 'meta') and t.meta and "items" in t.meta for i, item in enumerate(t.meta.get("items",[])) if isinstance(item, dict) and item.get("task_item")]
     def identify_html_blocks(self) -> List[Dict[str, Any]]: return [{"line": t.line, "content": t.content} for t in self.tokens if t.type == 'html_block']
-    def identify_html_inline(self) -> List[Dict[str, Any]]: return [{"line": t.line, "html": h} for t in self.tokens if hasattr(t, 'meta') and t.meta for h in t.meta.get("html_inline", [])]
+    def identify_html_inline(self) -> List[Dict[str, Any]]:
+        self._ensure_inline(("html_inline",))
+        return [{"line": t.line, "html": h} for t in self.tokens if hasattr(t, 'meta') and t.meta for h in t.meta.get("html_inline", [])]
 
     def get_tokens_sequential(self) -> List[Dict[str, Any]]:
+        self._ensure_inline(InlineParser.INLINE_CATEGORIES)
         result: List[Dict[str, Any]] = []; element_id = 1
         for token in self.tokens:
             token_data: Dict[str, Any] = {'id': element_id, 'type': token.type, 'line': token.line}; element_id +=1
@@ -384,26 +1243,135 @@ class MarkdownAnalyzer:
             for item in meta_dict.get(key, []):
                 data = {'id': current_id, 'type': type_name}
                 if isinstance(item, dict): data.update(item)
+                elif key in INLINE_RECORD_TYPES: data.update(item._asdict())
                 else: data['content' if type_name not in ["link", "image", "footnote_ref"] else ('text' if type_name == "link" else 'alt_text' if type_name == "image" else 'ref_id')] = item
                 inline_elements.append(data); current_id += 1
         return inline_elements
 
-    def count_words(self) -> int: return len(self.text.split()) if hasattr(self, 'text') and self.text else 0
-    def count_characters(self) -> int: return len([char for char in self.text if not char.isspace()]) if hasattr(self, 'text') and self.text else 0
-
-    def analyse(self) -> Dict[str, Any]:
-        analysis: Dict[str, Any] = {
-            'headers': len(self.identify_headers().get("Header", [])), 'paragraphs': len(self.identify_paragraphs().get("Paragraph", [])),
-            'blockquotes': len(self.identify_blockquotes().get("Blockquote", [])), 'code_blocks': len(self.identify_code_blocks().get("Code block", [])),
-            'ordered_list_items': sum(len(g) for g in self.identify_lists().get("Ordered list", []) if g), 
-            'unordered_list_items': sum(len(g) for g in self.identify_lists().get("Unordered list", []) if g), 
-            'tables': len(self.identify_tables().get("Table", [])), 'html_blocks': len(self.identify_html_blocks()),
-            'html_inline_count': len(self.identify_html_inline()), 'words': self.count_words(), 'characters': self.count_characters(),
-            'links': len(self.identify_links().get("Text Link", [])) + len(self.identify_links().get("Image Link", [])), 
-            'images': len(self.identify_links().get("Image Link", [])), 
-            'footnotes': len(self.identify_footnotes()), 'task_items': len(self.identify_task_items()),
-        }
-        return analysis
+    COUNT_CHUNK_SIZE = 1 << 20  # characters split at a time by the word counter, which bounds its temporary allocations
+
+    def count_words(self) -> int: return _count_words_and_characters(self.text, chunk_size=self.COUNT_CHUNK_SIZE, characters=False)[0] if hasattr(self, 'text') and self.text else 0
+    def count_characters(self) -> int: return _count_words_and_characters(self.text, chunk_size=self.COUNT_CHUNK_SIZE, words=False)[1] if hasattr(self, 'text') and self.text else 0
+
+    def count_statistics(self, per: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns the word and (non-whitespace) character counts of the text. With per='token' or per='section' the same pass
+        also returns the counts of every token's lines (up to the next token) or of every header section under "tokens"/"sections".
+        """
+        if per not in (None, 'token', 'section'): raise ValueError(f"Unknown count_statistics granularity: {per}")
+        text = self.text if hasattr(self, 'text') and self.text else ""
+        if per is None:
+            words, characters = _count_words_and_characters(text, chunk_size=self.COUNT_CHUNK_SIZE); return {"words": words, "characters": characters}
+        tokens = self.tokens if per == 'token' else [token for token in self.tokens if token.type == 'header']
+        starts = self._line_offsets([token.line or 1 for token in tokens])
+        spans: List[Tuple[Optional[BlockToken], int, int]] = [(token, start, end) for token, start, end in zip(tokens, starts, starts[1:] + [len(text)])]
+        if not starts or starts[0] > 0: spans.insert(0, (None, 0, starts[0] if starts else len(text)))  # text before the first token/header
+        parts: List[Dict[str, Any]] = []; total_words = total_characters = 0
+        for token, start, end in spans:
+            words, characters = _count_words_and_characters(text, start, end, chunk_size=self.COUNT_CHUNK_SIZE)
+            total_words += words; total_characters += characters
+            if token is None:
+                if per == 'section' and (words or characters): parts.append({"heading": None, "level": 0, "line": 1, "words": words, "characters": characters})
+            elif per == 'token': parts.append({"type": token.type, "line": token.line, "words": words, "characters": characters})
+            else: parts.append({"heading": token.content, "level": token.level, "line": token.line, "words": words, "characters": characters})
+        return {"words": total_words, "characters": total_characters, "tokens" if per == 'token' else "sections": parts}
+
+    def _line_offsets(self, line_numbers: Iterable[int]) -> List[int]: return list(self.iter_line_offsets(line_numbers))
+
+    ANALYSE_COUNTERS: Tuple[str, ...] = ('headers', 'paragraphs', 'blockquotes', 'code_blocks', 'ordered_list_items', 'unordered_list_items', 'tables',
+                                         'html_blocks', 'html_inline_count', 'words', 'characters', 'links', 'images', 'footnotes', 'task_items')
+    _BLOCK_COUNTERS: Dict[str, str] = {'header': 'headers', 'paragraph': 'paragraphs', 'blockquote': 'blockquotes', 'code': 'code_blocks', 'table': 'tables', 'html_block': 'html_blocks'}
+    _INLINE_COUNTERS: Dict[str, Tuple[str, ...]] = {'html_inline_count': ('html_inline',), 'links': ('text_links', 'image_links'),
+                                                    'images': ('text_links', 'image_links'), 'footnotes': ('footnotes_used',)}
+
+    def _resolve_counters(self, counters: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        if counters is None: return self.ANALYSE_COUNTERS
+        wanted = set(counters); unknown = wanted.difference(self.ANALYSE_COUNTERS)
+        if unknown: raise ValueError(f"Unknown analyse counter(s): {', '.join(sorted(unknown))}")
+        return tuple(c for c in self.ANALYSE_COUNTERS if c in wanted)
+
+    def analyse(self, counters: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Counts document elements in a single walk over the tokens and their inline metadata.
+        `counters` restricts the work (and the result) to the named keys of ANALYSE_COUNTERS.
+        """
+        wanted = self._resolve_counters(counters); wanted_set = set(wanted)
+        counts: Dict[str, int] = dict.fromkeys(self.ANALYSE_COUNTERS, 0)
+        want_inline = not self._INLINE_COUNTERS.keys().isdisjoint(wanted_set)
+        self._ensure_inline([category for counter in wanted if counter in self._INLINE_COUNTERS for category in self._INLINE_COUNTERS[counter]])
+        if not self._defer_cache_store: self.flush_cache()
+        want_items = not {'ordered_list_items', 'unordered_list_items', 'task_items', 'links', 'images'}.isdisjoint(wanted_set)
+        if not wanted_set.isdisjoint(self._BLOCK_COUNTERS.values()) or want_inline or want_items:
+            seen_footnotes: Set[Tuple[str, str]] = set(); text_links = 0; image_links = 0
+            for token in self.tokens:
+                counter = self._BLOCK_COUNTERS.get(token.type)
+                if counter: counts[counter] += 1
+                meta = token.meta
+                if not meta: continue
+                if token.type in ('ordered_list', 'unordered_list'):
+                    items = meta.get("items")
+                    if items is None: continue
+                    counts['ordered_list_items' if token.type == 'ordered_list' else 'unordered_list_items'] += len(items)
+                    for item in items:
+                        if not isinstance(item, dict): continue
+                        if item.get("task_item"): counts['task_items'] += 1
+                        text_links += len(item.get("text_links", ())); image_links += len(item.get("image_links", ()))
+                if want_inline:
+                    counts['html_inline_count'] += len(meta.get("html_inline", ()))
+                    text_links += len(meta.get("text_links", ())); image_links += len(meta.get("image_links", ()))
+                    for fn in meta.get("footnotes_used", ()): seen_footnotes.add((str(fn["id"]), str(fn["content"])))
+            counts['links'] = text_links + image_links; counts['images'] = image_links; counts['footnotes'] = len(seen_footnotes)
+        if 'words' in wanted_set: counts['words'] = self.count_words()
+        if 'characters' in wanted_set: counts['characters'] = self.count_characters()
+        return {key: counts[key] for key in wanted}
+
+_ASCII_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "  # the ASCII characters for which str.isspace() is true
+
+def _count_words_and_characters(text: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 1 << 20, words: bool = True, characters: bool = True) -> Tuple[int, int]:
+    """
+    Returns (len(text[start:end].split()), number of non-whitespace characters in text[start:end]) without creating an object
+    per character. ASCII-only character counts use one str.count per whitespace character; otherwise the text is split one
+    chunk at a time (so only one chunk's words are alive) and the characters are the summed word lengths.
+    """
+    end = len(text) if end is None else min(end, len(text))
+    if start >= end: return 0, 0
+    if characters and not words and text.isascii(): return 0, (end - start) - sum(text.count(char, start, end) for char in _ASCII_WHITESPACE)
+    word_count = character_count = 0; in_word = False; pos = start
+    while pos < end:
+        stop = min(pos + chunk_size, end); chunk = text[pos:stop]; found = chunk.split()
+        if characters: character_count += sum(map(len, found))
+        if found and in_word and not chunk[0].isspace(): word_count -= 1  # the first word continues one from the previous chunk
+        word_count += len(found); in_word = not chunk[-1].isspace(); pos = stop
+    return (word_count if words else 0), character_count
+
+_batch_parse_cache: Optional[ParseCache] = None  # analyse_files' parse cache, reopened in each worker process by _init_batch_worker
+
+def _init_batch_worker(cache: Optional[Tuple[str, int]]) -> None:
+    # ProcessPoolExecutor initializer of analyse_files; with spawn, the parent's class attributes do not reach the workers.
+    global _batch_parse_cache
+    _batch_parse_cache = ParseCache(max_entries=cache[1], path=cache[0]) if cache is not None else None
+
+def _analyse_file_chunk(analyzer_class: Any, paths: List[str], methods: Tuple[str, ...], single: bool, encoding: str,
+                        cache: Optional[ParseCache] = None) -> List[Dict[str, Any]]:
+    # Module level so that ProcessPoolExecutor can pickle it; one call handles one chunk of MarkdownAnalyzer.analyse_files.
+    results: List[Dict[str, Any]] = []; cache = cache if cache is not None else _batch_parse_cache
+    for path in paths:
+        try:
+            analyzer = analyzer_class.from_file(path, encoding=encoding, cache=cache)
+            with analyzer._batched_cache_store(): outputs = {name: getattr(analyzer, name)() for name in methods}
+            results.append({"path": path, "result": outputs[methods[0]] if single else outputs, "error": None})
+        except Exception as e:
+            logger.warning(f"Batch analysis failed for {path}: {e}")
+            results.append({"path": path, "result": None, "error": f"{type(e).__name__}: {e}"})
+    return results
+
+def _analyse_markdown(analyzer_class: Any, methods: Tuple[str, ...], single: bool, markdown: str) -> Tuple[Any, Optional[str]]:
+    # Module level so that ProcessPoolExecutor can pickle it; the analysis stage of CrawlPipeline for one page.
+    try:
+        analyzer = analyzer_class.from_string(markdown)
+        with analyzer._batched_cache_store(): outputs = {name: getattr(analyzer, name)() for name in methods}
+        return (outputs[methods[0]] if single else outputs), None
+    except Exception as e: logger.warning(f"Pipeline analysis failed: {e}"); return None, f"{type(e).__name__}: {e}"
 
 class MDXMarkdownParser(MarkdownParser):
     JSX_IMPORT_RE = re.compile(r'^import\s+.*?\s+from\s+["\'](.*?)["\'];?\s*$')
@@ -419,7 +1387,10 @@ class MDXMarkdownParser(MarkdownParser):
         self.tokens = processed_tokens; return self.tokens
 
 class MDXMarkdownAnalyzer(MarkdownAnalyzer):
-    def __init__(self, file_path: Optional[str]=None, markdown_string: Optional[str]=None, from_url: Optional[str]=None, encoding: str='utf-8'):
+    parser_class: Any = MDXMarkdownParser
+
+    def __init__(self, file_path: Optional[str]=None, markdown_string: Optional[str]=None, from_url: Optional[str]=None, encoding: str='utf-8',
+                 http_cache: Optional[HTTPCache] = None, cache: Optional[ParseCache] = None):
         text_content: Optional[str] = None
         if file_path: 
             try:
@@ -428,32 +1399,33 @@ class MDXMarkdownAnalyzer(MarkdownAnalyzer):
         elif markdown_string is not None: text_content = markdown_string
         elif from_url: 
             try:
-                response = requests.get(from_url, timeout=10); response.raise_for_status(); text_content = response.content.decode(encoding, errors='replace')
+                response = http_cache.get(from_url, timeout=10) if http_cache is not None else requests.get(from_url, timeout=10)
+                response.raise_for_status(); text_content = response.content.decode(encoding, errors='replace')
             except requests.RequestException as exc: logger.error(f"Error fetching MDX from URL {from_url}: {exc}"); raise
         else: raise ValueError("Source required for MDXMarkdownAnalyzer.")
         if text_content is None: raise ValueError("No content for MDXMarkdownAnalyzer.")
         
-        self.text: str = text_content
-        parser = MDXMarkdownParser(self.text) 
-        self.tokens: List[BlockToken] = parser.parse()
-        self.references: Dict[str, str] = parser.references
-        self.footnotes: Dict[str, str] = parser.footnotes
-        self.inline_parser: InlineParser = InlineParser(references=self.references, footnotes=self.footnotes)
-        self._parse_inline_tokens()
+        self._load_text(text_content, cache)
 
     @classmethod
-    def from_file(cls, file_path: str, encoding: str='utf-8') -> 'MDXMarkdownAnalyzer': return cls(file_path=file_path, encoding=encoding)
+    def from_file(cls, file_path: str, encoding: str='utf-8', cache: Optional[ParseCache] = None, use_mmap: bool = False) -> 'MDXMarkdownAnalyzer':  # type: ignore[override]
+        if not use_mmap: return cls(file_path=file_path, encoding=encoding, cache=cache)
+        analyzer = cls.__new__(cls); # type: ignore
+        analyzer._load_mapped(file_path, encoding, cache); return analyzer
     @classmethod
     def from_string(cls, markdown_string: str, encoding: str='utf-8') -> 'MDXMarkdownAnalyzer': return cls(markdown_string=markdown_string, encoding=encoding)
     @classmethod
-    def from_url(cls, url: str, encoding: str='utf-8') -> 'MDXMarkdownAnalyzer': return cls(from_url=url, encoding=encoding)
+    def from_url(cls, url: str, encoding: str='utf-8', http_cache: Optional[HTTPCache] = None) -> 'MDXMarkdownAnalyzer': return cls(from_url=url, encoding=encoding, http_cache=http_cache)  # type: ignore[override]
     
     def identify_jsx_imports(self) -> List[Dict[str, Any]]: return [{"line": i+1, "statement": l.strip(), "source": m.group(1)} for i, l in enumerate(self.text.splitlines()) if (m := MDXMarkdownParser.JSX_IMPORT_RE.match(l.strip()))]
     def identify_jsx_components(self) -> List[Dict[str, Any]]: return [{"line": t.line, "content": t.content} for t in self.tokens if t.type == 'html_block' and hasattr(t, 'content') and MDXMarkdownParser.JSX_COMPONENT_START_RE.match(t.content.strip().split('\n')[0])]
     
-    def analyse(self) -> Dict[str, Any]: 
-        analysis = super().analyse()
-        analysis['jsx_imports'] = len(self.identify_jsx_imports())
+    ANALYSE_COUNTERS: Tuple[str, ...] = MarkdownAnalyzer.ANALYSE_COUNTERS + ('jsx_imports',)
+
+    def analyse(self, counters: Optional[Iterable[str]] = None) -> Dict[str, Any]: 
+        wanted = self._resolve_counters(counters)
+        analysis = super().analyse([c for c in wanted if c != 'jsx_imports'])
+        if 'jsx_imports' in wanted: analysis['jsx_imports'] = len(self.identify_jsx_imports())
         # Potentially add more MDX specific counts here
         return analysis
 
@@ -461,40 +1433,571 @@ class MDXMarkdownAnalyzer(MarkdownAnalyzer):
 # PART 2: CONVERTING A WEBSITE TO A STRUCTURED MARKDOWN DOCUMENT
 # =============================================================================
 
+class CrawlState:
+    """
+    Checkpointed progress of a WebsiteScraper crawl in a sqlite file: the frontier (URLs still to fetch, with their
+    depth), the visited normalized URLs and the fetched pages (zlib-compressed HTML). A scraper given the same state
+    resumes where the last checkpoint left off and yields the stored pages instead of fetching them again.
+    Changes are buffered and written in one transaction every `checkpoint_every` pages, and when the crawl stops.
+    """
+    def __init__(self, path: str, checkpoint_every: int = 100):
+        self.path = path; self.checkpoint_every = max(1, checkpoint_every)
+        self._pages: List[Tuple[str, bytes]] = []; self._visited: List[str] = []
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def load(self, base_url: str, max_depth: int) -> Optional[Tuple[List[Tuple[str, int]], Set[str]]]:
+        """Returns the saved (frontier, visited) of this crawl, or None (and records the crawl) if nothing was saved yet."""
+        db = self._db(); meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+        if not meta:
+            with db: db.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [("base_url", base_url), ("max_depth", str(max_depth))])
+            return None
+        if (meta["base_url"], meta["max_depth"]) != (base_url, str(max_depth)):
+            raise ValueError(f"Crawl state {self.path} belongs to {meta['base_url']} (max_depth={meta['max_depth']}); call clear() to start over.")
+        frontier = [(url, depth) for url, depth in json.loads(zlib.decompress(meta["frontier"]))] if "frontier" in meta else [(base_url, 0)]
+        return frontier, {url for (url,) in db.execute("SELECT url FROM visited")}
+
+    def pages(self) -> Iterator[Tuple[str, str]]:
+        """Stored (url, html) pairs in the order they were fetched."""
+        for url, blob in self._db().execute("SELECT url, html FROM pages ORDER BY seq"): yield url, zlib.decompress(blob).decode('utf-8')
+
+    def record(self, url: str, html: Optional[str], frontier: Callable[[], Iterable[Tuple[str, int]]]) -> None:
+        """Marks `url` visited (storing `html` unless it is None); `frontier` is called when a checkpoint is due."""
+        self._visited.append(url)
+        if html is not None: self._pages.append((url, zlib.compress(html.encode('utf-8'))))
+        if len(self._visited) >= self.checkpoint_every: self.checkpoint(frontier())
+
+    def checkpoint(self, frontier: Iterable[Tuple[str, int]]) -> None:
+        blob = zlib.compress(json.dumps(list(frontier), separators=(',', ':')).encode('utf-8'))
+        with self._db() as db:
+            db.executemany("INSERT OR REPLACE INTO visited (url) VALUES (?)", [(url,) for url in self._visited])
+            db.executemany("INSERT OR IGNORE INTO pages (url, html) VALUES (?, ?)", self._pages)
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('frontier', ?)", (blob,))
+        logger.debug(f"Crawl checkpoint: {len(self._visited)} URLs to {self.path}")
+        self._pages.clear(); self._visited.clear()
+
+    def clear(self) -> None:
+        self._pages.clear(); self._visited.clear()
+        with self._db() as db:
+            for table in ("meta", "visited", "pages"): db.execute(f"DELETE FROM {table}")
+
+    def close(self) -> None:
+        if self._conn is not None: self._conn.close(); self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False); self._conn.execute("PRAGMA journal_mode=WAL"); self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS pages (seq INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, html BLOB NOT NULL)")
+        return self._conn
+
+class CrawlScheduler:
+    """
+    Politeness in front of WebsiteScraper's fetches. Requests to a host wait for a token from its bucket
+    (`requests_per_second` with bursts of `burst`; robots.txt Crawl-delay / Request-rate lower the rate further),
+    URLs that robots.txt disallows are skipped, and 429 / 503 answers are retried after their Retry-After
+    (capped at max_retry_after) or an exponential backoff, during which the whole host waits.
+    robots.txt is fetched once per host and cached.
+    """
+    RETRY_STATUSES = frozenset({429, 503})
+
+    def __init__(self, requests_per_second: Optional[float] = None, burst: int = 1, respect_robots: bool = True, max_retries: int = 3,
+                 backoff: float = 1.0, max_retry_after: float = 60.0, user_agent: Optional[str] = None):
+        self.requests_per_second = requests_per_second; self.burst = max(1, burst); self.respect_robots = respect_robots
+        self.max_retries = max_retries; self.backoff = backoff; self.max_retry_after = max_retry_after
+        self.user_agent = user_agent or WebsiteScraper.HEADERS['User-Agent']
+        self._lock = threading.Lock(); self._buckets: Dict[str, List[float]] = {}  # host -> [tokens, last refill, not before]
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}; self._robots_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def fetch(self, url: str, get: Callable[[], requests.Response], robots_get: Optional[Callable[..., requests.Response]] = None) -> Optional[requests.Response]:
+        """Calls `get` for `url` once allowed; None if robots.txt disallows the URL. `robots_get(url, **kwargs)` fetches robots.txt."""
+        if self.respect_robots and not self.allowed(url, robots_get or requests.get): logger.info(f"Disallowed by robots.txt: {url}"); return None
+        for attempt in range(self.max_retries + 1):
+            self.acquire(url); response = get()
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries: return response
+            delay = self._retry_after(response)
+            if delay is None: delay = self.backoff * 2 ** attempt
+            logger.warning(f"{response.status_code} from {url}; retrying in {delay:.1f}s"); self.defer(url, delay)
+        return response
+
+    def allowed(self, url: str, robots_get: Callable[..., requests.Response] = requests.get) -> bool:
+        robots = self._robots_for(url, robots_get)
+        return robots is None or robots.can_fetch(self.user_agent, url)
+
+    def acquire(self, url: str) -> None:
+        """Blocks until a request to the host of `url` may be sent."""
+        host = urlparse(url).netloc; rate = self._rate(host)
+        while True:
+            with self._lock:
+                now = time.monotonic(); bucket = self._buckets.setdefault(host, [float(self.burst), now, 0.0])
+                if rate: bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now; wait = bucket[2] - now
+                if wait <= 0:
+                    if bucket[0] >= 1 or not rate: bucket[0] = max(bucket[0] - 1, 0.0); return  # spent even without a rate: robots.txt may set one
+                    wait = (1 - bucket[0]) / rate
+            time.sleep(wait)
+
+    def defer(self, url: str, delay: float) -> None:
+        """Holds every request to the host of `url` for `delay` seconds."""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.setdefault(host, [float(self.burst), time.monotonic(), 0.0]); bucket[2] = max(bucket[2], time.monotonic() + delay)
+
+    def _rate(self, host: str) -> Optional[float]:
+        rates = [self.requests_per_second] if self.requests_per_second else []
+        robots = self._robots.get(host)
+        if robots is not None:
+            delay = robots.crawl_delay(self.user_agent); request_rate = robots.request_rate(self.user_agent)
+            if delay: rates.append(1.0 / float(delay))
+            if request_rate and request_rate.requests: rates.append(request_rate.requests / max(request_rate.seconds, 1e-9))
+        return min(rates) if rates else None
+
+    def _robots_for(self, url: str, robots_get: Callable[..., requests.Response]) -> Optional[RobotFileParser]:
+        parsed = urlparse(url); host = parsed.netloc
+        if host in self._robots: return self._robots[host]
+        with self._robots_locks[host]:  # one robots.txt request per host, even with many threads
+            if host in self._robots: return self._robots[host]
+            robots_url = f"{parsed.scheme}://{host}/robots.txt"; robots: Optional[RobotFileParser] = RobotFileParser(robots_url)
+            try:
+                self.acquire(robots_url); response = robots_get(robots_url, timeout=10, headers={'User-Agent': self.user_agent})
+                if response.status_code in (401, 403): robots.disallow_all = True  # type: ignore[union-attr]
+                elif response.status_code >= 400: robots = None
+                else: robots.parse(response.text.splitlines())  # type: ignore[union-attr]
+            except requests.RequestException as exc: logger.warning(f"robots.txt unavailable for {host}: {exc}"); robots = None
+            self._robots[host] = robots
+            return robots
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value: return None
+        try: delay = float(value)
+        except ValueError:
+            try: delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError): return None
+        return min(max(delay, 0.0), self.max_retry_after)
+
+class URLFingerprintSet:
+    """
+    Set of URLs for very large crawls, kept as 64-bit fingerprints in an open-addressing array: 8 bytes per slot
+    (at most half full) instead of a URL string plus its set entry. The URLs themselves cannot be listed again.
+    The fingerprint is Python's string hash, which a str computes once and caches, so checking a link that was
+    seen before is small-integer work. It differs between processes, so fingerprints are not stored anywhere
+    (CrawlState keeps the URLs). Fingerprints can collide (about 3 in 10^8 for a million URLs); a collision makes
+    a new URL look visited.
+    """
+    def __init__(self, urls: Iterable[str] = (), expected_urls: int = 1024):
+        size = 8
+        while size < 2 * expected_urls: size *= 2
+        self._slots = array('Q', bytes(8 * size)); self._mask = size - 1; self._len = 0
+        self.update(urls)
+
+    @staticmethod
+    def fingerprint(url: str) -> int: return (hash(url) & 0xFFFFFFFFFFFFFFFF) or 1  # 0 marks an empty slot
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str): return False
+        fp = (hash(url) & 0xFFFFFFFFFFFFFFFF) or 1; slots = self._slots; mask = self._mask; i = fp & mask  # contains_fingerprint, inlined
+        while True:
+            slot = slots[i]
+            if slot == fp: return True
+            if not slot: return False
+            i = (i + 1) & mask
+
+    def __len__(self) -> int: return self._len
+    def add(self, url: str) -> None: self.add_fingerprint(self.fingerprint(url))
+    def update(self, urls: Iterable[str]) -> None:
+        for url in urls: self.add(url)
+
+    def clear(self) -> None: self._slots = array('Q', bytes(8 * len(self._slots))); self._len = 0
+    def memory_bytes(self) -> int: return self._slots.itemsize * len(self._slots)
+
+    def contains_fingerprint(self, fp: int) -> bool:
+        slots = self._slots; mask = self._mask; i = fp & mask
+        while True:
+            slot = slots[i]
+            if slot == fp: return True
+            if not slot: return False
+            i = (i + 1) & mask
+
+    def add_fingerprint(self, fp: int) -> None:
+        if 2 * (self._len + 1) > len(self._slots): self._grow()
+        slots = self._slots; mask = self._mask; i = fp & mask
+        while slots[i]:
+            if slots[i] == fp: return
+            i = (i + 1) & mask
+        slots[i] = fp; self._len += 1
+
+    def _grow(self) -> None:
+        old = self._slots; self._slots = slots = array('Q', bytes(16 * len(old))); self._mask = mask = len(slots) - 1
+        for fp in old:
+            if fp:
+                i = fp & mask
+                while slots[i]: i = (i + 1) & mask
+                slots[i] = fp
+
+class PageDeduplicator:
+    """
+    Finds crawled pages whose content was seen under another URL (query-string variants, printable versions, ...).
+    A page's words are taken from its HTML without script/style and nav/header/footer/aside chrome. Exact copies are found
+    by a hash of those words, near-copies by a 64-bit SimHash of word shingles within max_distance bits of an earlier
+    page's; the max_distance + 1 band indexes find those candidates without comparing every pair of pages.
+    check() returns the canonical (first seen) URL for a duplicate; `duplicates` maps each duplicate to it.
+    """
+    _SKIPPED_TAGS = ('script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside')
+    _SKIPPED_OPEN = re.compile(rf'(?i)<!--|<({"|".join(_SKIPPED_TAGS)})\b')
+    _SKIPPED_CLOSE = {name: re.compile(rf'(?i)</{name}\s*>') for name in _SKIPPED_TAGS}
+    _TAG = re.compile(r'<[^>]*>'); _WORD = re.compile(r'\w+')
+    _BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+    def __init__(self, max_distance: int = 3, shingle_size: int = 3):
+        if not 0 <= max_distance < 64: raise ValueError(f"max_distance must be between 0 and 63 bits, not {max_distance}")
+        self.max_distance = max_distance; self.shingle_size = max(1, shingle_size)
+        self.duplicates: Dict[str, str] = {}; self._exact: Dict[bytes, str] = {}
+        width = 64 // (max_distance + 1); self._bands = [(i * width, (1 << (64 - i * width if i == max_distance else width)) - 1) for i in range(max_distance + 1)]
+        self._band_index: List[Dict[int, List[Tuple[int, str]]]] = [defaultdict(list) for _ in self._bands]
+
+    def check(self, url: str, html: str) -> Optional[str]:
+        """Returns the canonical URL if `url` duplicates an earlier page, otherwise records the page and returns None."""
+        words = self.words(html)
+        if not words: return None  # nothing to compare (e.g. image-only pages)
+        digest = hashlib.blake2b(" ".join(words).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        canonical = self._exact.get(digest)
+        if canonical is None:
+            fingerprint = self.simhash(words, self.shingle_size); canonical = self._nearest(fingerprint)
+            if canonical is None:
+                self._exact[digest] = url
+                for (shift, mask), index in zip(self._bands, self._band_index): index[(fingerprint >> shift) & mask].append((fingerprint, url))
+                return None
+        if canonical == url: return None  # the same page again (a deduplicator reused for another crawl)
+        self.duplicates[url] = canonical; logger.info(f"Duplicate page {url} of {canonical}")
+        return canonical
+
+    @classmethod
+    def words(cls, html: str) -> List[str]:
+        text = cls._strip_skipped(html); end = text.rfind('>') + 1  # no tag can match after the last '>'
+        return cls._WORD.findall(unescape(cls._TAG.sub(' ', text[:end]) + text[end:]).lower())
+
+    @classmethod
+    def _strip_skipped(cls, html: str) -> str:
+        # Drops comments and skipped elements in one pass. An element (or comment) whose closing tag is missing is kept,
+        # and so are later ones of the same kind, so that unclosed <script> runs do not rescan the rest of the page.
+        parts: List[str] = []; pos = 0; unclosed: Set[str] = set()
+        for match in cls._SKIPPED_OPEN.finditer(html):
+            name = (match.group(1) or '').lower()  # '' for a comment
+            if match.start() < pos or name in unclosed: continue
+            if name: close = cls._SKIPPED_CLOSE[name].search(html, match.end()); end = close.end() if close else -1
+            else: end = html.find('-->', match.end()); end = end + 3 if end >= 0 else -1
+            if end < 0: unclosed.add(name); continue
+            parts.append(html[pos:match.start()]); parts.append(' '); pos = end
+        parts.append(html[pos:]); return "".join(parts)
+
+    @classmethod
+    def simhash(cls, words: List[str], shingle_size: int = 3) -> int:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))}
+        data = b"".join(hashlib.blake2b(shingle.encode('utf-8', 'surrogatepass'), digest_size=8).digest() for shingle in shingles)
+        half = len(shingles) / 2; fingerprint = 0
+        for byte in range(8):  # bit counts per position, one translate + count per bit instead of 64 steps per shingle
+            column = data[byte::8]
+            for bit in range(8):
+                if column.translate(cls._BIT_TABLES[bit]).count(1) > half: fingerprint |= 1 << (8 * byte + bit)
+        return fingerprint
+
+    def _nearest(self, fingerprint: int) -> Optional[str]:
+        # Pigeonhole: within max_distance bits, at least one of the max_distance + 1 bands is identical.
+        for (shift, mask), index in zip(self._bands, self._band_index):
+            for candidate, url in index.get((fingerprint >> shift) & mask, ()):
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance: return url
+        return None
+
+def _ordered_map(executor: Any, function: Callable[[Any], Any], items: Iterable[Any], max_in_flight: int) -> Iterator[Any]:
+    """Like executor.map, but submits items lazily so that at most `max_in_flight` results are pending or unconsumed."""
+    pending: deque[Future] = deque()
+    for item in items:
+        if len(pending) >= max_in_flight: yield pending.popleft().result()
+        pending.append(executor.submit(function, item))
+    while pending: yield pending.popleft().result()
+
+class _StrippedWriter:
+    """Writes a sequence of parts to a file exactly as "".join(parts).strip() would read, without joining them."""
+    def __init__(self, file: IO[str]): self.file = file; self.started = False; self.pending = ""
+
+    def write(self, part: str) -> None:
+        if not self.started:
+            part = part.lstrip()
+            if not part: return
+            self.started = True
+        content = part.rstrip()
+        if content: self.file.write(self.pending + content); self.pending = part[len(content):]
+        else: self.pending += part
+
+class _PageScanner(HTMLParser):
+    """
+    One html.parser pass over a page for what the site scraper and converter read from BeautifulSoup(html, 'html.parser'):
+    the href of every <a> tag, and the .string of the first <title> and <h1>. bs4's tree-building rules are followed for
+    those two elements only, without building a soup, and character references in them are resolved the way bs4 does.
+    Markup inside them that is not modelled (comments, declarations) sets `unsupported`, and `title` is then None so
+    that the caller falls back to bs4.
+    """
+    CAPTURED_TAGS = ('title', 'h1')
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        # Open elements are (name, children); children is None outside the captured elements, where nothing is kept.
+        self.stack: List[Tuple[str, Optional[List[Any]]]] = []; self.open_counts: Dict[str, int] = defaultdict(int)
+        self.links: List[str] = []; self.captured: Dict[str, List[Any]] = {}
+        self.data: List[str] = []; self.closed_void: List[str] = []; self.unsupported = False
+
+    def scan(self, html: str) -> '_PageScanner':
+        self.feed(html); self.close(); self._flush_data(); return self
+
+    @property
+    def title(self) -> Optional[str]:
+        """WebsiteMarkdownDocument._title_from_soup of the page, or None if bs4 is needed to tell."""
+        if self.unsupported: return None
+        for tag in self.CAPTURED_TAGS:
+            string = self._string(self.captured.get(tag))
+            if string: return string.strip()
+        return "Untitled Page"
+
+    @staticmethod
+    def _string(children: Optional[List[Any]]) -> Optional[str]:
+        # Tag.string: the only child if it is a string, or the only child's .string, recursively.
+        while children is not None and len(children) == 1:
+            if isinstance(children[0], str): return children[0]
+            children = children[0]
+        return None
+
+    def _children(self) -> Optional[List[Any]]: return self.stack[-1][1] if self.stack else None
+
+    def _flush_data(self) -> None:
+        if self.data: self._children().append("".join(self.data)); self.data = []  # type: ignore[union-attr]
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None: self._start(tag, attrs, void_closes=True)
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None: self._start(tag, attrs, void_closes=False, closes=True)
+
+    def _start(self, tag: str, attrs: List[Tuple[str, Optional[str]]], void_closes: bool, closes: bool = False) -> None:
+        if tag == 'a':
+            href = None
+            for key, value in attrs:
+                if key == 'href': href = value  # bs4 keeps the last of repeated attributes
+            if href: self.links.append(href)
+        self._flush_data(); parent = self._children(); children: Optional[List[Any]] = None
+        if parent is not None or (tag in self.CAPTURED_TAGS and tag not in self.captured):
+            children = []
+            if parent is not None: parent.append(children)
+            if tag in self.CAPTURED_TAGS: self.captured.setdefault(tag, children)
+        if closes or tag in _InlineHTMLScanner.VOID_TAGS:
+            if void_closes and not closes: self.closed_void.append(tag)
+            return
+        self.stack.append((tag, children)); self.open_counts[tag] += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.closed_void: self.closed_void.remove(tag); return
+        self._flush_data()
+        if not self.open_counts[tag]: return
+        while True:
+            name, _ = self.stack.pop(); self.open_counts[name] -= 1
+            if name == tag: return
+
+    def handle_data(self, data: str) -> None:
+        if self._children() is not None: self.data.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        if self._children() is not None: self.data.append(EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name) or f"&{name}")
+
+    def handle_charref(self, name: str) -> None:
+        if self._children() is None: return
+        dereference = getattr(UnicodeDammit, 'numeric_character_reference', None)
+        try: self.data.append(dereference(int(name[1:], 16) if name[:1] in 'xX' else int(name))[0])  # type: ignore[misc]
+        except (TypeError, ValueError): self.unsupported = True  # references bs4 repairs (e.g. "&#12abc") are left to bs4
+
+    def _unsupported(self, *args: Any) -> None:
+        if self._children() is not None: self.unsupported = True
+    handle_comment = handle_decl = unknown_decl = handle_pi = _unsupported
+
 class WebsiteScraper:
-    def __init__(self, base_url: str, max_depth: int = 2, timeout: int = 10):
-        self.base_url = base_url; self.max_depth = max_depth; self.timeout = timeout
-        self.visited: Set[str] = set(); parsed_base_url = urlparse(base_url)
+    """
+    Breadth-first crawler restricted to the domain of base_url.
+    With max_workers > 1 each depth level is fetched concurrently through a pooled requests.Session,
+    with at most max_per_host requests in flight per host; the page map and depth semantics are unchanged.
+    With a CrawlState, progress is checkpointed to disk and an interrupted crawl resumes without refetching pages.
+    With an HTTPCache, pages fetched before are revalidated with conditional requests instead of downloaded again.
+    With a CrawlScheduler, requests are rate-limited per host, follow robots.txt and back off on 429 / 503.
+    With a URLFingerprintSet as `visited`, visited URLs are kept as 64-bit fingerprints instead of strings.
+    With max_bytes, pages are downloaded streamed: status and headers are checked first, only HTML bodies are read,
+    and a body over max_bytes (by Content-Length, or while reading) fails the page. With head_probe, a HEAD request
+    comes first, so non-HTML and oversized URLs are skipped without a GET.
+    """
+    HEADERS: Dict[str, str] = {'User-Agent': 'MarkdownAnalyzerLibScraper/1.0'}
+    NORMALIZE_MEMO_SIZE = 1 << 16  # links seen again (navigation, footers) are normalized once
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, base_url: str, max_depth: int = 2, timeout: int = 10, max_workers: int = 1, max_per_host: Optional[int] = None,
+                 crawl_state: Optional[CrawlState] = None, http_cache: Optional[HTTPCache] = None, scheduler: Optional[CrawlScheduler] = None,
+                 visited: Optional[URLFingerprintSet] = None, max_bytes: Optional[int] = None, head_probe: bool = False):
+        self.base_url = base_url; self.max_depth = max_depth; self.timeout = timeout; self.crawl_state = crawl_state; self.http_cache = http_cache
+        self.scheduler = scheduler; self.max_bytes = max_bytes; self.head_probe = head_probe
+        self.max_workers = max(1, max_workers); self.max_per_host = max(1, max_per_host or self.max_workers)
+        self.visited: Union[Set[str], URLFingerprintSet] = visited if visited is not None else set(); parsed_base_url = urlparse(base_url)
+        self._normalized_urls: Dict[str, str] = {}
         if not parsed_base_url.scheme or not parsed_base_url.netloc: raise ValueError("Invalid base_url.")
         self.domain: str = parsed_base_url.netloc
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}; self._host_slots_lock = threading.Lock()
+
+    def scrape(self) -> Dict[str, str]: return dict(self.iter_pages())
 
-    def scrape(self) -> Dict[str, str]:
-        pages: Dict[str, str] = {}; queue: deque[Tuple[str, int]] = deque([(self.base_url, 0)]); self.visited.clear()
-        while queue:
-            current_url, depth = queue.popleft()
-            if current_url in self.visited or depth > self.max_depth: continue
-            normalized_url = self._normalize_url(current_url)
-            if normalized_url in self.visited: continue
-            logger.info("Scraping %s (depth %d)", normalized_url, depth)
-            try: response = requests.get(normalized_url, timeout=self.timeout, headers={'User-Agent': 'MarkdownAnalyzerLibScraper/1.0'}); response.raise_for_status()
-            except requests.RequestException as exc: logger.error(f"Download error {normalized_url}: {exc}"); continue
-            if 'text/html' not in response.headers.get('Content-Type', '').lower(): logger.warning(f"Skipping non-HTML {normalized_url}"); self.visited.add(normalized_url); continue
-            html_content = response.text; pages[normalized_url] = html_content; self.visited.add(normalized_url)
-            soup = BeautifulSoup(html_content, "html.parser")
-            for link_tag in soup.find_all("a", href=True):
-                if not isinstance(link_tag, PageElement) or not hasattr(link_tag, 'get'): continue
-                href_val = link_tag.get("href"); href_str: str = ""
-                if href_val: href_str = href_val[0] if isinstance(href_val, list) and href_val else (str(href_val) if not isinstance(href_val, list) else "")
-                if href_str:
-                    try:
-                        next_url_abs = urljoin(normalized_url, href_str.strip())
-                        if self._is_valid_url(next_url_abs) and self._normalize_url(next_url_abs) not in self.visited: queue.append((next_url_abs, depth + 1))
-                    except Exception as e: logger.warning(f"Link process error '{href_str}' on {normalized_url}: {e}")
-        return pages
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (normalized url, html) for each page as soon as it is fetched, in crawl order; only URLs are kept.
+        With a crawl_state, a saved crawl is resumed: its stored pages come first, then the crawl continues from the frontier.
+        """
+        frontier: List[Tuple[str, int]] = [(self.base_url, 0)]; self.visited.clear()
+        resumed = self.crawl_state.load(self.base_url, self.max_depth) if self.crawl_state is not None else None
+        if resumed is not None:
+            frontier, visited = resumed; self.visited.update(visited); logger.info(f"Resuming crawl of {self.base_url}: {len(self.visited)} visited, {len(frontier)} queued")
+            yield from self.crawl_state.pages()
+        yield from self._iter_pages_concurrent(frontier) if self.max_workers > 1 else self._iter_pages_serial(frontier)
+
+    def _iter_pages_serial(self, frontier: List[Tuple[str, int]]) -> Iterator[Tuple[str, str]]:
+        queue: deque[Tuple[str, int]] = deque(frontier); current: List[Tuple[str, int]] = []  # popped but not yet recorded
+        try:
+            while queue:
+                current_url, depth = queue.popleft()
+                if current_url in self.visited or depth > self.max_depth: continue
+                normalized_url = self._normalize_url(current_url)
+                if normalized_url in self.visited: continue
+                logger.info(f"Scraping: {normalized_url} (Depth: {depth})")
+                current = [(current_url, depth)]; response = self._fetch(normalized_url); current = []
+                if response is None: continue
+                if not self._is_html(response): logger.warning(f"Skipping non-HTML {normalized_url}"); self._record(normalized_url, None, lambda: queue); continue
+                html_content = response.text
+                self.visited.add(normalized_url)
+                for next_url_abs in self._extract_links(normalized_url, html_content):
+                    if self._normalize_url(next_url_abs) not in self.visited: queue.append((next_url_abs, depth + 1))
+                self._record(normalized_url, html_content, lambda: queue)
+                yield normalized_url, html_content
+        finally:
+            if self.crawl_state is not None: self.crawl_state.checkpoint(current + list(queue))
+
+    def _iter_pages_concurrent(self, frontier: List[Tuple[str, int]]) -> Iterator[Tuple[str, str]]:
+        # Level-synchronous BFS: a level is fetched in parallel, then its pages are recorded in discovery order,
+        # which gives the same pages (and depths) as the sequential queue. At most 2 * max_workers fetched pages
+        # wait to be consumed at any time.
+        depth = frontier[0][1] if frontier else 0; level: List[str] = [url for url, d in frontier if d == depth]
+        next_level: List[str] = [url for url, d in frontier if d == depth + 1]  # carried over from a resumed level
+        batch: List[str] = level; done = 0  # batch[done:] is still to be recorded; a recorded URL left in it is skipped as visited
+        remaining = lambda: [(url, depth) for url in batch[done:]] + [(url, depth + 1) for url in next_level]
+        try:
+            with self._make_session() as session, ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scraper") as executor:
+                while level and depth <= self.max_depth:
+                    new_batch: List[str] = []; queued: Set[str] = set()
+                    for url in level:
+                        normalized_url = self._normalize_url(url)
+                        if url in self.visited or normalized_url in self.visited or normalized_url in queued: continue
+                        queued.add(normalized_url); new_batch.append(normalized_url)
+                    batch = new_batch
+                    logger.info("Scraping %d pages at depth %d with %d workers", len(batch), depth, self.max_workers)
+                    follow_links = depth < self.max_depth
+                    fetched = _ordered_map(executor, lambda u: self._fetch_page(u, session, follow_links), batch, 2 * self.max_workers)
+                    for done, (normalized_url, (response, links)) in enumerate(zip(batch, fetched)):
+                        if response is None: continue
+                        if not self._is_html(response): logger.warning(f"Skipping non-HTML {normalized_url}"); self._record(normalized_url, None, remaining); continue
+                        self.visited.add(normalized_url); next_level.extend(links); self._record(normalized_url, response.text, remaining)
+                        yield normalized_url, response.text
+                    level = [url for url in next_level if self._normalize_url(url) not in self.visited]
+                    batch, done, next_level, depth = level, 0, [], depth + 1
+        finally:
+            if self.crawl_state is not None: self.crawl_state.checkpoint(remaining())
+
+    def _record(self, normalized_url: str, html: Optional[str], frontier: Callable[[], Iterable[Tuple[str, int]]]) -> None:
+        self.visited.add(normalized_url)
+        if self.crawl_state is not None: self.crawl_state.record(normalized_url, html, frontier)
+
+    def _make_session(self) -> requests.Session:
+        session = requests.Session(); session.headers.update(self.HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        session.mount("http://", adapter); session.mount("https://", adapter)
+        return session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots: self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _fetch_page(self, url: str, session: requests.Session, follow_links: bool) -> Tuple[Optional[requests.Response], List[str]]:
+        # Runs in a worker thread; link extraction happens here so that parsing overlaps other downloads.
+        with self._host_slot(url): response = self._fetch(url, session)
+        if response is None or not follow_links or not self._is_html(response): return response, []
+        return response, self._extract_links(url, response.text)
+
+    def _fetch(self, url: str, session: Optional[requests.Session] = None) -> Optional[requests.Response]:
+        getter = session.get if session is not None else requests.get
+        page_getter = partial(self._get_streamed, getter) if self.max_bytes is not None else getter
+        def get() -> requests.Response:
+            if self.head_probe:
+                probe = self._probe(url, session.head if session is not None else requests.head)
+                if probe is not None: return probe
+                if self.scheduler is not None: self.scheduler.acquire(url)  # the HEAD used the token fetch() acquired
+            if self.http_cache is not None: return self.http_cache.get(url, page_getter, timeout=self.timeout, headers=self.HEADERS)
+            return page_getter(url, timeout=self.timeout, headers=self.HEADERS)
+        try:
+            response = self.scheduler.fetch(url, get, getter) if self.scheduler is not None else get()
+            if response is None: return None
+            response.raise_for_status(); return response
+        except requests.RequestException as exc: logger.error(f"Download error {url}: {exc}"); return None
+
+    def _get_streamed(self, getter: Callable[..., requests.Response], url: str, **kwargs: Any) -> requests.Response:
+        # GET that reads the body only for a successful HTML response, in chunks, up to max_bytes. Errors, 304s and
+        # other content types get an empty body and their connection closed before the body is downloaded.
+        response = getter(url, stream=True, **kwargs)
+        if not response.ok or response.status_code == 304 or not self._is_html(response):
+            response._content = b""; response.close()
+            for validator in ('ETag', 'Last-Modified'): response.headers.pop(validator, None)  # an HTTPCache must not store the empty body
+            return response
+        self._check_size(url, response); chunks: List[bytes] = []; size = 0
+        for chunk in response.iter_content(self.CHUNK_SIZE):
+            size += len(chunk)
+            if self.max_bytes is not None and size > self.max_bytes: response.close(); raise requests.RequestException(f"body larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+        response._content = b"".join(chunks)
+        return response
+
+    def _probe(self, url: str, head: Callable[..., requests.Response]) -> Optional[requests.Response]:
+        # The HEAD response when it shows the page is not worth a GET (not HTML); None to go on with the GET.
+        try: response = head(url, timeout=self.timeout, headers=self.HEADERS, allow_redirects=True)
+        except requests.RequestException as exc: logger.debug(f"HEAD failed for {url}: {exc}"); return None
+        if response.status_code >= 400 or not response.headers.get('Content-Type'): return None  # HEAD not supported: let the GET decide
+        self._check_size(url, response)
+        return None if self._is_html(response) else response
+
+    def _check_size(self, url: str, response: requests.Response) -> None:
+        length = response.headers.get('Content-Length', '')
+        if self.max_bytes is not None and length.isdigit() and int(length) > self.max_bytes:
+            response.close(); raise requests.RequestException(f"Content-Length {length} over max_bytes {self.max_bytes}")
+
+    @staticmethod
+    def _is_html(response: requests.Response) -> bool: return 'text/html' in response.headers.get('Content-Type', '').lower()
+
+    def _extract_links(self, page_url: str, html_content: str) -> List[str]:
+        links: List[str] = []
+        try: hrefs = _PageScanner().scan(html_content).links
+        except AssertionError: hrefs = [str(tag.get("href")) for tag in BeautifulSoup(html_content, "html.parser").find_all("a", href=True)]  # bs4 reports what html.parser rejects
+        for href_str in hrefs:
+            try:
+                next_url_abs = urljoin(page_url, href_str.strip())
+                if self._is_valid_url(next_url_abs): links.append(next_url_abs)
+            except Exception as e: logger.warning(f"Link process error '{href_str}' on {page_url}: {e}")
+        return links
 
     def _normalize_url(self, url: str) -> str:
-        parsed = urlparse(url); path = parsed.path or '/'; query = '&'.join(sorted(parsed.query.split('&'))) if parsed.query else ''
-        return urlunparse((str(parsed.scheme).lower(), str(parsed.netloc).lower(), str(path), str(parsed.params), str(query), '')).rstrip('/')
+        normalized = self._normalized_urls.get(url)
+        if normalized is None:
+            parsed = urlparse(url); path = parsed.path or '/'; query = '&'.join(sorted(parsed.query.split('&'))) if parsed.query else ''
+            normalized = urlunparse((str(parsed.scheme).lower(), str(parsed.netloc).lower(), str(path), str(parsed.params), str(query), '')).rstrip('/')
+            if len(self._normalized_urls) >= self.NORMALIZE_MEMO_SIZE: self._normalized_urls.clear()
+            self._normalized_urls[url] = normalized
+        return normalized
 
     def _is_valid_url(self, url: str) -> bool:
         try: parsed = urlparse(url)
@@ -509,38 +2012,136 @@ class MarkdownConverter:
             return md(html, heading_style=self.heading_style, **self.options)
         except Exception as e: logger.error(f"HTML conversion error: {e}"); return f"<!-- Conversion Error: {e} -->\n{html[:500]}..."
 
+    _base_convert = convert  # convert_page only bypasses convert() when it has not been overridden
+
+    def convert_page(self, html: str) -> Tuple[str, str]:
+        """Returns (markdown, title) of an HTML page, parsing it once for both (same results as convert and _extract_title_from_html)."""
+        if not _MARKDOWNIFY_SOUP_API or getattr(self.convert, '__func__', None) is not MarkdownConverter._base_convert:
+            return self.convert(html), WebsiteMarkdownDocument._extract_title_from_html(html)
+        if 'strip' in self.options and isinstance(self.options['strip'], str): self.options['strip'] = [self.options['strip']]
+        try: converter = _MarkdownifyConverter(heading_style=self.heading_style, **self.options); bs4_options = converter.options['bs4_options']; soup = BeautifulSoup(html, **bs4_options)
+        except Exception as e: logger.error(f"HTML conversion error: {e}"); return f"<!-- Conversion Error: {e} -->\n{html[:500]}...", WebsiteMarkdownDocument._extract_title_from_html(html)
+        # Titles have always been read with html.parser; other parsers may build a different tree.
+        title = WebsiteMarkdownDocument._title_from_soup(soup) if bs4_options == {'features': 'html.parser'} else WebsiteMarkdownDocument._extract_title_from_html(html)
+        try: markdown = converter.convert_soup(soup)
+        except Exception as e: logger.error(f"HTML conversion error: {e}"); markdown = f"<!-- Conversion Error: {e} -->\n{html[:500]}..."
+        return markdown, title
+
+def _convert_page(converter: MarkdownConverter, html: str) -> Tuple[str, str]:
+    # Module level so that ProcessPoolExecutor can pickle it; one page of WebsiteMarkdownDocument.generate.
+    return converter.convert_page(html)
+
 class WebsiteMarkdownDocument:
-    def __init__(self, base_url: str, max_depth: int = 2, scraper_timeout: int = 10, converter_options: Optional[Dict[str, Any]] = None):
+    def __init__(self, base_url: str, max_depth: int = 2, scraper_timeout: int = 10, converter_options: Optional[Dict[str, Any]] = None, scraper_workers: int = 1, max_per_host: Optional[int] = None,
+                 converter_workers: int = 1, crawl_state: Optional[CrawlState] = None, http_cache: Optional[HTTPCache] = None, scheduler: Optional[CrawlScheduler] = None,
+                 visited: Optional[URLFingerprintSet] = None, deduplicator: Optional[PageDeduplicator] = None, max_bytes: Optional[int] = None, head_probe: bool = False):
         self.base_url = base_url; self.max_depth = max_depth
-        self.scraper = WebsiteScraper(base_url, max_depth, scraper_timeout)
+        self.scraper = WebsiteScraper(base_url, max_depth, scraper_timeout, max_workers=scraper_workers, max_per_host=max_per_host, crawl_state=crawl_state,
+                                      http_cache=http_cache, scheduler=scheduler, visited=visited, max_bytes=max_bytes, head_probe=head_probe)
         self.converter = MarkdownConverter(**(converter_options or {}))
+        self.converter_workers = converter_workers  # processes converting pages in generate(); 1 converts in this process
+        self.deduplicator = deduplicator  # duplicate pages are not converted; the output notes their canonical URL instead
         self.pages: Dict[str, str] = {}
+        self.titles: Dict[str, str] = {}
 
     def generate(self, include_index_param: bool = True, page_separator_param: str = "\n\n---\n\n") -> str: 
         html_pages_data = self.scraper.scrape() 
         if not html_pages_data: logger.warning(f"No pages from {self.base_url}."); return ""
-        logger.info("Converting %d pages to Markdown", len(html_pages_data))
-        sorted_urls = sorted(html_pages_data.keys())
-        for url_key in sorted_urls: self.pages[url_key] = self.converter.convert(html_pages_data[url_key])
+        duplicates = {url: self._canonical(url) for url, html in self._deduplicated(html_pages_data.items()) if html is None}
+        logger.info("Converting %d pages to Markdown", len(html_pages_data) - len(duplicates))
+        sorted_urls = sorted(url for url in html_pages_data if url not in duplicates)
+        for url_key, (markdown, title) in zip(sorted_urls, self._convert_pages([html_pages_data[url_key] for url_key in sorted_urls])):
+            self.pages[url_key] = markdown; self.titles[url_key] = title or self._extract_title_from_markdown(markdown)
         document_lines: List[str] = []
         if include_index_param: 
             document_lines.append("# Site Index\n")
             for url_key_idx in sorted_urls:
-                title = self._extract_title_from_html(html_pages_data[url_key_idx]) or self._extract_title_from_markdown(self.pages[url_key_idx])
+                title = self.titles[url_key_idx]
                 anchor = self._url_to_anchor_slug(url_key_idx, title)
                 document_lines.append(f"- [{title}]({anchor})  <!-- Original URL: {url_key_idx} -->")
             document_lines.append(page_separator_param) 
-        for url_key_content in sorted_urls:
+        for url_key_content in sorted(html_pages_data) if duplicates else sorted_urls:
+            if url_key_content in duplicates: document_lines.append(self._duplicate_note(url_key_content, duplicates[url_key_content])); continue
             markdown = self.pages[url_key_content]
-            title_content = self._extract_title_from_html(html_pages_data[url_key_content]) or self._extract_title_from_markdown(markdown)
+            title_content = self.titles[url_key_content]
             anchor_slug = self._url_to_anchor_slug(url_key_content, title_content, for_header=True)
             document_lines.extend([f"\n## <a id='{anchor_slug}'></a>{title_content}\n", f"<!-- Source URL: {url_key_content} -->\n", markdown.strip(), page_separator_param]) 
         return "".join(document_lines).strip()
 
+    def write(self, output_file: str, include_index: bool = True, page_separator: str = "\n\n---\n\n", index_file: Optional[str] = None) -> int:
+        """
+        Streaming counterpart of generate(): each page is converted as soon as it is fetched and appended to
+        `output_file`, so memory is bounded by the pages in flight (plus one index line per page). Pages are written in crawl order (generate()
+        sorts them by URL). The index is written once the crawl is done: to `index_file` if given, otherwise in
+        front of the pages (which are spooled to a temporary file next to output_file meanwhile).
+        Returns the number of pages written.
+        """
+        index_lines: List[str] = []; count = 0
+        body_path = output_file if not include_index or index_file else f"{output_file}.pages.tmp"
+        try:
+            with open(body_path, "w", encoding="utf-8") as body:
+                writer: Any = _StrippedWriter(body) if body_path == output_file else body
+                for url, converted in self._iter_converted(self._deduplicated(self.scraper.iter_pages())):
+                    if converted is None: writer.write(self._duplicate_note(url, self._canonical(url))); continue
+                    markdown, title = converted; title = title or self._extract_title_from_markdown(markdown); count += 1
+                    if include_index: index_lines.append(f"- [{title}]({self._url_to_anchor_slug(url, title)})  <!-- Original URL: {url} -->")
+                    anchor_slug = self._url_to_anchor_slug(url, title, for_header=True)
+                    for part in (f"\n## <a id='{anchor_slug}'></a>{title}\n", f"<!-- Source URL: {url} -->\n", markdown.strip(), page_separator): writer.write(part)
+            if not count: logger.warning(f"No pages from {self.base_url}.")
+            if include_index:
+                index_parts = ["# Site Index\n"] + index_lines + [page_separator]
+                with open(index_file or output_file, "w", encoding="utf-8") as out:
+                    writer = _StrippedWriter(out)
+                    for part in index_parts if count else []: writer.write(part)
+                    if not index_file:
+                        with open(body_path, "r", encoding="utf-8") as body:
+                            for block in iter(lambda: body.read(1 << 20), ""): writer.write(block)
+        finally:
+            if body_path != output_file and os.path.exists(body_path): os.remove(body_path)
+        logger.info(f"Wrote {count} pages to {output_file}")
+        return count
+
+    def _iter_converted(self, pages: Iterable[Tuple[str, Optional[str]]]) -> Iterator[Tuple[str, Optional[Tuple[str, str]]]]:
+        # (url, (markdown, title)) in the order of `pages`, converting on a process pool when converter_workers > 1;
+        # a page without html (a duplicate) passes through as (url, None).
+        if self.converter_workers <= 1:
+            for url, html in pages: yield url, self.converter.convert_page(html) if html is not None else None
+            return
+        convert = partial(_convert_page, self.converter)
+        with ProcessPoolExecutor(max_workers=self.converter_workers) as executor:
+            pending: deque[Tuple[str, Optional[Future]]] = deque()
+            for url, html in pages:
+                if len(pending) >= 2 * self.converter_workers: done_url, future = pending.popleft(); yield done_url, future.result() if future is not None else None
+                pending.append((url, executor.submit(convert, html) if html is not None else None))
+            while pending: done_url, future = pending.popleft(); yield done_url, future.result() if future is not None else None
+
+    def _deduplicated(self, pages: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, Optional[str]]]:
+        # The pages with the html of each duplicate replaced by None; pages are checked in crawl order, so the first copy is canonical.
+        if self.deduplicator is None: yield from pages; return
+        for url, html in pages: yield url, html if self.deduplicator.check(url, html) is None else None
+
+    def _canonical(self, url: str) -> str: return self.deduplicator.duplicates[url] if self.deduplicator is not None else url
+
+    @staticmethod
+    def _duplicate_note(url: str, canonical: str) -> str: return f"<!-- Duplicate URL: {url} (same content as {canonical}) -->\n"
+
+    def _convert_pages(self, html_pages: List[str]) -> List[Tuple[str, str]]:
+        # (markdown, title) per page, in the order given; pages are spread over a process pool when converter_workers > 1.
+        if self.converter_workers <= 1 or len(html_pages) < 2: return [self.converter.convert_page(html) for html in html_pages]
+        convert = partial(_convert_page, self.converter)
+        with ProcessPoolExecutor(max_workers=self.converter_workers) as executor:
+            return list(executor.map(convert, html_pages, chunksize=max(1, len(html_pages) // (4 * self.converter_workers))))
+
     @staticmethod
     def _extract_title_from_html(html_text: str) -> str:
         if not html_text: return "Untitled Page"
-        soup = BeautifulSoup(html_text, "html.parser"); title_tag = soup.title
+        try: title = _PageScanner().scan(html_text).title
+        except AssertionError: title = None
+        return title if title is not None else WebsiteMarkdownDocument._title_from_soup(BeautifulSoup(html_text, "html.parser"))
+
+    @staticmethod
+    def _title_from_soup(soup: BeautifulSoup) -> str:
+        title_tag = soup.title
         if title_tag and hasattr(title_tag, 'string') and title_tag.string: return title_tag.string.strip()
         h1_tag = soup.find("h1")
         if h1_tag and hasattr(h1_tag, 'string') and h1_tag.string: return h1_tag.string.strip()
@@ -558,8 +2159,12 @@ class WebsiteMarkdownDocument:
         return slug or "section"
 
 class MarkdownSiteConverter:
-    def __init__(self, base_url: str, max_depth: int = 2, scraper_timeout: int = 10, converter_options: Optional[Dict[str, Any]] =None):
-        self.document_generator = WebsiteMarkdownDocument(base_url, max_depth, scraper_timeout, converter_options)
+    def __init__(self, base_url: str, max_depth: int = 2, scraper_timeout: int = 10, converter_options: Optional[Dict[str, Any]] =None, scraper_workers: int = 1, max_per_host: Optional[int] = None,
+                 converter_workers: int = 1, crawl_state: Optional[CrawlState] = None, http_cache: Optional[HTTPCache] = None, scheduler: Optional[CrawlScheduler] = None,
+                 visited: Optional[URLFingerprintSet] = None, deduplicator: Optional[PageDeduplicator] = None, max_bytes: Optional[int] = None, head_probe: bool = False):
+        self.document_generator = WebsiteMarkdownDocument(base_url, max_depth, scraper_timeout, converter_options, scraper_workers=scraper_workers, max_per_host=max_per_host,
+                                                          converter_workers=converter_workers, crawl_state=crawl_state, http_cache=http_cache, scheduler=scheduler,
+                                                          visited=visited, deduplicator=deduplicator, max_bytes=max_bytes, head_probe=head_probe)
     def convert_site_to_markdown(self, output_file: Optional[str] = None, include_index: bool =True, page_separator: str ="\n\n---\n\n") -> str:
         markdown_doc = self.document_generator.generate(include_index_param=include_index, page_separator_param=page_separator) 
         if output_file:
@@ -568,6 +2173,187 @@ class MarkdownSiteConverter:
                 logger.info(f"Site Markdown to {output_file}")
             except IOError as exc: logger.error(f"File write error {output_file}: {exc}")
         return markdown_doc
+    def stream_site_to_markdown(self, output_file: str, include_index: bool = True, page_separator: str = "\n\n---\n\n", index_file: Optional[str] = None) -> int:
+        """Like convert_site_to_markdown, but writes pages to output_file as they are crawled; see WebsiteMarkdownDocument.write."""
+        return self.document_generator.write(output_file, include_index=include_index, page_separator=page_separator, index_file=index_file)
+
+def _pipeline_map(function: Callable[[Any], Any], items: Iterable[Any], workers: int) -> Iterator[Any]:
+    # One CrawlPipeline stage: results in input order, from a process pool with at most 2 * workers pages in flight,
+    # or computed in the stage's own thread when workers <= 1.
+    if workers <= 1: yield from map(function, items); return
+    with ProcessPoolExecutor(max_workers=workers) as executor: yield from _ordered_map(executor, function, items, 2 * workers)
+
+class CrawlPipeline:
+    """
+    Crawls, converts and analyses a site as a pipeline instead of three phases one after the other. The scraper's
+    threads fetch pages, converter_workers processes turn them into Markdown, and analysis_workers processes run
+    `methods` ('analyse' and/or identify_* names, as in MarkdownAnalyzer.analyse_files) on each page. Bounded
+    queues of queue_size pages sit between the stages, so a stage that gets ahead waits for the next one.
+    run() yields {"url", "title", "markdown", "result", "error", "duplicate_of"} per page in crawl order while the crawl
+    goes on. With a PageDeduplicator, a duplicate page skips conversion and analysis; only its duplicate_of (the
+    canonical URL) is set.
+    """
+    _END = (None, None)
+
+    def __init__(self, base_url: str, max_depth: int = 2, scraper_timeout: int = 10, converter_options: Optional[Dict[str, Any]] = None, scraper_workers: int = 1,
+                 max_per_host: Optional[int] = None, converter_workers: int = 1, analysis_workers: int = 1, methods: Union[str, Iterable[str]] = 'analyse',
+                 queue_size: int = 16, analyzer_class: Any = MarkdownAnalyzer, crawl_state: Optional[CrawlState] = None, http_cache: Optional[HTTPCache] = None,
+                 scheduler: Optional[CrawlScheduler] = None, visited: Optional[URLFingerprintSet] = None, deduplicator: Optional[PageDeduplicator] = None,
+                 max_bytes: Optional[int] = None, head_probe: bool = False):
+        self.scraper = WebsiteScraper(base_url, max_depth, scraper_timeout, max_workers=scraper_workers, max_per_host=max_per_host, crawl_state=crawl_state,
+                                      http_cache=http_cache, scheduler=scheduler, visited=visited, max_bytes=max_bytes, head_probe=head_probe)
+        self.converter = MarkdownConverter(**(converter_options or {})); self.deduplicator = deduplicator
+        self.converter_workers = converter_workers; self.analysis_workers = analysis_workers; self.queue_size = max(1, queue_size)
+        self.analyzer_class = analyzer_class; self.single, self.methods = analyzer_class._batch_methods(methods)
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        fetched: Queue = Queue(self.queue_size); converted: Queue = Queue(self.queue_size); stop = threading.Event()
+        stages = [threading.Thread(target=self._fetch_stage, args=(fetched, stop), name="pipeline-fetch", daemon=True),
+                  threading.Thread(target=self._convert_stage, args=(fetched, converted, stop), name="pipeline-convert", daemon=True)]
+        for stage in stages: stage.start()
+        try:
+            pages: deque[Tuple[str, Optional[str], Optional[str], Optional[str]]] = deque()
+            def markdown_pages() -> Iterator[str]:
+                for url, (markdown, title, duplicate_of) in self._drain(converted, stop):
+                    pages.append((url, markdown, title, duplicate_of))
+                    if duplicate_of is None: yield markdown
+            analyse = partial(_analyse_markdown, self.analyzer_class, self.methods, self.single)
+            for (url, markdown, title, duplicate_of), analysed in self._in_order(_pipeline_map(analyse, markdown_pages(), self.analysis_workers), pages):
+                result, error = analysed or (None, None)
+                yield {"url": url, "title": title, "markdown": markdown, "result": result, "error": error, "duplicate_of": duplicate_of}
+        finally:
+            stop.set()
+            for stage in stages: stage.join()
+
+    def _fetch_stage(self, fetched: Queue, stop: threading.Event) -> None:
+        try:
+            for url, html in self.scraper.iter_pages():
+                duplicate_of = self.deduplicator.check(url, html) if self.deduplicator is not None else None
+                if not self._put(fetched, (url, (html if duplicate_of is None else None, duplicate_of)), stop): return
+            self._put(fetched, self._END, stop)
+        except BaseException as e: self._put(fetched, (None, e), stop)
+
+    def _convert_stage(self, fetched: Queue, converted: Queue, stop: threading.Event) -> None:
+        try:
+            urls: deque[Tuple[str, Optional[str]]] = deque()
+            def html_pages() -> Iterator[str]:
+                for url, (html, duplicate_of) in self._drain(fetched, stop):
+                    urls.append((url, duplicate_of))
+                    if duplicate_of is None: yield html
+            convert = partial(_convert_page, self.converter)
+            for (url, duplicate_of), page in self._in_order(_pipeline_map(convert, html_pages(), self.converter_workers), urls):
+                markdown, title = page or (None, None)
+                if markdown is not None: title = title or WebsiteMarkdownDocument._extract_title_from_markdown(markdown)
+                if not self._put(converted, (url, (markdown, title, duplicate_of)), stop): return
+            self._put(converted, self._END, stop)
+        except BaseException as e: self._put(converted, (None, e), stop)
+
+    @staticmethod
+    def _in_order(results: Iterator[Any], entries: deque) -> Iterator[Tuple[Any, Any]]:
+        # A stage's results only cover the pages that are not duplicates (last field of each entry is None); this puts
+        # the duplicates back in between, as (entry, None), so that pages leave the stage in crawl order.
+        for result in results:
+            while entries[0][-1] is not None: yield entries.popleft(), None
+            yield entries.popleft(), result
+        while entries: yield entries.popleft(), None
+
+    @staticmethod
+    def _put(target: Queue, item: Tuple[Any, Any], stop: threading.Event) -> bool:
+        # Blocks while the next stage is behind (backpressure); gives up once the pipeline is stopped.
+        while not stop.is_set():
+            try: target.put(item, timeout=0.1); return True
+            except Full: continue
+        return False
+
+    @staticmethod
+    def _drain(source: Queue, stop: threading.Event) -> Iterator[Any]:
+        # Items of the previous stage until its end marker; an exception it forwarded is raised here.
+        while True:
+            try: key, value = source.get(timeout=0.1)
+            except Empty:
+                if stop.is_set(): return
+                continue
+            if key is None:
+                if value is not None: raise value
+                return
+            yield key, value
+
+class MarkdownChunker:
+    """
+    Splits a parsed document into chunks of at most `max_size` (measured with `length_function`, e.g. a tokenizer's
+    token count; characters by default) along block boundaries, for retrieval/embedding pipelines.
+    Code blocks, tables and HTML blocks are never split (one larger than the budget becomes a chunk of its own);
+    other blocks larger than the budget are split at line, then word boundaries. With `split_sections`, every heading
+    starts a new chunk. Each chunk carries the heading path it belongs to.
+    """
+    ATOMIC_TYPES = frozenset({'code', 'table', 'html_block'})
+    SKIPPED_TYPES = frozenset({'frontmatter'})
+
+    def __init__(self, max_size: int = 1000, length_function: Optional[Callable[[str], int]] = None, split_sections: bool = True, separator: str = "\n\n"):
+        if max_size <= 0: raise ValueError("max_size must be positive.")
+        self.max_size = max_size
+        self.length_function: Callable[[str], int] = length_function or len
+        self.split_sections = split_sections
+        self.separator = separator
+
+    def iter_chunks(self, analyzer: 'MarkdownAnalyzer') -> Iterator[Dict[str, Any]]:
+        """
+        Yields {"text", "headings", "start_line", "end_line", "size"} in document order, in one pass over the tokens.
+        Block texts are slices of the source text (from a token's first line to the next token's), not re-rendered.
+        Sizes of the blocks in a chunk are added up, with the separator counted between them.
+        """
+        text = analyzer.text; tokens = analyzer.tokens; measure = self.length_function
+        separator_size = measure(self.separator) if self.separator else 0
+        headings: List[Tuple[int, str]] = []
+        parts: List[str] = []; size = 0; chunk_headings: List[str] = []; start_line = end_line = 0
+        starts = analyzer.iter_line_offsets([token.line or 1 for token in tokens] + [sys.maxsize])
+        offset = next(starts)
+        for index, token in enumerate(tokens):
+            next_offset = next(starts); block = text[offset:next_offset].rstrip(); offset = next_offset
+            if token.type in self.SKIPPED_TYPES or not block: continue
+            line = token.line or 1; last_line = line + block.count('\n')
+            if token.type == 'header':
+                level = token.level or 1
+                while headings and headings[-1][0] >= level: headings.pop()
+                headings.append((level, token.content))
+                if self.split_sections and parts:
+                    yield self._chunk(parts, chunk_headings, start_line, end_line, size); parts = []; size = 0
+            block_size = measure(block)
+            pieces = [(block, block_size, line, last_line)] if block_size <= self.max_size or token.type in self.ATOMIC_TYPES else self._split_block(block, line)
+            for piece, piece_size, piece_line, piece_last_line in pieces:
+                if parts and size + separator_size + piece_size > self.max_size:
+                    yield self._chunk(parts, chunk_headings, start_line, end_line, size); parts = []; size = 0
+                if not parts: chunk_headings = [heading for _, heading in headings]; start_line = piece_line; size = piece_size
+                else: size += separator_size + piece_size
+                parts.append(piece); end_line = piece_last_line
+        if parts: yield self._chunk(parts, chunk_headings, start_line, end_line, size)
+
+    def _chunk(self, parts: List[str], headings: List[str], start_line: int, end_line: int, size: int) -> Dict[str, Any]:
+        return {"text": self.separator.join(parts), "headings": headings, "start_line": start_line, "end_line": end_line, "size": size}
+
+    def _split_block(self, block: str, line: int) -> List[Tuple[str, int, int, int]]:
+        # (text, size, first line, last line) pieces of an oversized block: whole lines where they fit, words otherwise.
+        measure = self.length_function; pieces: List[Tuple[str, int, int, int]] = []
+        current: List[str] = []; current_size = 0; first_line = last_line = line; newline_size = measure("\n")
+        for line_number, block_line in enumerate(block.split('\n'), start=line):
+            line_size = measure(block_line)
+            for segment, segment_size in [(block_line, line_size)] if line_size <= self.max_size else self._split_words(block_line):
+                if current and current_size + newline_size + segment_size > self.max_size:
+                    pieces.append(("\n".join(current), current_size, first_line, last_line)); current = []
+                if not current: first_line = line_number; current_size = segment_size
+                else: current_size += newline_size + segment_size
+                current.append(segment); last_line = line_number
+        if current: pieces.append(("\n".join(current), current_size, first_line, last_line))
+        return pieces
+
+    def _split_words(self, text: str) -> List[Tuple[str, int]]:
+        measure = self.length_function; segments: List[Tuple[str, int]] = []; words: List[str] = []; size = 0; space_size = measure(" ")
+        for word in text.split():
+            word_size = measure(word)
+            if words and size + space_size + word_size > self.max_size: segments.append((" ".join(words), size)); words = []; size = 0
+            size = word_size if not words else size + space_size + word_size; words.append(word)
+        if words: segments.append((" ".join(words), size))
+        return segments
 
 # =============================================================================
 # PART 3: ABSTRACTION FOR A MARKDOWN DOCUMENT
@@ -604,6 +2390,9 @@ class MarkdownDocument:
     def get_lists(self) -> Dict[str, List[List[Dict[str, Any]]]]: return self.analyzer.identify_lists()
     def get_blockquotes(self) -> List[str]: return self.analyzer.identify_blockquotes().get("Blockquote", [])
     def get_task_items(self) -> List[Dict[str, Any]]: return self.analyzer.identify_task_items()
+    def iter_chunks(self, max_size: int = 1000, length_function: Optional[Callable[[str], int]] = None, split_sections: bool = True) -> Iterator[Dict[str, Any]]:
+        """Streams retrieval chunks of the document; see MarkdownChunker."""
+        return MarkdownChunker(max_size, length_function, split_sections).iter_chunks(self.analyzer)
     def get_jsx_imports(self) -> List[Dict[str, Any]]:
         if isinstance(self.analyzer, MDXMarkdownAnalyzer): return self.analyzer.identify_jsx_imports()
         logger.warning("JSX import identification only for MDX."); return []
@@ -1,6 +1,12 @@
 import unittest
+import io
 import os
 import json
+import re
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from unittest.mock import patch, mock_open, MagicMock
 
 # Assuming markdown_analyzer.py is in the parent directory of 'test' or accessible via PYTHONPATH
@@ -10,14 +16,27 @@ from markdown_analyzer_lib.markdown_analyzer import ( # Updated import path
     BlockToken,
     InlineParser,
     MarkdownParser,
+    StreamingMarkdownParser,
     MarkdownAnalyzer,
+    ParseCache,
+    HTTPCache,
+    Section,
     MDXMarkdownParser,
     MDXMarkdownAnalyzer,
+    CrawlState,
+    CrawlScheduler,
+    URLFingerprintSet,
+    PageDeduplicator,
     WebsiteScraper,
     MarkdownConverter,
     WebsiteMarkdownDocument,
     MarkdownSiteConverter,
-    MarkdownDocument
+    CrawlPipeline,
+    MarkdownDocument,
+    MarkdownChunker,
+    TextLink,
+    ImageLink,
+    FootnoteRef,
 )
 
 # Helper function to create a temporary markdown file
@@ -48,6 +67,24 @@ class TestBlockToken(unittest.TestCase):
         self.assertEqual(token.meta, {"id": "title"})
         self.assertEqual(token.line, 5)
 
+def reference_parse_inline(parser, text):
+    """The multi-pass parse_inline (one finditer per category) that the single-pass scanner must reproduce."""
+    result = {"text_links": [], "image_links": [], "inline_code": [], "emphasis": [], "footnotes_used": [], "html_inline": []}
+    used_footnotes = set()
+    for fm in parser.FOOTNOTE_RE.finditer(text):
+        fid = fm.group(1)
+        if fid in parser.footnotes and fid not in used_footnotes:
+            used_footnotes.add(fid); result["footnotes_used"].append({"id": fid, "content": parser.footnotes[fid]})
+    result["inline_code"] = [cm.group(1) for cm in parser.CODE_INLINE_RE.finditer(text)]
+    result["emphasis"] = [e for m in parser.EMPHASIS_RE.finditer(text) for e in [m.group(2) or m.group(3) or m.group(4)] if e]
+    result["html_inline"] = parser.parse_html_inline(text)
+    for mm in parser.IMAGE_OR_LINK_RE.finditer(text):
+        url = mm.group(4) or (parser.references.get(mm.group(5).lower()) if mm.group(5) else None)
+        if url:
+            if mm.group(1).startswith('!'): result["image_links"].append({"alt_text": mm.group(2), "url": url})
+            else: result["text_links"].append({"text": mm.group(2), "url": url})
+    return result
+
 class TestInlineParser(unittest.TestCase):
     def setUp(self):
         self.references = {"ref": "http://example.com/ref"}
@@ -90,6 +127,49 @@ class TestInlineParser(unittest.TestCase):
         self.assertTrue(any("<br/>" in h or "<br>" in h for h in result["html_inline"])) 
         self.assertTrue(any("<span>content</span>" in h for h in result["html_inline"]))
 
+    def test_single_pass_matches_reference_on_corpus(self):
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+        texts = ["*a `*b*` c* [x](u) `[y](v)` [^fn1] ![i](p) _u_ **b** [r][ref] <span>s</span> `<b>`", "a * b _ c ` d [ e ! f < g"]
+        for file_name in sorted(os.listdir(data_dir)):
+            parser = MarkdownParser(open(os.path.join(data_dir, file_name), encoding='utf-8').read())
+            texts.extend(t.content for t in parser.parse() if t.type in ('paragraph', 'header', 'blockquote') and t.content)
+            texts.extend(item["text"] for t in parser.tokens if t.type in ('ordered_list', 'unordered_list') for item in t.meta["items"])
+        for text in texts:
+            self.assertEqual(self.parser.parse_inline(text), reference_parse_inline(self.parser, text), text)
+            self.assertEqual(self.parser.parse_inline(text, ["emphasis", "footnotes_used"]), {k: reference_parse_inline(self.parser, text)[k] for k in ["emphasis", "footnotes_used"]})
+
+    def test_skip_code_spans(self):
+        text = "*a* `*b* [x](u) <b>c</b> [^fn1]` [y](v) <i>d</i>"
+        self.assertEqual(self.parser.parse_inline(text)["emphasis"], ["a", "b"])
+        result = InlineParser(references=self.references, footnotes=self.footnotes, skip_code_spans=True).parse_inline(text)
+        self.assertEqual(result["emphasis"], ["a"])
+        self.assertEqual(result["inline_code"], ["*b* [x](u) <b>c</b> [^fn1]"])
+        self.assertEqual(result["text_links"], [{"text": "y", "url": "v"}])
+        self.assertEqual(result["footnotes_used"], [])
+        self.assertEqual(result["html_inline"], ["<i>d</i>"])
+
+    def test_parse_html_inline_matches_beautifulsoup(self):
+        from bs4 import BeautifulSoup
+        samples = [
+            "Text with <br> and <span>content</span>.",
+            "<b class='  a   b '>x</b> <i>\n\n </i> <pre> </pre>",
+            "<a title='x\"y' href=\"u?a=1&b=2\" rel=' nofollow '>q</a><img src=x alt=\"it's\">",
+            "<p>a<p>b</i> <x-y/> <input disabled> </br> <span>unclosed",
+            "a <http://example.com> b <b>1<!--c-->2 &amp; 3</b> <script>x<y</script>",
+            "<div><!-- \n-->x </p>",
+            "<p class='a  b'><!---->",
+        ]
+        for text in samples:
+            expected = [str(tag) for tag in BeautifulSoup(text, 'html.parser').find_all()]
+            self.assertEqual(self.parser.parse_html_inline(text), expected, text)
+
+    @patch('markdown_analyzer_lib.markdown_analyzer.BeautifulSoup')
+    def test_parse_html_inline_without_tags_skips_soup(self, mock_soup):
+        result = self.parser.parse_inline("No markup here, only a < b and a **bold** word.")
+        self.assertEqual(result["html_inline"], [])
+        self.assertEqual(self.parser.parse_html_inline("<b>bold</b> <i>it</i>"), ["<b>bold</b>", "<i>it</i>"])
+        mock_soup.assert_not_called()
+
 
 class TestMarkdownParser(unittest.TestCase):
     def test_parse_atx_header(self):
@@ -221,6 +301,52 @@ class TestMarkdownParser(unittest.TestCase):
         self.assertEqual(tokens[0].type, "paragraph")
         self.assertEqual(tokens[0].content, "This is a simple paragraph.")
 
+    def test_starts_new_block(self):
+        parser = MarkdownParser("")
+        for line in ["# H", "---", "```js", "> q", "1. one", "\u0663. arabic-indic digit", "  - indented item", "* item", "+ item", "***", "___", "<div>", "<!-- c"]:
+            self.assertTrue(parser.starts_new_block(line), line)
+        for line in ["", "#nospace", "text", "1.no space", "-no space", "__", "< x", "| a | b |", "===", "  text"]:
+            self.assertFalse(parser.starts_new_block(line), line)
+
+    def test_paragraph_starting_with_indented_marker(self):
+        tokens = MarkdownParser("  # Not a header\n > not a quote\n\n```\nunclosed fence").parse()
+        self.assertEqual([(t.type, t.content) for t in tokens], [("paragraph", "# Not a header"), ("paragraph", "> not a quote"), ("paragraph", "```\nunclosed fence")])
+
+class TestStreamingMarkdownParser(unittest.TestCase):
+    md_text = "---\ntitle: T\n---\n# Title\nSub\n===\n\nPara [ref] text\n\n```py\nx = 1\n\ny = 2\n```\n- a\n\n- b\n\n> quote\n\n| A | B |\n|---|---|\n| 1 | 2 |\n<div>\n\nx\n</div>\n[ref]: http://example.com\n[^fn]: Note\n"
+
+    def test_tokens_match_markdown_parser(self):
+        expected = MarkdownParser(self.md_text)
+        streamed = StreamingMarkdownParser(io.StringIO(self.md_text))
+        sig = lambda tokens: [(t.type, t.content, t.level, t.meta, t.line) for t in tokens]
+        self.assertEqual(sig(streamed.parse()), sig(expected.parse()))
+        self.assertEqual(streamed.references, expected.references)
+        self.assertEqual(streamed.footnotes, expected.footnotes)
+
+    def test_multiline_definitions_match_markdown_parser(self):
+        md_text = "See [a], [long label] and [^n].\n\n[a]:\n  http://a\n[long\nlabel]: http://l\n[^n]:\n\n   Note\n[b]: \n[c]: http://c"
+        expected = MarkdownParser(md_text); streamed = StreamingMarkdownParser(md_text); streamed.parse()
+        self.assertEqual(streamed.references, expected.references)
+        self.assertEqual(streamed.footnotes, expected.footnotes)
+        self.assertEqual(streamed.references["a"], "http://a"); self.assertEqual(streamed.footnotes["n"], "Note")
+
+    def test_buffer_stays_bounded(self):
+        def lines():
+            for i in range(20000): yield f"Paragraph {i}\n"; yield "\n"
+        parser = StreamingMarkdownParser(lines()); peak = 0; count = 0
+        for token in parser.iter_tokens():
+            peak = max(peak, len(parser.lines._buffer)); count += 1
+        self.assertEqual(count, 20000)
+        self.assertLessEqual(peak, 3)
+
+    def test_stream_tokens_from_file(self):
+        test_file = create_temp_md_file("temp_stream_test.md", self.md_text)
+        try:
+            types = [t.type for t in MarkdownAnalyzer.stream_tokens(test_file)]
+        finally:
+            remove_temp_file(test_file)
+        self.assertEqual(types, [t.type for t in MarkdownParser(self.md_text).parse()])
+
 class TestMarkdownAnalyzer(unittest.TestCase):
     def setUp(self):
         self.test_file_content = """# Title
@@ -346,6 +472,279 @@ This paragraph uses the footnote [^foot].
         self.assertEqual(analysis['code_blocks'], 1)
         self.assertTrue(analysis['words'] > 10)
 
+    def test_analyse_matches_identify_methods(self):
+        analysis = self.analyzer.analyse()
+        self.assertEqual(list(analysis.keys()), list(MarkdownAnalyzer.ANALYSE_COUNTERS))
+        links = self.analyzer.identify_links()
+        self.assertEqual(analysis['links'], len(links.get("Text Links", [])) + len(links.get("Image Links", [])))
+        self.assertEqual(analysis['images'], len(links.get("Image Links", [])))
+        self.assertEqual(analysis['footnotes'], len(self.analyzer.identify_footnotes()))
+        self.assertEqual(analysis['unordered_list_items'], 1)
+        self.assertEqual(analysis['tables'], 1)
+        self.assertEqual(analysis['html_blocks'], 1)
+
+    def test_inline_parsing_is_lazy(self):
+        with patch.object(InlineParser, 'parse_inline', autospec=True, side_effect=InlineParser.parse_inline) as mock_parse_inline:
+            analyzer = MarkdownAnalyzer.from_string(self.test_file_content)
+            analyzer.identify_headers(); analyzer.identify_code_blocks(); analyzer.identify_tables()
+            analyzer.analyse(counters=['headers', 'tables', 'words'])
+            mock_parse_inline.assert_not_called()
+            analyzer.identify_inline_code()
+            calls_after_first_category = mock_parse_inline.call_count
+            self.assertTrue(calls_after_first_category > 0)
+            self.assertTrue(all(call.args[2] == ["inline_code"] for call in mock_parse_inline.call_args_list))
+            analyzer.identify_inline_code()
+            self.assertEqual(mock_parse_inline.call_count, calls_after_first_category)
+        self.assertNotIn("emphasis", analyzer.tokens[1].meta)
+        self.assertEqual(analyzer.tokens[1].meta["inline_code"], ("code",))
+
+    def test_identify_lists_key_order_independent_of_earlier_analyses(self):
+        text = "- a [l](http://x) `c` *e*\n- b\n\n1. one"
+        fresh = MarkdownAnalyzer.from_string(text).identify_lists()
+        analyzer = MarkdownAnalyzer.from_string(text); analyzer.identify_emphasis(); analyzer.identify_inline_code()
+        lists = analyzer.identify_lists()
+        self.assertEqual(lists, fresh)
+        key_order = lambda found: [list(item) for kind in ("Unordered list", "Ordered list") for group in found[kind] for item in group]
+        self.assertEqual(key_order(lists), key_order(fresh))
+        self.assertEqual(key_order(lists)[0][-6:], list(InlineParser.INLINE_CATEGORIES))
+
+    def test_inline_meta_single_token(self):
+        analyzer = MarkdownAnalyzer.from_string("# Title\n\nSee [docs](http://example.com) and `x`.")
+        meta = analyzer.inline_meta(analyzer.tokens[1], ["text_links"])
+        self.assertEqual(meta["text_links"], (TextLink("docs", "http://example.com"),))
+        self.assertNotIn("inline_code", meta)
+        self.assertEqual(analyzer.get_tokens_sequential()[1]['inline_elements'][0]['type'], 'inline_code')
+
+    def test_analyse_counters_subset(self):
+        analysis = self.analyzer.analyse(counters=['tables', 'headers'])
+        self.assertEqual(analysis, {'headers': 1, 'tables': 1})
+        with patch.object(MarkdownAnalyzer, 'count_words') as mock_count_words:
+            self.analyzer.analyse(counters=['headers'])
+            mock_count_words.assert_not_called()
+        with self.assertRaises(ValueError):
+            self.analyzer.analyse(counters=['headers', 'nonsense'])
+
+    def test_count_unicode_whitespace(self):
+        text = "alpha\u3000beta\xa0gamma\u2028delta\x1cepsilon \t zeta\n\n"
+        analyzer = MarkdownAnalyzer.from_string(text * 3)
+        self.assertEqual(analyzer.count_words(), len((text * 3).split()))
+        self.assertEqual(analyzer.count_characters(), sum(not char.isspace() for char in text * 3))
+        analyzer.COUNT_CHUNK_SIZE = 4  # words straddling chunk boundaries are counted once
+        self.assertEqual(analyzer.count_words(), 18)
+
+    def test_count_statistics_per_token_and_section(self):
+        text = "Preamble words here\n\n# One\nfirst body\n\n## Two\n- a b\n- c"
+        analyzer = MarkdownAnalyzer.from_string(text)
+        self.assertEqual(analyzer.count_statistics(), {"words": len(text.split()), "characters": analyzer.count_characters()})
+        per_token = analyzer.count_statistics(per='token')
+        self.assertEqual([(t["type"], t["line"], t["words"]) for t in per_token["tokens"]],
+                         [("paragraph", 1, 3), ("header", 3, 2), ("paragraph", 4, 2), ("header", 6, 2), ("unordered_list", 7, 5)])
+        per_section = analyzer.count_statistics(per='section')
+        self.assertEqual([(s["heading"], s["words"]) for s in per_section["sections"]], [(None, 3), ("One", 4), ("Two", 7)])
+        self.assertEqual(sum(s["characters"] for s in per_section["sections"]), per_section["characters"])
+        self.assertEqual(per_section["words"], analyzer.count_words())
+        with self.assertRaises(ValueError):
+            analyzer.count_statistics(per='line')
+
+    def test_apply_edit_matches_full_parse(self):
+        analyzer = MarkdownAnalyzer.from_string(self.test_file_content); analyzer.identify_links()
+        edits = [(2, 2, "A paragraph with an ![image](img.png)."), (4, 3, "Setext title\n---\n"), (1, 1, ""), (5, 5, "```\ncode"),
+                 (9, 8, "```"), (3, 3, "[foot]: http://example.com/ref"), (1, 0, "---\ntitle: x\n---")]
+        for start_line, end_line, replacement in edits:
+            analyzer.apply_edit(start_line, end_line, replacement)
+            expected = MarkdownAnalyzer.from_string(analyzer.text)
+            self.assertEqual(analyzer.get_tokens_sequential(), expected.get_tokens_sequential())
+            self.assertEqual(analyzer.analyse(), expected.analyse())
+        with self.assertRaises(ValueError):
+            analyzer.apply_edit(0, 1, "x")
+
+    def test_apply_edit_reuses_untouched_tokens(self):
+        analyzer = MarkdownAnalyzer.from_string(self.test_file_content); analyzer.identify_links()
+        before = list(analyzer.tokens)
+        new_tokens = analyzer.apply_edit(8, 8, "> Quote one\n> quote two with [a link](http://example.org)")
+        self.assertEqual([t.type for t in new_tokens], ["code", "blockquote"])  # re-parsing starts one block before the edit
+        self.assertEqual(new_tokens[1].meta["text_links"], (TextLink("a link", "http://example.org"),))
+        self.assertEqual(analyzer.tokens[:3], before[:3])
+        self.assertIs(analyzer.tokens[-1], before[-1])
+        self.assertEqual(analyzer.tokens[-1].line, 19)
+        self.assertIn("text_links", analyzer.tokens[-1].meta)
+
+    def test_analyse_files_reports_errors_per_file(self):
+        missing_file = "temp_missing_file.md"
+        results = list(MarkdownAnalyzer.analyse_files([self.test_file, missing_file], methods=['analyse', 'identify_headers'], max_workers=1))
+        self.assertEqual([r["path"] for r in results], [self.test_file, missing_file])
+        self.assertIsNone(results[0]["error"])
+        self.assertEqual(results[0]["result"]["analyse"], self.analyzer.analyse())
+        self.assertEqual(results[0]["result"]["identify_headers"], self.analyzer.identify_headers())
+        self.assertIsNone(results[1]["result"])
+        self.assertIn("FileNotFoundError", results[1]["error"])
+        with self.assertRaises(ValueError):
+            list(MarkdownAnalyzer.analyse_files([self.test_file], methods='count_words'))
+
+    def test_analyse_files_process_pool(self):
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+        results = list(MarkdownAnalyzer.analyse_files(data_dir, methods='identify_headers', max_workers=2, chunksize=1))
+        expected_paths = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith('.md'))
+        self.assertEqual(sorted(r["path"] for r in results), expected_paths)
+        for r in results:
+            self.assertIsNone(r["error"])
+            self.assertEqual(r["result"], MarkdownAnalyzer(r["path"]).identify_headers())
+
+
+    def test_from_file_mmap_matches_read(self):
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+        for file_name in sorted(os.listdir(data_dir)):
+            path = os.path.join(data_dir, file_name)
+            mapped = MarkdownAnalyzer.from_file(path, use_mmap=True)
+            self.assertEqual(mapped.get_tokens_sequential(), MarkdownAnalyzer(path).get_tokens_sequential())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "crlf.md")
+            with open(path, "w", encoding="utf-8", newline="") as f: f.write("# T\r\nSee [x][a] \u00e9\r\n\r\n[a]:\r\n  http://a\rlast")
+            mapped = MarkdownAnalyzer.from_file(path, use_mmap=True); read = MarkdownAnalyzer(path)
+            self.assertEqual(mapped.references, {"a": "http://a"})
+            self.assertEqual(mapped.identify_links(), read.identify_links())
+            self.assertEqual(mapped.text, read.text)
+            self.assertEqual(mapped.analyse(), read.analyse())
+            with self.assertRaises(ValueError):
+                MarkdownAnalyzer.from_file(path, encoding="utf-16", use_mmap=True)
+
+    def test_mmap_released_on_close_and_after_decoding(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.md")
+            with open(path, "w", encoding="utf-8") as f: f.write("# T\n\nSee [x][a]\n\n[a]: http://a")
+            with MarkdownAnalyzer.from_file(path, use_mmap=True) as analyzer:
+                buffer = analyzer._mapped.buffer
+                self.assertEqual(analyzer.identify_headers()["Header"][0]["text"], "T")
+            self.assertTrue(buffer.closed)
+            self.assertEqual(analyzer.identify_links()["Text Links"], [{"line": 3, "text": "x", "url": "http://a"}])  # tokens outlive the mapping
+            self.assertEqual(analyzer.analyse(), MarkdownAnalyzer(path).analyse())  # close() decoded the text first
+            self.assertTrue(hasattr(analyzer, "text"))
+            analyzer = MarkdownAnalyzer.from_file(path, use_mmap=True); buffer = analyzer._mapped.buffer
+            self.assertEqual(analyzer.text.splitlines()[0], "# T")
+            self.assertTrue(buffer.closed); analyzer.close()
+            MarkdownAnalyzer(path).close()  # no-op without a mapping
+
+    def test_mmap_uses_parser_class_definition_patterns(self):
+        class TightParser(MarkdownParser):  # also accepts "[label]:url" without a space
+            REFERENCE_DEF_RE = re.compile(r'^\[([^\]]+)\]:\s*(.*?)\s*$', re.MULTILINE)
+        class TightAnalyzer(MarkdownAnalyzer): parser_class = TightParser
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "doc.md")
+            with open(path, "w", encoding="utf-8") as f: f.write("See [x][a]\n\n[a]:http://a")
+            with TightAnalyzer.from_file(path, use_mmap=True) as mapped: references = mapped.references
+            self.assertEqual(references, TightAnalyzer(path).references)
+            self.assertEqual(references, {"a": "http://a"})
+
+    def test_section_index(self):
+        text = "Intro\n\n# A\nText\n## A1\nMore\n### Deep\nDeeper\n## A2\nEnd\n# B\nSetext\n------\nLast"
+        analyzer = MarkdownAnalyzer.from_string(text)
+        index = analyzer.section_index()
+        self.assertEqual([s.path for s in index], [("A",), ("A", "A1"), ("A", "A1", "Deep"), ("A", "A2"), ("B",), ("B", "Setext")])
+        self.assertEqual([(s.line, s.end_line) for s in index], [(3, 10), (5, 8), (7, 8), (9, 10), (11, 14), (12, 14)])
+        self.assertIsNone(analyzer.section_at_line(1).heading)
+        self.assertEqual(analyzer.section_at_line(8).heading, "Deep")
+        self.assertEqual(analyzer.section_at_line(9).heading, "A2")
+        self.assertEqual(analyzer.section_at_line(14).path, ("B", "Setext"))
+        self.assertEqual([t.content for t in analyzer.tokens_under(["A", "A1"])], ["A1", "More", "Deep", "Deeper"])
+        self.assertEqual([s.heading for s in analyzer.sections_at_level(2)], ["A1", "A2", "Setext"])
+        self.assertEqual([s.heading for s in index.root.children], ["A", "B"])
+        with self.assertRaises(ValueError):
+            analyzer.section_at_line(15)
+        analyzer.apply_edit(1, 1, "# Intro")
+        self.assertIsInstance(analyzer.section_at_line(1), Section)
+        self.assertEqual(analyzer.section_at_line(1).heading, "Intro")
+        self.assertEqual(analyzer.identify_sections()["Section"][0], {"heading": "Intro", "level": 1, "line": 1, "end_line": 2, "path": ["Intro"], "token_start": 0, "token_end": 1})
+
+    def test_iter_line_offsets(self):
+        text = "# A\nText\n\n## B\nEnd"
+        analyzer = MarkdownAnalyzer.from_string(text)
+        offsets = list(analyzer.iter_line_offsets([1, 2, 2, 4, 5, 99]))
+        self.assertEqual(offsets, [0, 4, 4, 10, 15, len(text)])
+        self.assertEqual([text[o:].split("\n")[0] for o in offsets[:5]], ["# A", "Text", "Text", "## B", "End"])
+
+class TestParseCache(unittest.TestCase):
+    md_text = "# Title\n\nSee [docs][ref], `code` and *this*[^1].\n\n- item [x](http://x.com)\n\n| A |\n|---|\n| 1 |\n\n[ref]: http://example.com\n[^1]: Note"
+
+    def test_memory_hit_skips_parsing(self):
+        cache = ParseCache()
+        first = MarkdownAnalyzer.from_string(self.md_text, cache=cache)
+        expected = (first.analyse(), first.get_tokens_sequential()); first.flush_cache()
+        with patch.object(MarkdownParser, 'parse') as mock_parse, patch.object(InlineParser, 'parse_inline') as mock_parse_inline:
+            second = MarkdownAnalyzer.from_string(self.md_text, cache=cache)
+            self.assertEqual((second.analyse(), second.get_tokens_sequential()), expected)
+            mock_parse.assert_not_called(); mock_parse_inline.assert_not_called()
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        second.tokens[0].line = 99; second.tokens[1].meta["inline_code"] = ("changed",)
+        third = MarkdownAnalyzer.from_string(self.md_text, cache=cache)
+        self.assertEqual(third.tokens[0].line, 1)
+        self.assertEqual(third.tokens[1].meta["inline_code"], ("code",))
+
+    def test_disk_tier_persists_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "parse_cache.sqlite")
+            writer = ParseCache(path=db_path)
+            expected = MarkdownAnalyzer.from_string(self.md_text, cache=writer).identify_links()
+            writer.close()
+            reader = ParseCache(path=db_path)
+            with patch.object(MarkdownParser, 'parse') as mock_parse:
+                analyzer = MarkdownAnalyzer.from_string(self.md_text, cache=reader)
+                mock_parse.assert_not_called()
+            self.assertEqual(analyzer.identify_links(), expected)
+            self.assertEqual(analyzer.references, MarkdownParser(self.md_text).references)
+            self.assertEqual(reader.hits, 1)
+            reader.close()
+
+    def test_key_and_lru_eviction(self):
+        cache = ParseCache(max_entries=2)
+        self.assertNotEqual(cache.key_for(self.md_text, MarkdownParser), cache.key_for(self.md_text, MDXMarkdownParser))
+        self.assertNotEqual(cache.key_for(self.md_text, MarkdownParser), cache.key_for(self.md_text + " ", MarkdownParser))
+        for text in ("a", "b", "c"): MarkdownAnalyzer.from_string(text, cache=cache)
+        MarkdownAnalyzer.from_string("a", cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        MarkdownAnalyzer.from_string("c", cache=cache)
+        self.assertEqual(cache.hits, 1)
+
+    def test_lazy_inline_categories_stored_once_per_flush(self):
+        cache = ParseCache()
+        with patch.object(ParseCache, 'store', autospec=True, side_effect=ParseCache.store) as mock_store:
+            with MarkdownAnalyzer.from_string(self.md_text, cache=cache) as analyzer:
+                for method in ('identify_links', 'identify_emphasis', 'identify_inline_code', 'identify_footnotes', 'identify_html_inline', 'identify_lists'): getattr(analyzer, method)()
+                self.assertEqual(mock_store.call_count, 1)  # the block parse only
+            self.assertEqual(mock_store.call_count, 2)  # every category parsed above, written once on exit
+            analyzer.flush_cache(); self.assertEqual(mock_store.call_count, 2)
+        with patch.object(InlineParser, 'parse_inline') as mock_parse_inline:
+            self.assertEqual(MarkdownAnalyzer.from_string(self.md_text, cache=cache).identify_emphasis(), analyzer.identify_emphasis())
+            mock_parse_inline.assert_not_called()
+
+    def test_batch_methods_store_each_file_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "doc.md")
+            with open(path, "w", encoding="utf-8") as f: f.write(self.md_text)
+            cache = ParseCache()
+            with patch.object(ParseCache, 'store', autospec=True, side_effect=ParseCache.store) as mock_store:
+                results = list(MarkdownAnalyzer.analyse_files([path], methods=['identify_links', 'identify_emphasis', 'analyse'], max_workers=1, parse_cache=cache))
+            self.assertIsNone(results[0]["error"])
+            self.assertEqual(mock_store.call_count, 2)  # after the block parse, then once for all the inline categories
+            self.assertEqual(MarkdownAnalyzer.from_string(self.md_text, cache=cache).analyse(), results[0]["result"]["analyse"])
+
+    def test_batch_cache_reaches_spawned_workers(self):
+        import multiprocessing
+        from functools import partial
+        from concurrent.futures import ProcessPoolExecutor
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "doc.md"); db_path = os.path.join(tmp_dir, "parse_cache.sqlite")
+            with open(path, "w", encoding="utf-8") as f: f.write(self.md_text)
+            spawn_pool = partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+            with patch('markdown_analyzer_lib.markdown_analyzer.ProcessPoolExecutor', spawn_pool):
+                results = list(MarkdownAnalyzer.analyse_files([path], methods='identify_links', max_workers=2, parse_cache=ParseCache(path=db_path)))
+            self.assertIsNone(results[0]["error"])
+            reader = ParseCache(path=db_path)
+            with patch.object(MarkdownParser, 'parse') as mock_parse:
+                analyzer = MarkdownAnalyzer.from_string(self.md_text, cache=reader)
+                mock_parse.assert_not_called()
+            self.assertEqual(analyzer.identify_links(), results[0]["result"])
+            reader.close()
+
 
 class TestMDXMarkdownParser(unittest.TestCase):
     def test_parse_jsx_import(self):
@@ -442,6 +841,19 @@ class TestWebsiteScraper(unittest.TestCase):
         self.assertIn("http://example.com/page2", pages)
         self.assertEqual(mock_get.call_count, 2)
 
+    def test_link_and_title_scan_matches_bs4(self):
+        from bs4 import BeautifulSoup
+        from urllib.parse import urljoin
+        scraper = WebsiteScraper("http://example.com")
+        pages = ["<html><head><title> Home </title></head><body><a href='/a'>A</a><A HREF='/b' href='/c'>B</A><a href>x</a><a>y</a></body></html>",
+                 "<title><b>Bold</b></title><h1><a href='/h'>Heading</a></h1><script>var s = '<a href=/no>';</script>",
+                 "<title>Q&amp;A</title><br></br><h1>Other</h1>", "<h1> <br/> </h1><title></title>", "<p>No title at all</p>", ""]
+        for html in pages:
+            soup = BeautifulSoup(html, "html.parser")
+            expected_links = [urljoin("http://example.com", str(tag.get("href")).strip()) for tag in soup.find_all("a", href=True) if tag.get("href")]
+            self.assertEqual(scraper._extract_links("http://example.com", html), expected_links)
+            self.assertEqual(WebsiteMarkdownDocument._extract_title_from_html(html), WebsiteMarkdownDocument._title_from_soup(soup) if html else "Untitled Page")
+
     def test_is_valid_url(self):
         scraper = WebsiteScraper("http://example.com")
         self.assertTrue(scraper._is_valid_url("http://example.com/path"))
@@ -451,6 +863,388 @@ class TestWebsiteScraper(unittest.TestCase):
         self.assertFalse(scraper._is_valid_url("http://example.com/test.pdf")) # pdf is not
 
 
+class _LocalSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so that connection reuse is observable
+    site = {
+        "/": "<html><a href='/a'>A</a> <a href='/b?y=2&x=1'>B</a> <a href='/doc.pdf'>PDF</a> <a href='http://other.invalid/x'>X</a> <a href='/data.json'>J</a></html>",
+        "/a": "<html><a href='/c'>C</a> <a href='/missing'>M</a></html>",
+        "/b": "<html><a href='/a'>A</a> <a href='/c/'>C</a> <a href='/d'>D</a></html>",
+        "/c": "<html><a href='/e'>E</a></html>",
+        "/d": "<html>D</html>",
+        "/e": "<html>E</html>",
+    }
+    in_flight = 0; max_in_flight = 0; client_ports: set = set(); lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock: cls.in_flight += 1; cls.max_in_flight = max(cls.max_in_flight, cls.in_flight); cls.client_ports.add(self.client_address[1])
+        time.sleep(0.02)
+        path = self.path.split("?")[0]
+        if path == "/data.json": body, status, ctype = b"{}", 200, "application/json"
+        elif path in self.site: body, status, ctype = self.site[path].encode(), 200, "text/html; charset=utf-8"
+        elif path.startswith("/many/"): body, status, ctype = b"<html>leaf</html>", 200, "text/html"
+        elif path == "/many": body, status, ctype = "".join(f"<a href='/many/{i}'>{i}</a>" for i in range(24)).encode(), 200, "text/html"
+        else: body, status, ctype = b"not found", 404, "text/plain"
+        with cls.lock: cls.in_flight -= 1
+        self.send_response(status); self.send_header("Content-Type", ctype); self.send_header("Content-Length", str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+class TestConcurrentWebsiteScraper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _LocalSiteHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True); cls.server_thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown(); cls.server.server_close()
+
+    def setUp(self):
+        _LocalSiteHandler.max_in_flight = 0; _LocalSiteHandler.client_ports = set()
+
+    def test_concurrent_matches_sequential(self):
+        for max_depth in (0, 1, 2, 3):
+            sequential = WebsiteScraper(self.base_url, max_depth=max_depth).scrape()
+            concurrent = WebsiteScraper(self.base_url, max_depth=max_depth, max_workers=4).scrape()
+            self.assertEqual(concurrent, sequential)
+            self.assertEqual(list(concurrent), list(sequential))
+        self.assertEqual(sorted(concurrent), sorted(f"{self.base_url}{p}" for p in ("", "/a", "/b?x=1&y=2", "/c", "/d", "/e")))
+
+    def test_iter_pages_yields_scrape_order(self):
+        for max_workers in (1, 4):
+            pages = WebsiteScraper(self.base_url, max_depth=3, max_workers=max_workers).iter_pages()
+            first_url, _ = next(pages)
+            self.assertEqual(first_url, self.base_url)
+            self.assertEqual([(first_url, _)] + list(pages), list(WebsiteScraper(self.base_url, max_depth=3).scrape().items()))
+
+    def test_crawl_state_resumes_interrupted_crawl(self):
+        expected = list(WebsiteScraper(self.base_url, max_depth=3).scrape().items())
+        for max_workers in (1, 4):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "crawl.sqlite"); fetched = []
+                real_fetch = WebsiteScraper._fetch
+                def failing_fetch(scraper, url, session=None):
+                    if len(fetched) == 4: raise ConnectionError("crawler died")
+                    fetched.append(url); return real_fetch(scraper, url, session)
+                with patch.object(WebsiteScraper, '_fetch', failing_fetch), self.assertRaises(ConnectionError):
+                    for _ in WebsiteScraper(self.base_url, max_depth=3, max_workers=max_workers, crawl_state=CrawlState(path, checkpoint_every=2)).iter_pages(): pass
+                before = set(fetched); fetched.clear()
+                with patch.object(WebsiteScraper, '_fetch', lambda scraper, url, session=None: fetched.append(url) or real_fetch(scraper, url, session)):
+                    state = CrawlState(path)
+                    resumed = WebsiteScraper(self.base_url, max_depth=3, max_workers=max_workers, crawl_state=state).scrape()
+                    self.assertEqual(list(resumed.items()), expected)
+                    self.assertFalse(before & set(fetched) - {f"{self.base_url}/missing"})  # failed fetches are retried
+                    fetched.clear()
+                    self.assertEqual(WebsiteScraper(self.base_url, max_depth=3, crawl_state=state).scrape(), resumed)
+                    self.assertEqual(fetched, [])  # a finished crawl only replays the stored pages
+                with self.assertRaises(ValueError): WebsiteScraper(self.base_url, max_depth=1, crawl_state=state).scrape()
+                state.close()
+
+    def test_fingerprint_visited_set_matches_set(self):
+        urls = [f"{self.base_url}/page/{i}?q={i % 7}" for i in range(5000)]
+        visited = URLFingerprintSet(urls[:10], expected_urls=4); visited.update(urls); visited.add(urls[0])
+        self.assertEqual(len(visited), 5000)
+        self.assertTrue(all(url in visited for url in urls))
+        self.assertFalse(any(f"{url}#x" in visited for url in urls) or 42 in visited)
+        self.assertLessEqual(visited.memory_bytes(), 8 * 4 * 5000)
+        visited.clear(); self.assertEqual((len(visited), urls[0] in visited), (0, False))
+        for max_workers in (1, 4):
+            expected = list(WebsiteScraper(self.base_url, max_depth=3, max_workers=max_workers).scrape().items())
+            scraper = WebsiteScraper(self.base_url, max_depth=3, max_workers=max_workers, visited=URLFingerprintSet())
+            self.assertEqual(list(scraper.scrape().items()), expected)
+            self.assertIsInstance(scraper.visited, URLFingerprintSet)
+            self.assertEqual(list(scraper.scrape().items()), expected)  # cleared for a new crawl
+
+    def test_crawl_pipeline_matches_sequential_phases(self):
+        pages = WebsiteScraper(self.base_url, max_depth=3).scrape(); converter = MarkdownConverter()
+        results = list(CrawlPipeline(self.base_url, max_depth=3, scraper_workers=2, queue_size=2).run())
+        self.assertEqual([r["url"] for r in results], list(pages))
+        for r in results:
+            markdown, _ = converter.convert_page(pages[r["url"]])
+            self.assertEqual((r["markdown"], r["result"], r["error"]), (markdown, MarkdownAnalyzer.from_string(markdown).analyse(), None))
+        pooled = list(CrawlPipeline(self.base_url, max_depth=3, converter_workers=2, analysis_workers=2, methods=["analyse", "identify_headers"]).run())
+        self.assertEqual([r["result"]["analyse"] for r in pooled], [r["result"] for r in results])
+        with self.assertRaises(ValueError): CrawlPipeline(self.base_url, methods="count_words")
+
+    def test_crawl_pipeline_backpressure_and_early_stop(self):
+        real_fetch = WebsiteScraper._fetch; fetched = []
+        with patch.object(WebsiteScraper, '_fetch', lambda scraper, url, session=None: fetched.append(url) or real_fetch(scraper, url, session)):
+            run = CrawlPipeline(f"{self.base_url}/many", max_depth=1, queue_size=1).run()
+            next(run); time.sleep(0.5)
+            self.assertLess(len(fetched), 10)  # 25 pages, but the stages only run a few pages ahead of the consumer
+            run.close()
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith("pipeline-")])
+
+    def test_per_host_limit_and_connection_reuse(self):
+        scraper = WebsiteScraper(f"{self.base_url}/many", max_depth=1, max_workers=8, max_per_host=2)
+        pages = scraper.scrape()
+        self.assertEqual(len(pages), 25)
+        self.assertLessEqual(_LocalSiteHandler.max_in_flight, 2)
+        self.assertLessEqual(len(_LocalSiteHandler.client_ports), 8)
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    # /etag and /modified answer conditional requests with 304; /plain has no validators.
+    docs = {"/etag": "# Etag doc\n\nBody.", "/modified": "# Modified doc\n\n<a href='/etag'>x</a>", "/plain": "# Plain"}
+    versions = {"/etag": 1}; status_log: list = []
+
+    def do_GET(self):
+        cls = type(self); body = self.docs[self.path].encode(); headers = {"Content-Type": "text/html; charset=utf-8"}
+        if self.path == "/etag": headers["ETag"] = f'"v{cls.versions["/etag"]}"'
+        if self.path == "/modified": headers["Last-Modified"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+        not_modified = (headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]) or \
+                       (headers.get("Last-Modified") and self.headers.get("If-Modified-Since") == headers["Last-Modified"])
+        cls.status_log.append((self.path, 304 if not_modified else 200))
+        self.send_response(304 if not_modified else 200)
+        for name, value in headers.items(): self.send_header(name, value)
+        if not_modified: self.end_headers(); return
+        self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+class TestHTTPCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ConditionalHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown(); cls.server.server_close()
+
+    def setUp(self):
+        _ConditionalHandler.status_log = []; _ConditionalHandler.versions["/etag"] = 1
+        self.tmp = tempfile.TemporaryDirectory(); self.cache = HTTPCache(os.path.join(self.tmp.name, "http.sqlite"))
+
+    def tearDown(self):
+        self.cache.close(); self.tmp.cleanup()
+
+    def test_revalidates_with_etag_and_last_modified(self):
+        for path in ("/etag", "/modified", "/plain"):
+            first = MarkdownAnalyzer.from_url(self.base_url + path, http_cache=self.cache)
+            second = MarkdownAnalyzer.from_url(self.base_url + path, http_cache=self.cache)
+            self.assertEqual(second.text, first.text)
+        self.assertEqual(_ConditionalHandler.status_log, [("/etag", 200), ("/etag", 304), ("/modified", 200), ("/modified", 304), ("/plain", 200), ("/plain", 200)])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+        _ConditionalHandler.versions["/etag"] = 2  # changed page: downloaded and stored again
+        self.assertEqual(MDXMarkdownAnalyzer.from_url(self.base_url + "/etag", http_cache=self.cache).text, "# Etag doc\n\nBody.")
+        self.assertEqual(_ConditionalHandler.status_log[-1], ("/etag", 200))
+        response = HTTPCache(self.cache.path).get(self.base_url + "/etag")  # persisted on disk
+        self.assertEqual((response.status_code, response.headers["ETag"], response.text), (200, '"v2"', "# Etag doc\n\nBody."))
+        self.assertEqual(_ConditionalHandler.status_log[-1], ("/etag", 304))
+
+    def test_recrawl_uses_cached_pages(self):
+        for max_workers in (1, 2):
+            first = WebsiteScraper(self.base_url + "/modified", max_depth=1, max_workers=max_workers, http_cache=self.cache).scrape()
+            _ConditionalHandler.status_log = []
+            second = WebsiteScraper(self.base_url + "/modified", max_depth=1, max_workers=max_workers, http_cache=self.cache).scrape()
+            self.assertEqual(second, first)
+            self.assertEqual(sorted(_ConditionalHandler.status_log), [("/etag", 304), ("/modified", 304)])
+
+
+class _PoliteHandler(BaseHTTPRequestHandler):
+    # robots.txt disallows /private and allows 10 requests a second; /busy answers 429 the first time it is asked.
+    site = {"/robots.txt": "User-agent: *\nDisallow: /private\nRequest-rate: 10/1\n",
+            "/": "<html><a href='/a'>A</a> <a href='/busy'>B</a> <a href='/private'>P</a></html>", "/a": "<html>A</html>", "/busy": "<html>B</html>", "/private": "<html>P</html>"}
+    log: list = []; lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock: cls.log.append((self.path, time.monotonic())); busy = self.path == "/busy" and [p for p, _ in cls.log].count("/busy") == 1
+        status = 429 if busy else 200; body = b"slow down" if busy else self.site[self.path].encode()
+        self.send_response(status); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body)))
+        if busy: self.send_header("Retry-After", "5")
+        self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+class TestCrawlScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _PoliteHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown(); cls.server.server_close()
+
+    def setUp(self):
+        _PoliteHandler.log = []
+
+    def test_robots_rate_limit_and_retry_after(self):
+        for max_workers in (1, 3):
+            _PoliteHandler.log = []
+            pages = WebsiteScraper(self.base_url + "/", max_depth=1, max_workers=max_workers, scheduler=CrawlScheduler(max_retry_after=0.3)).scrape()
+            self.assertEqual(sorted(pages), [self.base_url, self.base_url + "/a", self.base_url + "/busy"])
+            paths = [path for path, _ in _PoliteHandler.log]
+            self.assertEqual((paths.count("/robots.txt"), paths.count("/busy"), paths.count("/private")), (1, 2, 0))
+            times = [t for _, t in _PoliteHandler.log]
+            self.assertTrue(all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:])))  # Request-rate: 10/1
+            busy = [t for path, t in _PoliteHandler.log if path == "/busy"]
+            self.assertGreaterEqual(busy[1] - busy[0], 0.29)  # Retry-After: 5, capped at max_retry_after
+
+    def test_without_scheduler_nothing_changes(self):
+        pages = WebsiteScraper(self.base_url + "/", max_depth=1).scrape()
+        self.assertEqual(sorted(pages), [self.base_url, self.base_url + "/a", self.base_url + "/private"])  # /busy failed with 429
+        self.assertNotIn("/robots.txt", [path for path, _ in _PoliteHandler.log])
+
+    def test_retry_after_formats(self):
+        scheduler = CrawlScheduler(max_retry_after=30); response = MagicMock()
+        for value, expected in (("7", 7), ("120", 30), ("Wed, 21 Oct 2015 07:28:00 GMT", 0), ("soon", None), (None, None)):
+            response.headers = {"Retry-After": value} if value else {}
+            self.assertEqual(scheduler._retry_after(response), expected)
+
+
+class _DuplicateSiteHandler(BaseHTTPRequestHandler):
+    # /copy is /guide byte for byte; /guide?print=1 is its printable version (no navigation, a print date added).
+    article = " ".join(f"word{(i * 7919) % 1000}" for i in range(400)); nav = "<nav>" + " ".join(f"<a href='/other'>Menu {i}</a>" for i in range(30)) + "</nav>"
+    site = {"/": "<html><title>Home</title><a href='/guide'>G</a> <a href='/guide?print=1'>P</a> <a href='/other'>O</a> <a href='/copy'>C</a></html>",
+            "/guide": f"<html><title>Guide</title>{nav}<p>{article}</p></html>", "/copy": f"<html><title>Guide</title>{nav}<p>{article}</p></html>",
+            "/guide?print=1": f"<html><title>Guide (print)</title><p>{article}</p><p>Printed on 2024-05-01</p></html>",
+            "/other": "<html><title>Other</title><p>" + " ".join(f"term{(i * 104729) % 997}" for i in range(400)) + "</p></html>"}
+
+    def do_GET(self):
+        body = self.site[self.path].encode()
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+class TestPageDeduplicator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _DuplicateSiteHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown(); cls.server.server_close()
+
+    def test_exact_and_near_duplicates(self):
+        site = _DuplicateSiteHandler.site; dedup = PageDeduplicator()
+        self.assertEqual([dedup.check(url, site[url]) for url in ("/guide", "/copy", "/guide?print=1", "/other", "/guide")], [None, "/guide", "/guide", None, None])
+        self.assertEqual(dedup.duplicates, {"/copy": "/guide", "/guide?print=1": "/guide"})
+        self.assertIsNone(dedup.check("/empty", "<html><img src='a.png'></html>"))
+        self.assertEqual(PageDeduplicator.words("<p>A&amp;b <b>c</b></p><script>x y</script><!-- z -->"), ["a", "b", "c"])
+        edited = site["/guide"].replace("word0 ", "changed ", 2)
+        self.assertLessEqual(bin(PageDeduplicator.simhash(PageDeduplicator.words(edited)) ^ PageDeduplicator.simhash(PageDeduplicator.words(site["/guide"]))).count("1"), 3)
+
+    def test_unclosed_skipped_elements_and_invalid_distance(self):
+        self.assertEqual(PageDeduplicator.words("<p>a</p><script>x</script><style>b<!-- c --><SCRIPT>d</Script >e"), ["a", "b", "e"])
+        start = time.perf_counter()
+        self.assertEqual(len(PageDeduplicator.words("<script" * 50000 + "<!--" * 50000 + "<" * 50000)), 50000)
+        self.assertLess(time.perf_counter() - start, 2.0)  # the previous regexes took minutes on this
+        for max_distance in (-1, 64):
+            with self.assertRaises(ValueError): PageDeduplicator(max_distance=max_distance)
+        self.assertIsNone(PageDeduplicator(max_distance=0).check("/a", "<p>one two three</p>"))
+
+    def test_document_and_pipeline_skip_duplicates(self):
+        guide, printable, copy = (f"{self.base_url}{p}" for p in ("/guide", "/guide?print=1", "/copy"))
+        plain = WebsiteMarkdownDocument(self.base_url, max_depth=1).generate()
+        self.assertEqual(plain.count("\n## "), 5)
+        with patch.object(MarkdownConverter, "convert_page", autospec=True, side_effect=MarkdownConverter.convert_page) as convert:
+            document = WebsiteMarkdownDocument(self.base_url, max_depth=1, deduplicator=PageDeduplicator()).generate()
+        self.assertEqual(convert.call_count, 3)
+        self.assertEqual(document.count("\n## "), 3)
+        self.assertIn(f"<!-- Duplicate URL: {printable} (same content as {guide}) -->", document)
+        self.assertIn(f"<!-- Duplicate URL: {copy} (same content as {guide}) -->", document)
+        self.assertNotIn(f"Original URL: {copy}", document)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "site.md")
+            self.assertEqual(WebsiteMarkdownDocument(self.base_url, max_depth=1, converter_workers=2, deduplicator=PageDeduplicator()).write(path), 3)
+            with open(path, encoding="utf-8") as f: written = f.read()
+            self.assertEqual((written.count("\n## "), written.count("<!-- Duplicate URL: ")), (3, 2))
+        for workers in (1, 2):
+            results = list(CrawlPipeline(self.base_url, max_depth=1, converter_workers=workers, analysis_workers=workers, deduplicator=PageDeduplicator()).run())
+            self.assertEqual([(r["url"][len(self.base_url):], r["duplicate_of"]) for r in results], [("", None), ("/guide", None), ("/guide?print=1", guide), ("/other", None), ("/copy", guide)])
+            self.assertEqual([r["markdown"] is None and r["result"] is None for r in results], [False, False, True, False, True])
+
+
+class _DownloadSiteHandler(BaseHTTPRequestHandler):
+    # /download?id=1 is a 20 MB binary behind an extensionless URL; /big declares a 300 kB HTML body, /unsized sends one without Content-Length.
+    pages = {"/": (b"<html><a href='/page'>P</a> <a href='/download?id=1'>D</a> <a href='/big'>B</a> <a href='/unsized'>U</a></html>", "text/html", True),
+             "/page": (b"<html><p>small</p></html>", "text/html; charset=utf-8", True), "/download?id=1": (b"\0" * 20_000_000, "application/octet-stream", True),
+             "/big": (b"<html>" + b"<p>x</p>" * 40_000 + b"</html>", "text/html", True), "/unsized": (b"<html>" + b"<p>y</p>" * 40_000 + b"</html>", "text/html", False),
+             "/proxied": (b"<html><p>via proxy</p></html>", "text/html", True)}
+    statuses = {"/proxied": 203}  # not linked from "/"; a proxy's Non-Authoritative Information
+    log: list = []; sent: dict = {}; lock = threading.Lock()
+
+    def _reply(self, with_body):
+        body, ctype, sized = self.pages[self.path]
+        with self.lock: self.log.append((self.command, self.path))
+        self.send_response(self.statuses.get(self.path, 200)); self.send_header("Content-Type", ctype); self.send_header("ETag", '"1"')
+        if sized: self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not with_body: return
+        try:
+            for start in range(0, len(body), 1 << 16):
+                self.wfile.write(body[start:start + (1 << 16)])
+                with self.lock: self.sent[self.path] = self.sent.get(self.path, 0) + len(body[start:start + (1 << 16)])
+        except (BrokenPipeError, ConnectionResetError): pass
+
+    def do_GET(self): self._reply(True)
+    def do_HEAD(self): self._reply(False)
+    def log_message(self, format, *args): pass
+
+
+class TestStreamedDownloads(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _DownloadSiteHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown(); cls.server.server_close()
+
+    def setUp(self):
+        _DownloadSiteHandler.log = []; _DownloadSiteHandler.sent = {}
+
+    def test_max_bytes_skips_bodies_before_downloading_them(self):
+        unlimited = WebsiteScraper(self.base_url, max_depth=1).scrape()
+        self.assertEqual(len(unlimited), 4); self.assertEqual(_DownloadSiteHandler.sent["/download?id=1"], 20_000_000)
+        for max_workers in (1, 3):
+            _DownloadSiteHandler.sent = {}
+            pages = WebsiteScraper(self.base_url, max_depth=1, max_workers=max_workers, max_bytes=100_000).scrape()
+            self.assertEqual(pages, {url: html for url, html in unlimited.items() if not url.endswith(("/big", "/unsized"))})
+            self.assertLess(_DownloadSiteHandler.sent["/download?id=1"], 10_000_000)  # the connection is dropped after the headers
+
+    def test_head_probe_and_http_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = HTTPCache(os.path.join(tmp, "http.sqlite"))
+            pages = WebsiteScraper(self.base_url, max_depth=1, max_bytes=100_000, head_probe=True, http_cache=cache).scrape()
+            self.assertEqual(sorted(pages), [self.base_url, self.base_url + "/page"])
+            self.assertEqual([method for method, path in _DownloadSiteHandler.log if path == "/download?id=1"], ["HEAD"])
+            self.assertEqual([method for method, path in _DownloadSiteHandler.log if path == "/big"], ["HEAD"])
+            self.assertEqual(_DownloadSiteHandler.sent.get("/download?id=1", 0), 0)
+            self.assertEqual(cache.get(self.base_url + "/page").text, pages[self.base_url + "/page"])
+            self.assertIsNone(cache._db_get(self.base_url + "/download?id=1"))
+            cache.close()
+
+    def test_streamed_download_keeps_other_2xx_bodies(self):
+        scraper = WebsiteScraper(self.base_url, max_bytes=100_000)
+        response = scraper._fetch(self.base_url + "/proxied")
+        self.assertEqual((response.status_code, response.text, response.headers.get("ETag")), (203, "<html><p>via proxy</p></html>", '"1"'))
+
+    def test_head_probe_acquires_a_scheduler_token_per_request(self):
+        scheduler = CrawlScheduler(respect_robots=False)
+        with patch.object(CrawlScheduler, "acquire", autospec=True, side_effect=CrawlScheduler.acquire) as acquire:
+            pages = WebsiteScraper(self.base_url, max_depth=1, max_bytes=100_000, head_probe=True, scheduler=scheduler).scrape()
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(sum(method == "GET" for method, _ in _DownloadSiteHandler.log), 3)  # /, /page and /unsized
+        self.assertEqual(acquire.call_count, len(_DownloadSiteHandler.log))
+
+
 class TestMarkdownConverter(unittest.TestCase):
     def test_convert_simple_html(self):
         converter = MarkdownConverter()
@@ -473,10 +1267,16 @@ class TestMarkdownConverter(unittest.TestCase):
         mock_markdownify_md.assert_called_once_with(html_content, heading_style="SETEXT")
 
 
+class _ShoutingConverter(MarkdownConverter):
+    # Module level so that converter_workers > 1 can pickle it.
+    def convert(self, html): return html.upper()
+
+
 class TestWebsiteMarkdownDocument(unittest.TestCase):
     @patch('markdown_analyzer_lib.markdown_analyzer.WebsiteScraper.scrape') # Corrected patch path
     @patch('markdown_analyzer_lib.markdown_analyzer.MarkdownConverter.convert') # Corrected patch path
     def test_generate_document(self, mock_convert, mock_scrape):
+        from bs4 import BeautifulSoup
         mock_scrape.return_value = {
             "http://example.com": "<html><head><title>Home Page</title></head><body><h1>Home</h1></body></html>", # Added title tag
             "http://example.com/about": "<html><head><title>About Us</title></head><body><h1>About</h1></body></html>"
@@ -485,6 +1285,7 @@ class TestWebsiteMarkdownDocument(unittest.TestCase):
 
         doc_generator = WebsiteMarkdownDocument("http://example.com", max_depth=1)
         markdown_doc = doc_generator.generate()
+        self.assertEqual(mock_convert.call_count, 2)  # an overridden convert() is used instead of the single-parse path
         
         self.assertIn("# Site Index", markdown_doc)
         self.assertIn("- [Home Page](#home-page)  <!-- Original URL: http://example.com -->", markdown_doc) # Anchor uses title
@@ -495,6 +1296,56 @@ class TestWebsiteMarkdownDocument(unittest.TestCase):
         self.assertIn("<!-- Source URL: http://example.com/about -->\n# About", markdown_doc)
 
 
+    def test_convert_page_matches_separate_parses(self):
+        converter = MarkdownConverter()
+        for html in ["<html><head><title> Home </title></head><body><h1>H</h1><p>a <b>b</b></p></body></html>", "<h1>Only</h1><ul><li>x</li></ul>", ""]:
+            self.assertEqual(converter.convert_page(html), (converter.convert(html), WebsiteMarkdownDocument._extract_title_from_html(html)))
+        html = "<title>T</title><h2>x</h2>"
+        with patch('markdown_analyzer_lib.markdown_analyzer._MARKDOWNIFY_SOUP_API', False):  # markdownify without convert_soup / bs4_options
+            self.assertEqual(converter.convert_page(html), (converter.convert(html), "T"))
+        bad = MarkdownConverter(strip=["a"], convert=["b"])
+        self.assertEqual(bad.convert_page(html)[0], bad.convert(html))
+
+    def test_convert_page_respects_overrides_and_reports_errors(self):
+        html = "<title>T</title><h2>x</h2>"
+        self.assertEqual(_ShoutingConverter().convert_page(html), ("<TITLE>T</TITLE><H2>X</H2>", "T"))
+        for error in (TypeError("bad tag"), AttributeError("bad tag")):  # reported in the output like convert() does
+            with patch('markdown_analyzer_lib.markdown_analyzer._MarkdownifyConverter.convert_soup', side_effect=error):
+                markdown, title = MarkdownConverter().convert_page(html)
+            self.assertEqual((markdown.splitlines()[0], title), ("<!-- Conversion Error: bad tag -->", "T"))
+        pages = {"http://example.com": "<title>Home</title><p>a</p>", "http://example.com/b": "<title>B</title><p>b</p>"}
+        for workers in (1, 2):
+            document = WebsiteMarkdownDocument("http://example.com", max_depth=1, converter_workers=workers); document.converter = _ShoutingConverter()
+            with patch.object(WebsiteScraper, 'scrape', return_value=pages): output = document.generate()
+            self.assertIn("<TITLE>B</TITLE><P>B</P>", output)
+
+    @patch('markdown_analyzer_lib.markdown_analyzer.WebsiteScraper.scrape')
+    def test_generate_with_process_pool_keeps_order(self, mock_scrape):
+        mock_scrape.return_value = {f"http://example.com/{i}": f"<title>Page {i}</title><h1>Head {i}</h1><p>Body {i}</p>" for i in (3, 1, 2, 10)}
+        serial = WebsiteMarkdownDocument("http://example.com", max_depth=1).generate()
+        pooled = WebsiteMarkdownDocument("http://example.com", max_depth=1, converter_workers=2).generate()
+        self.assertEqual(pooled, serial)
+        self.assertLess(serial.index("Original URL: http://example.com/1 "), serial.index("Original URL: http://example.com/10 "))
+
+    def test_write_streams_same_document_as_generate(self):
+        pages = [(f"http://example.com/{i}", f"<title>Page {i}</title><h1>Head {i}</h1><p>Body {i}</p>") for i in (1, 10, 2, 3)]
+        with tempfile.TemporaryDirectory() as tmp, patch('markdown_analyzer_lib.markdown_analyzer.WebsiteScraper.iter_pages', side_effect=lambda: iter(pages)):
+            output, index = os.path.join(tmp, "site.md"), os.path.join(tmp, "index.md")
+            read = lambda path: open(path, encoding="utf-8").read()
+            for workers in (1, 2):
+                document = WebsiteMarkdownDocument("http://example.com", converter_workers=workers)
+                self.assertEqual(document.write(output), 4)
+                self.assertEqual(read(output), document.generate())
+                self.assertEqual(os.listdir(tmp), ["site.md"])
+            document = WebsiteMarkdownDocument("http://example.com")
+            document.write(output, include_index=False)
+            self.assertEqual(read(output), document.generate(include_index_param=False))
+            document.write(output, index_file=index)
+            self.assertEqual(read(index) + "\n\n\n" + read(output), document.generate())
+            pages = []
+            self.assertEqual(document.write(output), 0)
+            self.assertEqual(read(output), "")
+
     def test_extract_title_from_markdown(self): # Renamed from _extract_title
         title = WebsiteMarkdownDocument._extract_title_from_markdown("# My Title\nContent")
         self.assertEqual(title, "My Title")
@@ -545,6 +1396,23 @@ class TestMarkdownDocument(unittest.TestCase):
     def tearDown(self):
         remove_temp_file(self.test_file)
 
+    def test_iter_chunks(self):
+        code = "```python\n" + "\n".join(f"print({i})" for i in range(10)) + "\n```"
+        text = f"Intro\n\n# A\nShort para.\n\n{code}\n\n## A1\n| h |\n|---|\n| 1 |\n\n" + " ".join(f"w{i}" for i in range(30))
+        doc = MarkdownDocument.from_string(text)
+        chunks = list(doc.iter_chunks(max_size=40))
+        self.assertEqual(chunks[0], {"text": "Intro", "headings": [], "start_line": 1, "end_line": 1, "size": 5})
+        self.assertEqual(chunks[1]["text"], "# A\n\nShort para.")
+        self.assertEqual(chunks[2]["text"], code)  # larger than the budget, but never split
+        self.assertEqual((chunks[3]["text"], chunks[3]["headings"]), ("## A1\n\n| h |\n|---|\n| 1 |", ["A", "A1"]))
+        self.assertEqual(" ".join(c["text"] for c in chunks[4:]), " ".join(f"w{i}" for i in range(30)))
+        for chunk in chunks:
+            self.assertEqual(chunk["size"], len(chunk["text"]))
+            if chunk is not chunks[2]: self.assertLessEqual(chunk["size"], 40)
+        by_words = list(MarkdownChunker(max_size=12, length_function=lambda s: len(s.split()), split_sections=False).iter_chunks(doc.analyzer))
+        self.assertEqual(by_words[0]["text"], "Intro\n\n# A\n\nShort para.")
+        self.assertEqual([c["headings"] for c in by_words][:2], [[], ["A"]])
+
     def test_from_file(self):
         doc = MarkdownDocument.from_file(self.test_file)
         self.assertIsInstance(doc.analyzer, MarkdownAnalyzer)